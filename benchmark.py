@@ -0,0 +1,357 @@
+"""
+Banc d'essai des opérations de GestionCSV (voir script.py).
+
+Génère des fichiers de produits synthétiques de taille et de cardinalité
+configurables, puis mesure pour chaque taille le temps de create_csv (suivi
+de l'ajout des lignes), add_product, delete_product, merge_csv et
+search_product, ainsi que le pic de mémoire résidente (RSS). Chaque mesure
+est faite dans un processus neuf, pour que le pic de mémoire d'une opération
+ne dépende pas des précédentes.
+
+    python benchmark.py --sizes 1e3 1e5 --output resultats.json
+    python benchmark.py --sizes 1e3 1e5 --baseline resultats.json
+
+Avec --startup, mesure plutôt le temps de démarrage à froid de la ligne de
+commande ('python script.py search'), comparé au budget --target_ms.
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows : pas de mesure du pic de mémoire
+    resource = None
+
+from script import GestionCSV
+
+
+OPERATIONS = ('create', 'add', 'delete', 'merge', 'search')
+SIZES = (1000, 10000, 100000)
+REPEAT = 3
+# Nombre de noms de produits distincts et de catégories dans les fichiers générés
+CARDINALITY = 1000
+CATEGORIES = 20
+# Nombre d'appels à add_product mesurés ensemble pour l'opération 'add'
+ADD_CALLS = 100
+# Écart relatif au-delà duquel une mesure est signalée comme une régression
+TOLERANCE = 0.2
+# Écart de temps absolu (en secondes) en dessous duquel une différence est du bruit
+NOISE_FLOOR = 0.002
+SOURCE_FILE = "produits.csv"
+# Budget de démarrage de 'python script.py search', en millisecondes
+STARTUP_TARGET_MS = 100
+STARTUP_RUNS = 20
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def generate_products(nb_lignes, cardinality=CARDINALITY, categories=CATEGORIES, seed=0):
+    """
+    Génère nb_lignes produits aléatoires (reproductibles pour une même graine),
+    parmi cardinality noms et categories catégories.
+    """
+    rng = random.Random(seed)
+    for _ in range(nb_lignes):
+        yield [f"Produit_{rng.randrange(cardinality)}", str(rng.randint(1, 1000)),
+               f"{rng.uniform(0.1, 1000):.2f}", f"Catégorie_{rng.randrange(categories)}"]
+
+
+def write_source(file_path, nb_lignes, cardinality=CARDINALITY, categories=CATEGORIES, seed=0):
+    """
+    Écrit un fichier CSV de nb_lignes produits générés, avec l'en-tête de GestionCSV.
+    """
+    with open(file_path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(GestionCSV.HEADERS)
+        writer.writerows(generate_products(nb_lignes, cardinality, categories, seed))
+
+
+def peak_rss_kb():
+    """
+    Renvoie le pic de mémoire résidente du processus courant en Ko, ou None
+    si la plateforme ne permet pas de le mesurer.
+    """
+    if resource is None:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS et en Ko ailleurs
+    return pic // 1024 if sys.platform == 'darwin' else pic
+
+
+def _prepare(gestion_csv, operation, source_path, extension):
+    """
+    Prépare les fichiers d'une mesure (hors chronométrage) et renvoie le nom
+    du fichier de produits, au format de extension.
+    """
+    for directory in (gestion_csv.LISTE_CSV_DIR, gestion_csv.RECAP_CSV_DIR):
+        shutil.rmtree(directory, ignore_errors=True)
+    gestion_csv.ensure_directories()
+    if operation == 'create':
+        return "bench" + extension
+
+    shutil.copyfile(source_path, gestion_csv.get_file_path(SOURCE_FILE, is_recap=False))
+    file_name = SOURCE_FILE
+    if extension != ".csv":
+        file_name = "produits" + extension
+        gestion_csv.export_products(SOURCE_FILE, file_name)
+    if operation == 'merge':
+        shutil.copyfile(gestion_csv.get_file_path(file_name, is_recap=False),
+                        gestion_csv.get_file_path("copie_" + file_name, is_recap=False))
+    return file_name
+
+
+def _run(gestion_csv, operation, file_name, nb_lignes, extension, options):
+    """
+    Exécute une fois l'opération mesurée. Renvoie le nombre d'appels effectués.
+    """
+    if operation == 'create':
+        gestion_csv.create_csv(file_name)
+        gestion_csv.add_products(file_name, generate_products(nb_lignes, options['cardinality'],
+                                                              options['categories'], options['seed']),
+                                 is_recap=False)
+        return 1
+    if operation == 'add':
+        for i in range(ADD_CALLS):
+            gestion_csv.add_product(file_name, [f"Ajout_{i}", "1", "1.5", "Catégorie_0"], is_recap=False)
+        return ADD_CALLS
+    if operation == 'delete':
+        gestion_csv.delete_product(file_name, "Produit_0", is_recap=False)
+        return 1
+    if operation == 'merge':
+        gestion_csv.merge_csv([file_name, "copie_" + file_name], "recap" + extension)
+        return 1
+    gestion_csv.search_product(file_name, product_name="Produit_0")
+    return 1
+
+
+def measure(operation, nb_lignes, source_path, workdir, extension=".csv", repeat=REPEAT, options=None):
+    """
+    Mesure une opération sur un fichier de nb_lignes produits, dans le répertoire
+    de travail workdir. Appelée dans un processus dédié : change de répertoire
+    courant et redirige la sortie de GestionCSV. Renvoie le meilleur temps sur
+    repeat exécutions et le pic de mémoire résidente.
+    """
+    options = options or {'cardinality': CARDINALITY, 'categories': CATEGORIES, 'seed': 0}
+    os.chdir(workdir)
+    gestion_csv = GestionCSV()
+    rss_initial = peak_rss_kb()
+    temps = []
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+        for _ in range(repeat):
+            file_name = _prepare(gestion_csv, operation, source_path, extension)
+            debut = time.perf_counter()
+            appels = _run(gestion_csv, operation, file_name, nb_lignes, extension, options)
+            temps.append(time.perf_counter() - debut)
+    return {
+        'operation': operation,
+        'lignes': nb_lignes,
+        'appels': appels,
+        'secondes': min(temps),
+        'secondes_moyenne': sum(temps) / len(temps),
+        'rss_initial_ko': rss_initial,
+        'rss_max_ko': peak_rss_kb(),
+    }
+
+
+def run_benchmark(sizes=SIZES, operations=OPERATIONS, extension=".csv", repeat=REPEAT,
+                  cardinality=CARDINALITY, categories=CATEGORIES, seed=0, workdir=None):
+    """
+    Mesure chaque opération pour chaque taille, chacune dans un processus neuf.
+    Renvoie le document de résultats : informations sur l'environnement et
+    liste des mesures.
+    """
+    options = {'cardinality': cardinality, 'categories': categories, 'seed': seed}
+    contexte = multiprocessing.get_context('spawn')
+    racine = tempfile.mkdtemp(prefix="gestion_csv_bench_", dir=workdir)
+    resultats = []
+    try:
+        for nb_lignes in sizes:
+            source_path = os.path.join(racine, f"source_{nb_lignes}.csv")
+            write_source(source_path, nb_lignes, cardinality, categories, seed)
+            for operation in operations:
+                dossier = tempfile.mkdtemp(prefix=operation + "_", dir=racine)
+                with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=contexte) as pool:
+                    resultat = pool.submit(measure, operation, nb_lignes, source_path, dossier,
+                                           extension, repeat, options).result()
+                shutil.rmtree(dossier, ignore_errors=True)
+                print(f"{operation:<8} {nb_lignes:>10} lignes : {format_result(resultat)}", file=sys.stderr)
+                resultats.append(resultat)
+            os.remove(source_path)
+    finally:
+        shutil.rmtree(racine, ignore_errors=True)
+
+    return {
+        'environnement': {
+            'python': platform.python_version(),
+            'plateforme': platform.platform(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'extension': extension,
+            'repetitions': repeat,
+            'cardinalite': cardinality,
+            'categories': categories,
+        },
+        'resultats': resultats,
+    }
+
+
+def measure_startup(runs=STARTUP_RUNS, module=False, workdir=None):
+    """
+    Mesure le temps de démarrage à froid de 'python script.py search' sur un
+    petit fichier, runs fois dans des processus neufs (après une exécution
+    d'échauffement). Avec module=True, mesure 'python -m script search', qui
+    profite du cache de bytecode au lieu de recompiler script.py à chaque fois.
+    Renvoie la commande mesurée et les temps minimal et médian en millisecondes.
+    """
+    dossier = tempfile.mkdtemp(prefix="gestion_csv_startup_", dir=workdir)
+    try:
+        os.mkdir(os.path.join(dossier, GestionCSV.LISTE_CSV_DIR))
+        write_source(os.path.join(dossier, GestionCSV.LISTE_CSV_DIR, SOURCE_FILE), 100)
+        lancement = ['-m', 'script'] if module else [os.path.join(SCRIPT_DIR, 'script.py')]
+        commande = [sys.executable] + lancement + ['search', SOURCE_FILE, '--product_name', 'Produit_0']
+        env = dict(os.environ, PYTHONPATH=SCRIPT_DIR)
+
+        temps = []
+        for i in range(runs + 1):
+            debut = time.perf_counter()
+            subprocess.run(commande, cwd=dossier, env=env, stdout=subprocess.DEVNULL, check=True)
+            if i:
+                temps.append((time.perf_counter() - debut) * 1000)
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+
+    return {
+        'commande': f"python {'-m script' if module else 'script.py'} search",
+        'min_ms': min(temps),
+        'mediane_ms': statistics.median(temps),
+    }
+
+
+def format_result(resultat):
+    """
+    Renvoie une mesure sous forme lisible : temps et pic de mémoire.
+    """
+    rss = resultat['rss_max_ko']
+    memoire = f"{rss / 1024:.1f} Mo" if rss is not None else "n/d"
+    return f"{resultat['secondes']:.4f} s, pic RSS {memoire}"
+
+
+def compare_results(resultats, reference, tolerance=TOLERANCE):
+    """
+    Compare des mesures à celles d'une référence (même format que run_benchmark).
+    Renvoie la liste des régressions : opérations plus lentes ou plus gourmandes
+    en mémoire que la référence au-delà de tolerance (écart relatif). Les écarts
+    de temps inférieurs à NOISE_FLOOR ne sont pas signalés.
+    """
+    anciens = {(r['operation'], r['lignes']): r for r in reference['resultats']}
+    regressions = []
+    for resultat in resultats['resultats']:
+        ancien = anciens.get((resultat['operation'], resultat['lignes']))
+        if ancien is None:
+            continue
+        ecart = resultat['secondes'] - ancien['secondes']
+        if ecart > NOISE_FLOOR and resultat['secondes'] > ancien['secondes'] * (1 + tolerance):
+            regressions.append({'operation': resultat['operation'], 'lignes': resultat['lignes'],
+                                'mesure': 'secondes', 'reference': ancien['secondes'],
+                                'valeur': resultat['secondes']})
+        if resultat['rss_max_ko'] and ancien.get('rss_max_ko') \
+                and resultat['rss_max_ko'] > ancien['rss_max_ko'] * (1 + tolerance):
+            regressions.append({'operation': resultat['operation'], 'lignes': resultat['lignes'],
+                                'mesure': 'rss_max_ko', 'reference': ancien['rss_max_ko'],
+                                'valeur': resultat['rss_max_ko']})
+    return regressions
+
+
+def _parse_size(texte):
+    """
+    Convertit une taille de la ligne de commande (1000, 1e6...) en entier.
+    """
+    try:
+        taille = int(float(texte))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"taille invalide : '{texte}'")
+    if taille <= 0:
+        raise argparse.ArgumentTypeError(f"taille invalide : '{texte}'")
+    return taille
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai des opérations de GestionCSV")
+    parser.add_argument('--sizes', nargs='+', type=_parse_size, default=list(SIZES),
+                        help="Nombres de lignes des fichiers générés (par exemple 1e3 1e5 1e7)")
+    parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=list(OPERATIONS),
+                        help="Opérations mesurées")
+    parser.add_argument('--extension', default=".csv",
+                        help="Extension des fichiers mesurés, qui choisit le moteur de stockage (.csv, .col, .sqlite, .gz...)")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="Nombre d'exécutions par mesure (le meilleur temps est retenu)")
+    parser.add_argument('--cardinality', type=int, default=CARDINALITY, help="Nombre de noms de produits distincts")
+    parser.add_argument('--categories', type=int, default=CATEGORIES, help="Nombre de catégories distinctes")
+    parser.add_argument('--seed', type=int, default=0, help="Graine du générateur de produits")
+    parser.add_argument('--workdir', help="Répertoire des fichiers temporaires (par défaut celui du système)")
+    parser.add_argument('--output', help="Fichier JSON où écrire les résultats ('-' pour la sortie standard)")
+    parser.add_argument('--baseline', help="Fichier JSON de résultats de référence à comparer")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="Écart relatif toléré par rapport à la référence (0.2 pour 20 %%)")
+    parser.add_argument('--startup', action='store_true',
+                        help="Mesure le temps de démarrage de 'python script.py search' au lieu des opérations")
+    parser.add_argument('--runs', type=int, default=STARTUP_RUNS, help="Nombre de démarrages mesurés (pour --startup)")
+    parser.add_argument('--target_ms', type=float, default=STARTUP_TARGET_MS,
+                        help="Budget de démarrage en millisecondes, comparé au temps médian (pour --startup)")
+    args = parser.parse_args()
+
+    if args.startup:
+        mesures = [measure_startup(args.runs, module, args.workdir) for module in (False, True)]
+        for mesure in mesures:
+            print(f"{mesure['commande']:<28} : min {mesure['min_ms']:.1f} ms, médiane {mesure['mediane_ms']:.1f} ms",
+                  file=sys.stderr)
+        if args.output:
+            resultats = {'environnement': {'python': platform.python_version(), 'plateforme': platform.platform(),
+                                           'date': time.strftime('%Y-%m-%dT%H:%M:%S')},
+                         'demarrage': mesures, 'budget_ms': args.target_ms}
+            with open(args.output, mode='w', encoding='utf-8') if args.output != '-' else contextlib.nullcontext(sys.stdout) as file:
+                json.dump(resultats, file, ensure_ascii=False, indent=2)
+        if mesures[0]['mediane_ms'] > args.target_ms:
+            print(f"Budget de démarrage dépassé : {mesures[0]['mediane_ms']:.1f} ms > {args.target_ms:g} ms.", file=sys.stderr)
+            sys.exit(1)
+        print(f"Démarrage dans le budget de {args.target_ms:g} ms.", file=sys.stderr)
+        return
+
+    resultats = run_benchmark(args.sizes, args.operations, args.extension, args.repeat,
+                              args.cardinality, args.categories, args.seed, args.workdir)
+
+    if args.output == '-':
+        json.dump(resultats, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    elif args.output:
+        with open(args.output, mode='w', encoding='utf-8') as file:
+            json.dump(resultats, file, ensure_ascii=False, indent=2)
+        print(f"Résultats écrits dans '{args.output}'.", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, mode='r', encoding='utf-8') as file:
+            reference = json.load(file)
+        if reference.get('environnement', {}).get('extension') != args.extension:
+            print(f"Attention : la référence a été mesurée avec l'extension "
+                  f"'{reference.get('environnement', {}).get('extension')}'.", file=sys.stderr)
+        regressions = compare_results(resultats, reference, args.tolerance)
+        for regression in regressions:
+            print(f"RÉGRESSION {regression['operation']} ({regression['lignes']} lignes) : "
+                  f"{regression['mesure']} {regression['reference']} -> {regression['valeur']}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("Aucune régression par rapport à la référence.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,164 +1,4141 @@
+import abc
 import csv
 import os
+import io
+import sys
+import json
+import time
+import re
+import glob
+import mmap
+import queue
+import threading
+import operator
+import array
+import struct
+import heapq
+import itertools
+import functools
+import collections
+import zlib
 import argparse
+import contextlib
 import cmd
 
+# Modules propres à certaines actions, importés à la demande pour accélérer le
+# démarrage de la ligne de commande : asyncio et socket (démon et client),
+# concurrent.futures (fusion et recherche parallèles), sqlite3, gzip et lzma
+# (moteurs de stockage), hashlib (manifeste de fusion), tempfile et shutil
+# (réécritures de fichiers)
 
-class GestionCSV:
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrouillage consultatif
+    fcntl = None
+
+
+# Produit lu dans un fichier CSV, avec la quantité et le prix convertis en nombres
+Produit = collections.namedtuple('Produit', ['nom', 'quantite', 'prix', 'categorie'])
+
+
+class ProduitLu(Produit):
     """
-    Cette classe gère la création, la modification, la recherche, et la fusion
-    de fichiers CSV dans des répertoires spécifiques.
+    Produit lu dans un fichier texte, dont l'attribut textes contient les
+    valeurs telles qu'elles sont écrites dans le fichier ("1.50", "007") :
+    search_product les affiche, les nombres ne servant qu'aux comparaisons.
+    """
+
+    @classmethod
+    def from_texts(cls, textes, quantite, prix):
+        # tuple.__new__ directement : un produit est créé par ligne lue
+        produit = tuple.__new__(cls, (textes[0], quantite, prix, textes[3]))
+        produit.textes = textes
+        return produit
+
+
+class TableProduits:
+    """
+    Représentation compacte, par colonnes, des produits d'un fichier chargé en mémoire.
+    Les quantités et les prix sont stockés dans des tableaux typés (array 'q' et 'd'),
+    les noms et les catégories sous forme d'indices dans une table de chaînes
+    partagée, où chaque chaîne n'est stockée qu'une fois.
     """
-    LISTE_CSV_DIR = "liste_csv"
-    RECAP_CSV_DIR = "recap_csv"
 
     def __init__(self):
-        self.ensure_directories()
+        self.chaines = []
+        self._indices_chaines = {}
+        self.noms = array.array('I')
+        self.quantites = array.array('q')
+        self.prix = array.array('d')
+        self.categories = array.array('I')
+        # Textes de la quantité et du prix lus dans le fichier, pour les seules
+        # lignes où ils diffèrent de l'écriture affichée des nombres ("1.50", "007")
+        self.textes = {}
+        # Lignes du fichier ignorées au chargement (quantité ou prix invalide)
+        self.rejetes = 0
 
-    def ensure_directories(self):
+    def _intern(self, chaine):
+        indice = self._indices_chaines.get(chaine)
+        if indice is None:
+            indice = self._indices_chaines[chaine] = len(self.chaines)
+            self.chaines.append(chaine)
+        return indice
+
+    def append(self, nom, quantite, prix, categorie):
         """
-        Crée les répertoires nécessaires s'ils n'existent pas déjà.
+        Ajoute un produit. La quantité doit être un nombre entier ("10" ou
+        "10.0") et le prix un nombre (ValueError sinon, sans que la table ne
+        soit modifiée).
         """
-        os.makedirs(self.LISTE_CSV_DIR, exist_ok=True)
-        os.makedirs(self.RECAP_CSV_DIR, exist_ok=True)
+        quantite_nombre = StockageTypes.parse_quantity(quantite)
+        prix_nombre = float(prix)
+        if isinstance(quantite, str) and isinstance(prix, str) and \
+                (quantite != str(quantite_nombre) or prix != GestionCSV._format_number(prix_nombre)):
+            self.textes[len(self.noms)] = (quantite, prix)
+        self.noms.append(self._intern(nom))
+        self.quantites.append(quantite_nombre)
+        self.prix.append(prix_nombre)
+        self.categories.append(self._intern(categorie))
+
+    def __len__(self):
+        return len(self.noms)
+
+    def without(self, noms):
+        """
+        Renvoie une nouvelle table sans les produits dont le nom est dans noms.
+        """
+        indices_exclus = {self._indices_chaines[nom] for nom in noms if nom in self._indices_chaines}
+        table = TableProduits()
+        table.rejetes = self.rejetes
+        for product, nom in zip(self, self.noms):
+            if nom not in indices_exclus:
+                table.append(*getattr(product, 'textes', product))
+        return table
+
+    def _product(self, i, nom, quantite, prix, categorie):
+        textes = self.textes.get(i)
+        if textes is None:
+            return Produit(nom, quantite, prix, categorie)
+        return ProduitLu.from_texts([nom, textes[0], textes[1], categorie], quantite, prix)
+
+    def __getitem__(self, i):
+        return self._product(i, self.chaines[self.noms[i]], self.quantites[i], self.prix[i],
+                             self.chaines[self.categories[i]])
+
+    def __iter__(self):
+        chaines = self.chaines
+        textes = self.textes
+        for i, (nom, quantite, prix, categorie) in enumerate(zip(self.noms, self.quantites, self.prix, self.categories)):
+            if textes and i in textes:
+                yield self._product(i, chaines[nom], quantite, prix, chaines[categorie])
+            else:
+                yield Produit(chaines[nom], quantite, prix, chaines[categorie])
+
+    @property
+    def nbytes(self):
+        """
+        Estimation de la mémoire occupée par la table, en octets.
+        """
+        colonnes = sum(colonne.itemsize * len(colonne)
+                       for colonne in (self.noms, self.quantites, self.prix, self.categories))
+        chaines = sum(sys.getsizeof(chaine) for chaine in self.chaines)
+        return (colonnes + chaines + sys.getsizeof(self.chaines) + sys.getsizeof(self._indices_chaines)
+                + sys.getsizeof(self.textes) + len(self.textes) * 200)
+
+    def select(self, product_name=None, product_categ=None, product_prize=None, product_quantity=None):
+        """
+        Renvoie, dans l'ordre du fichier, les produits correspondant à au moins un
+        des critères. Le prix et la quantité sont comparés en tant que nombres.
+        """
+        selection = set()
+        for colonne, valeur in ((self.noms, product_name), (self.categories, product_categ)):
+            if valeur is not None and valeur in self._indices_chaines:
+                indice = self._indices_chaines[valeur]
+                selection.update(i for i, v in enumerate(colonne) if v == indice)
+        for colonne, valeur in ((self.prix, product_prize), (self.quantites, product_quantity)):
+            if valeur is not None:
+                try:
+                    nombre = float(valeur)
+                except ValueError:
+                    continue
+                selection.update(i for i, v in enumerate(colonne) if v == nombre)
+        return [self[i] for i in sorted(selection)]
+
+
+def _import_numpy():
+    """
+    Renvoie le module numpy s'il est installé, None sinon (import différé,
+    numpy n'étant utile qu'aux requêtes sur de gros fichiers).
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _import_zstandard():
+    """
+    Renvoie le module zstandard s'il est installé, None sinon (seuls les
+    fichiers .zst en ont besoin).
+    """
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+class Requete:
+    """
+    Requête de recherche combinant des conditions sur les colonnes, par exemple :
+        categorie = Sport AND prix < 40000 AND quantite >= 5
+        nom ^= Audi OR (categorie *= Elec AND NOT prix = 40000..50000)
+    Opérateurs : =, !=, <, <=, >, >=, ^= (commence par), *= (contient) et
+    'champ = min..max' pour un intervalle (bornes comprises). Les valeurs
+    contenant des espaces s'écrivent entre guillemets.
+    La requête est évaluée par colonnes entières sur une TableProduits, avec
+    numpy s'il est disponible.
+    """
+    CHAMPS = {
+        'nom': 'noms', 'quantite': 'quantites', 'quantité': 'quantites',
+        'prix': 'prix', 'categorie': 'categories', 'catégorie': 'categories',
+    }
+    OPERATEURS = {
+        '=': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le,
+        '>': operator.gt, '>=': operator.ge,
+        '^=': lambda chaine, valeur: chaine.startswith(valeur),
+        '*=': lambda chaine, valeur: valeur in chaine,
+    }
+    _JETONS = re.compile(r"""\s*(?:(\()|(\))|(<=|>=|!=|\^=|\*=|=|<|>)|"([^"]*)"|'([^']*)'|([^\s()<>=!"']+))""")
+
+    def __init__(self, texte):
+        self.texte = texte
+        self._jetons = self._tokenize(texte)
+        self._position = 0
+        self.arbre = self._parse_or()
+        if self._position < len(self._jetons):
+            raise ValueError(f"élément inattendu '{self._jetons[self._position][1]}'")
+
+    def _tokenize(self, texte):
+        jetons = []
+        position = 0
+        texte = texte.rstrip()
+        while position < len(texte):
+            correspondance = self._JETONS.match(texte, position)
+            if not correspondance:
+                raise ValueError(f"caractère inattendu '{texte[position]}'")
+            position = correspondance.end()
+            ouvrante, fermante, operateur, guillemets, apostrophes, mot = correspondance.groups()
+            if ouvrante or fermante:
+                jetons.append(('parenthese', ouvrante or fermante))
+            elif operateur:
+                jetons.append(('operateur', operateur))
+            elif mot is not None and mot.upper() in ('AND', 'OR', 'NOT'):
+                jetons.append(('mot_cle', mot.upper()))
+            else:
+                jetons.append(('valeur', mot if mot is not None else (guillemets if guillemets is not None else apostrophes)))
+        return jetons
+
+    def _suivant(self, attendu=None):
+        if self._position >= len(self._jetons):
+            raise ValueError("requête incomplète")
+        jeton = self._jetons[self._position]
+        if attendu and jeton[0] != attendu:
+            raise ValueError(f"élément inattendu '{jeton[1]}'")
+        self._position += 1
+        return jeton
+
+    def _regarde(self, valeur):
+        return self._position < len(self._jetons) and self._jetons[self._position][1] == valeur
+
+    def _parse_or(self):
+        arbre = self._parse_and()
+        while self._regarde('OR'):
+            self._position += 1
+            arbre = ('or', arbre, self._parse_and())
+        return arbre
+
+    def _parse_and(self):
+        arbre = self._parse_not()
+        while self._regarde('AND'):
+            self._position += 1
+            arbre = ('and', arbre, self._parse_not())
+        return arbre
+
+    def _parse_not(self):
+        if self._regarde('NOT'):
+            self._position += 1
+            return ('not', self._parse_not())
+        if self._regarde('('):
+            self._position += 1
+            arbre = self._parse_or()
+            if not self._regarde(')'):
+                raise ValueError("parenthèse fermante manquante")
+            self._position += 1
+            return arbre
+        return self._parse_condition()
+
+    def _parse_condition(self):
+        champ = self._suivant('valeur')[1]
+        if champ.lower() not in self.CHAMPS:
+            raise ValueError(f"champ '{champ}' inconnu (champs : nom, quantite, prix, categorie)")
+        colonne = self.CHAMPS[champ.lower()]
+        operateur = self._suivant('operateur')[1]
+        valeur = self._suivant('valeur')[1]
+
+        numerique = colonne in ('quantites', 'prix')
+        if operateur == '=' and '..' in valeur:
+            bornes = valeur.split('..', 1)
+            bornes = [self._convert(colonne, borne) for borne in bornes]
+            return ('and', ('condition', colonne, '>=', bornes[0]), ('condition', colonne, '<=', bornes[1]))
+        if numerique and operateur in ('^=', '*='):
+            raise ValueError(f"l'opérateur '{operateur}' ne s'applique qu'au nom et à la catégorie")
+        return ('condition', colonne, operateur, self._convert(colonne, valeur))
+
+    @staticmethod
+    def _convert(colonne, valeur):
+        if colonne not in ('quantites', 'prix'):
+            return valeur
+        try:
+            return float(valeur)
+        except ValueError:
+            raise ValueError(f"'{valeur}' n'est pas un nombre") from None
+
+    def evaluate(self, table, np=False):
+        """
+        Renvoie les indices (dans l'ordre) des produits de la table qui
+        satisfont la requête. np : module numpy à utiliser, None pour forcer
+        l'évaluation en Python pur, False pour utiliser numpy s'il est installé.
+        """
+        if np is False:
+            np = _import_numpy()
+        masque = self._evaluate(self.arbre, table, np)
+        if np is not None:
+            return np.flatnonzero(masque).tolist()
+        return list(itertools.compress(range(len(table)), masque))
+
+    def _evaluate(self, arbre, table, np):
+        if arbre[0] == 'and':
+            gauche, droite = self._evaluate(arbre[1], table, np), self._evaluate(arbre[2], table, np)
+            return gauche & droite if np is not None else list(map(operator.and_, gauche, droite))
+        if arbre[0] == 'or':
+            gauche, droite = self._evaluate(arbre[1], table, np), self._evaluate(arbre[2], table, np)
+            return gauche | droite if np is not None else list(map(operator.or_, gauche, droite))
+        if arbre[0] == 'not':
+            masque = self._evaluate(arbre[1], table, np)
+            return ~masque if np is not None else [not m for m in masque]
+
+        _, colonne, operateur, valeur = arbre
+        comparer = self.OPERATEURS[operateur]
+        valeurs = getattr(table, colonne)
+
+        if colonne in ('quantites', 'prix'):
+            if np is not None:
+                return comparer(np.frombuffer(valeurs, dtype=np.int64 if valeurs.typecode == 'q' else np.float64), valeur)
+            return [comparer(v, valeur) for v in valeurs]
+
+        # Noms et catégories : la condition est évaluée une fois par chaîne distincte
+        retenus = {i for i, chaine in enumerate(table.chaines) if comparer(chaine, valeur)}
+        if np is not None:
+            return np.isin(np.frombuffer(valeurs, dtype=np.uint32), np.fromiter(retenus, dtype=np.uint32, count=len(retenus)))
+        return [v in retenus for v in valeurs]
+
+
+class CacheFichiers:
+    """
+    Cache LRU des fichiers déjà lus (tables de produits, index), borné par un
+    budget mémoire en octets. Chaque entrée est associée à la signature du
+    fichier au moment de sa lecture : une entrée dont le fichier a changé
+    depuis est considérée comme absente. Le cache peut être partagé entre
+    threads (voir ServeurCSV).
+    """
+
+    def __init__(self, budget=256 * 1024 * 1024):
+        self.budget = budget
+        self._entrees = collections.OrderedDict()  # clé -> (signature, valeur, taille)
+        self._verrou = threading.RLock()
+        self.taille = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, cle, signature):
+        """
+        Renvoie la valeur en cache pour cette clé si elle correspond à la signature, None sinon.
+        """
+        with self._verrou:
+            valeur = self.peek(cle, signature)
+            if valeur is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entrees.move_to_end(cle)
+            return valeur
+
+    def peek(self, cle, signature):
+        """
+        Comme get, sans compter l'accès dans les statistiques. Une entrée périmée est supprimée.
+        """
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None and entree[0] != signature:
+                self.invalidate(cle)
+                return None
+            return entree[1] if entree is not None else None
+
+    def put(self, cle, signature, valeur, taille):
+        """
+        Enregistre une valeur et évince les entrées les moins récemment utilisées
+        tant que le budget est dépassé. Une valeur plus grande que le budget n'est pas gardée.
+        """
+        with self._verrou:
+            self.invalidate(cle)
+            if taille > self.budget:
+                return
+            self._entrees[cle] = (signature, valeur, taille)
+            self.taille += taille
+            self._evict()
+
+    def invalidate(self, cle):
+        with self._verrou:
+            entree = self._entrees.pop(cle, None)
+            if entree is not None:
+                self.taille -= entree[2]
+
+    def clear(self):
+        with self._verrou:
+            self._entrees.clear()
+            self.taille = 0
+
+    def resize(self, budget):
+        """
+        Change le budget et évince les entrées en trop.
+        """
+        with self._verrou:
+            self.budget = budget
+            self._evict()
+
+    def _evict(self):
+        while self.taille > self.budget:
+            _, (_, _, taille_evincee) = self._entrees.popitem(last=False)
+            self.taille -= taille_evincee
+            self.evictions += 1
+
+    def stats(self):
+        acces = self.hits + self.misses
+        return {
+            'entrees': len(self._entrees),
+            'memoire': self.taille,
+            'budget': self.budget,
+            'hits': self.hits,
+            'misses': self.misses,
+            'ratio': self.hits / acces if acces else 0.0,
+            'evictions': self.evictions,
+        }
+
+
+class FiltreBloom:
+    """
+    Filtre de Bloom sur les noms de produits d'un fichier, stocké dans un
+    tampon (bytearray ou mmap du fichier annexe) : une entête, puis le tableau
+    de bits. Un nom absent du filtre est absent du fichier ; un nom présent
+    peut l'être à tort (avec une probabilité TAUX_FAUX_POSITIFS tant que le
+    nombre de noms ne dépasse pas la capacité). Les noms sont donnés sous
+    forme de chaînes, ou d'octets déjà encodés en UTF-8.
+    L'entête contient la signature (taille, date de modification) du fichier
+    décrit : un filtre dont la signature ne correspond plus est ignoré.
+    """
+    MAGIC = b'CSVBLM01'
+    # magic, taille et date de modification du fichier, nombre de bits, de hachages, de noms
+    ENTETE = struct.Struct('<8sqqQIQ')
+    TAUX_FAUX_POSITIFS = 0.01
+    CAPACITE_MIN = 1024
+    # Valeur initiale de la seconde empreinte (crc32), indépendante de la première
+    GRAINE = 0x9E3779B9
+    # Noms traités à la fois par add_many avec numpy, utilisé à partir de SEUIL_NUMPY noms
+    TAILLE_LOT = 100000
+    SEUIL_NUMPY = 1000
+
+    def __init__(self, buffer):
+        magic, taille, mtime_ns, self.nb_bits, self.nb_hachages, self.nombre = self.ENTETE.unpack_from(buffer)
+        if magic != self.MAGIC or len(buffer) != self.ENTETE.size + (self.nb_bits + 7) // 8:
+            raise ValueError("filtre de Bloom invalide")
+        self.buffer = buffer
+        self.signature = [taille, mtime_ns]
+
+    @classmethod
+    def create(cls, capacite, signature):
+        """
+        Renvoie un filtre vide dimensionné pour capacite noms.
+        """
+        import math
+
+        capacite = max(capacite, cls.CAPACITE_MIN)
+        nb_bits = math.ceil(-capacite * math.log(cls.TAUX_FAUX_POSITIFS) / math.log(2) ** 2)
+        nb_hachages = max(1, round(nb_bits / capacite * math.log(2)))
+        buffer = bytearray(cls.ENTETE.size + (nb_bits + 7) // 8)
+        cls.ENTETE.pack_into(buffer, 0, cls.MAGIC, *signature, nb_bits, nb_hachages, 0)
+        return cls(buffer)
+
+    @property
+    def capacite(self):
+        """
+        Nombre de noms au-delà duquel le taux de faux positifs dépasse TAUX_FAUX_POSITIFS.
+        """
+        import math
+
+        return int(self.nb_bits * math.log(2) ** 2 / -math.log(self.TAUX_FAUX_POSITIFS))
+
+    @staticmethod
+    def _encode(nom):
+        return nom if isinstance(nom, bytes) else nom.encode('utf-8')
+
+    def _positions(self, nom):
+        # Double hachage : deux empreintes de 32 bits combinées nb_hachages fois
+        donnees = self._encode(nom)
+        h1 = zlib.crc32(donnees)
+        h2 = zlib.crc32(donnees, self.GRAINE) | 1
+        return [(h1 + i * h2) % self.nb_bits for i in range(self.nb_hachages)]
+
+    def add(self, nom):
+        buffer = self.buffer
+        debut = self.ENTETE.size
+        nouveau = False
+        for position in self._positions(nom):
+            octet = debut + (position >> 3)
+            masque = 1 << (position & 7)
+            if not buffer[octet] & masque:
+                buffer[octet] |= masque
+                nouveau = True
+        if nouveau:
+            self.nombre += 1
+
+    def add_many(self, noms):
+        """
+        Ajoute une collection de noms (tous chaînes ou tous octets) ; avec numpy,
+        les positions sont calculées par paquets de TAILLE_LOT noms et les bits
+        positionnés en une seule fois.
+        """
+        numpy = _import_numpy() if len(noms) >= self.SEUIL_NUMPY else None
+        if numpy is None:
+            for nom in noms:
+                self.add(nom)
+            return
+
+        noms = iter(noms)
+        bits = numpy.frombuffer(self.buffer, dtype=numpy.uint8, offset=self.ENTETE.size)
+        rangs = numpy.arange(self.nb_hachages, dtype=numpy.uint64)
+        tableau = numpy.unpackbits(bits, bitorder='little')
+        for lot in iter(lambda: list(itertools.islice(noms, self.TAILLE_LOT)), []):
+            if isinstance(lot[0], str):
+                lot = list(map(str.encode, lot))
+            h1 = numpy.fromiter(map(zlib.crc32, lot), dtype=numpy.uint64, count=len(lot))
+            h2 = numpy.fromiter(map(zlib.crc32, lot, itertools.repeat(self.GRAINE)), dtype=numpy.uint64, count=len(lot))
+            h2 |= numpy.uint64(1)
+            positions = (h1[:, None] + rangs * h2[:, None]) % numpy.uint64(self.nb_bits)
+            self.nombre += int((~tableau[positions].all(axis=1)).sum())
+            tableau[positions.ravel()] = 1
+        bits[:] = numpy.packbits(tableau, bitorder='little')
+
+    def __contains__(self, nom):
+        buffer = self.buffer
+        debut = self.ENTETE.size
+        return all(buffer[debut + (position >> 3)] & (1 << (position & 7)) for position in self._positions(nom))
+
+    def set_signature(self, signature):
+        """
+        Enregistre dans l'entête la signature du fichier et le nombre de noms.
+        """
+        self.signature = list(signature)
+        self.ENTETE.pack_into(self.buffer, 0, self.MAGIC, *signature, self.nb_bits, self.nb_hachages, self.nombre)
+
+
+class BlocsCSV:
+    """
+    Analyse d'un CSV lu par blocs d'octets, donnés dans l'ordre (feed) à partir
+    de la ligne qui suit les entêtes : ensemble des noms de produits (encodés
+    en UTF-8, pour le filtre de Bloom) et, si resume est donné, statistiques
+    par catégorie ajoutées à ce ResumeStock. Seuls les enregistrements complets
+    d'un bloc sont analysés, la fin attendant le bloc suivant. Un bloc sans
+    guillemets est découpé par expression régulière, sans décodage ; sinon,
+    ses enregistrements (dont les champs peuvent contenir des virgules ou des
+    fins de ligne) sont lus avec le module csv.
+    """
+    DEBUT_LIGNE = re.compile(rb'^[^,\r\n]*', re.MULTILINE)
+    # Ligne entière, nom, puis quantité, prix et catégorie si la ligne a au moins quatre champs
+    LIGNE = re.compile(rb'^(([^,\r\n]*)(?:,([^,\r\n]*),([^,\r\n]*),([^,\r\n]*))?[^\r\n]*)', re.MULTILINE)
+
+    def __init__(self, resume=None):
+        self.noms = set()
+        self.resume = resume
+        # Statistiques des blocs sans guillemets, par catégorie encore encodée (voir close)
+        self._categories = ResumeStock()
+        self._reste = b''
+
+    def feed(self, bloc):
+        bloc = self._reste + bloc
+        fin = bloc.rfind(b'\n') + 1
+        guillemets = bloc.count(b'"', 0, fin)
+        while guillemets % 2:
+            # Fin de ligne entre guillemets : l'enregistrement se poursuit
+            debut = bloc.rfind(b'\n', 0, fin - 1) + 1
+            guillemets -= bloc.count(b'"', debut, fin)
+            fin = debut
+        self._analyse(bloc, fin, guillemets)
+        self._reste = bloc[fin:]
+
+    def _analyse(self, bloc, fin, guillemets):
+        if not fin:
+            return
+        if guillemets:
+            self.add_rows(csv.reader(io.StringIO(bloc[:fin].decode('utf-8'), newline='')))
+        elif self.resume is None:
+            self.noms.update(self.DEBUT_LIGNE.findall(bloc, 0, max(fin - 1, 0)))
+        else:
+            noms = self.noms
+            categories = self._categories
+            parse = GestionCSV._parse_number
+            for ligne, nom, quantite, prix, categorie in self.LIGNE.findall(bloc, 0, max(fin - 1, 0)):
+                if not ligne:
+                    continue
+                noms.add(nom)
+                try:
+                    quantite = parse(quantite)
+                    prix = float(prix) if b'.' in prix else parse(prix)
+                except ValueError:
+                    categories.ignorees += 1
+                    continue
+                categories.add_values(categorie, quantite, prix)
+
+    def add_rows(self, rows):
+        """
+        Ajoute des lignes déjà décodées (listes de chaînes), écrites sans passer par feed.
+        """
+        for row in rows:
+            if row:
+                self.noms.add(row[0].encode('utf-8'))
+                if self.resume is not None:
+                    self.resume.add_row(row)
+
+    def close(self):
+        """
+        Analyse la dernière ligne (sans fin de ligne), reporte les statistiques
+        dans resume et renvoie noms. Une ligne vide donne un nom vide : au pire
+        un faux positif du filtre de Bloom.
+        """
+        if self._reste:
+            self._analyse(self._reste + b'\n', len(self._reste) + 1, self._reste.count(b'"'))
+            self._reste = b''
+        if self.resume is not None:
+            for categorie, valeurs in self._categories.categories.items():
+                self.resume._add(categorie.decode('utf-8'), valeurs)
+            self.resume.ignorees += self._categories.ignorees
+        self._categories = ResumeStock()
+        return self.noms
+
+
+class ResumeStock:
+    """
+    Statistiques d'un fichier de produits par catégorie : nombre de lignes,
+    somme des quantités, valeur du stock (somme des quantité × prix unitaire),
+    prix minimal et maximal. Les lignes dont la quantité ou le prix n'est pas
+    un nombre sont seulement comptées (ignorees). Deux résumés se combinent
+    (update) : un résumé se tient à jour ligne à ligne ou fichier par fichier.
+    """
+    HEADERS = ['catégorie', 'produits', 'quantité', 'valeur', 'prix min', 'prix max']
+    CLES = ('produits', 'quantite', 'valeur', 'prix_min', 'prix_max')
+
+    def __init__(self, categories=None, ignorees=0):
+        # catégorie -> [lignes, quantité, valeur, prix min, prix max]
+        self.categories = categories if categories is not None else {}
+        self.ignorees = ignorees
+
+    def add_row(self, row):
+        try:
+            quantite = GestionCSV._parse_number(row[1])
+            prix = row[2]
+            # Un prix décimal n'est pas un int : inutile d'essayer la conversion
+            prix = float(prix) if isinstance(prix, str) and '.' in prix else GestionCSV._parse_number(prix)
+            categorie = row[3]
+        except (ValueError, IndexError):
+            self.ignorees += 1
+            return
+        self.add_values(categorie, quantite, prix)
+
+    def add_values(self, categorie, quantite, prix):
+        """
+        Ajoute un produit de quantité et de prix déjà convertis en nombres.
+        """
+        cumul = self.categories.get(categorie)
+        if cumul is None:
+            self.categories[categorie] = [1, quantite, quantite * prix, prix, prix]
+            return
+        cumul[0] += 1
+        cumul[1] += quantite
+        cumul[2] += quantite * prix
+        if prix < cumul[3]:
+            cumul[3] = prix
+        elif prix > cumul[4]:
+            cumul[4] = prix
+
+    def _add(self, categorie, valeurs):
+        cumul = self.categories.get(categorie)
+        if cumul is None:
+            self.categories[categorie] = list(valeurs)
+            return
+        cumul[0] += valeurs[0]
+        cumul[1] += valeurs[1]
+        cumul[2] += valeurs[2]
+        cumul[3] = min(cumul[3], valeurs[3])
+        cumul[4] = max(cumul[4], valeurs[4])
+
+    def update(self, autre):
+        for categorie, valeurs in autre.categories.items():
+            self._add(categorie, valeurs)
+        self.ignorees += autre.ignorees
+
+    def total(self):
+        """
+        Statistiques de l'ensemble des catégories, None si le résumé est vide.
+        """
+        total = ResumeStock()
+        for valeurs in self.categories.values():
+            total._add(None, valeurs)
+        return total.categories.get(None)
+
+    def rows(self):
+        """
+        Lignes à afficher : une par catégorie (dans l'ordre alphabétique), puis le total.
+        """
+        lignes = [(categorie,) + tuple(valeurs) for categorie, valeurs in sorted(self.categories.items())]
+        if lignes:
+            lignes.append(('Total',) + tuple(self.total()))
+        return lignes
+
+    def as_dict(self):
+        """
+        Statistiques par catégorie et totales, sous forme de dictionnaires.
+        """
+        total = self.total()
+        return {
+            'categories': {categorie: dict(zip(self.CLES, valeurs)) for categorie, valeurs in self.categories.items()},
+            'total': dict(zip(self.CLES, total)) if total else None,
+            'ignorees': self.ignorees,
+        }
+
+
+class StatistiquesOperation:
+    """
+    Mesures d'une opération de GestionCSV (voir GestionCSV.stats) : durée,
+    lignes et octets lus et écrits, débit et pic de mémoire résidente.
+    Les lignes sont comptées par les moteurs de stockage et les lectures du CSV
+    pendant l'opération ; les lignes recopiées sans décodage (fusions) sont
+    comptées d'après leurs fins de ligne, sauf celles que sendfile recopie sans
+    les faire passer par le processus : seuls leurs octets sont comptés
+    (octets_copies). Les mesures en cours sont propres à chaque thread : deux
+    opérations menées en même temps dans deux threads ne comptent pas les
+    lignes l'une de l'autre. Les octets lus et écrits sont ceux
+    du processus (/proc/self/io, Linux seulement), et le pic de
+    mémoire celui de l'opération si le système permet de le réinitialiser,
+    celui du processus depuis son démarrage sinon.
+    """
+    # Mesures en cours du thread (attribut 'mesures'), auxquelles les lignes lues et écrites sont ajoutées
+    _threads = threading.local()
+
+    def __init__(self, operation, fichier=None):
+        self.operation = operation
+        self.fichier = fichier
+        self.duree = None
+        self.lignes_lues = 0
+        self.lignes_ecrites = 0
+        self.octets_copies = 0
+        self.octets_lus = None
+        self.octets_ecrits = None
+        self.memoire_max = None  # en octets
+        # Valeur renvoyée par l'opération
+        self.resultat = None
+
+    def __enter__(self):
+        self._io = self._read_io()
+        self._reset_peak_memory()
+        self._debut = time.perf_counter()
+        self._actives().append(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.duree = time.perf_counter() - self._debut
+        self._actives().remove(self)
+        io_fin = self._read_io()
+        if self._io is not None and io_fin is not None:
+            self.octets_lus = io_fin[0] - self._io[0]
+            self.octets_ecrits = io_fin[1] - self._io[1]
+        self.memoire_max = self._peak_memory()
+        return False
+
+    @classmethod
+    def _actives(cls):
+        mesures = getattr(cls._threads, 'mesures', None)
+        if mesures is None:
+            mesures = cls._threads.mesures = []
+        return mesures
+
+    @classmethod
+    def count(cls, colonne, nombre):
+        """
+        Ajoute nombre à colonne ('lignes_lues', 'lignes_ecrites' ou 'octets_copies')
+        des mesures en cours du thread.
+        """
+        if not nombre:
+            return
+        for mesure in cls._actives():
+            setattr(mesure, colonne, getattr(mesure, colonne) + nombre)
+
+    @classmethod
+    def counted(cls, rows, colonne, entetes=0):
+        """
+        Renvoie rows, dont les lignes (sauf les entetes premières) seront
+        comptées dans les mesures en cours. Sans mesure en cours, rows est
+        renvoyé tel quel.
+        """
+        if not cls._actives():
+            return rows
+        return cls._counting(rows, colonne, entetes)
+
+    @classmethod
+    def _counting(cls, rows, colonne, entetes):
+        nombre = 0
+        try:
+            for row in rows:
+                nombre += 1
+                yield row
+        finally:
+            cls.count(colonne, max(nombre - entetes, 0))
+
+    @classmethod
+    def active(cls):
+        return bool(cls._actives())
+
+    @staticmethod
+    def _read_io():
+        """
+        Renvoie (octets lus, octets écrits) depuis le démarrage du processus, ou None.
+        """
+        try:
+            with open('/proc/self/io', mode='r') as file:
+                valeurs = dict(ligne.split(':') for ligne in file)
+            return int(valeurs['rchar']), int(valeurs['wchar'])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    @staticmethod
+    def _reset_peak_memory():
+        try:
+            with open('/proc/self/clear_refs', mode='w') as file:
+                file.write('5')
+        except OSError:
+            pass
+
+    @staticmethod
+    def _peak_memory():
+        try:
+            with open('/proc/self/status', mode='r') as file:
+                for ligne in file:
+                    if ligne.startswith('VmHWM:'):
+                        return int(ligne.split()[1]) * 1024
+        except (OSError, ValueError):
+            pass
+        try:
+            import resource
+        except ImportError:
+            return None
+        pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss est en octets sous macOS et en Ko ailleurs
+        return pic if sys.platform == 'darwin' else pic * 1024
+
+    @property
+    def lignes_par_seconde(self):
+        lignes = max(self.lignes_lues, self.lignes_ecrites)
+        return lignes / self.duree if self.duree else None
+
+    def as_dict(self):
+        return {
+            'operation': self.operation,
+            'fichier': self.fichier,
+            'duree': self.duree,
+            'lignes_lues': self.lignes_lues,
+            'lignes_ecrites': self.lignes_ecrites,
+            'lignes_par_seconde': self.lignes_par_seconde,
+            'octets_copies': self.octets_copies,
+            'octets_lus': self.octets_lus,
+            'octets_ecrits': self.octets_ecrits,
+            'memoire_max': self.memoire_max,
+        }
+
+    @staticmethod
+    def _format_size(octets):
+        if octets is None:
+            return "n/d"
+        for unite in ('o', 'Ko', 'Mo'):
+            if octets < 1024:
+                return f"{octets:.0f} {unite}" if unite == 'o' else f"{octets:.1f} {unite}"
+            octets /= 1024
+        return f"{octets:.1f} Go"
+
+    def __str__(self):
+        debit = self.lignes_par_seconde
+        fichier = f" '{self.fichier}'" if self.fichier else ""
+        return (f"[stats] {self.operation}{fichier} : {self.duree:.3f} s, "
+                f"{self.lignes_lues} ligne(s) lue(s), {self.lignes_ecrites} ligne(s) écrite(s)"
+                f"{f' ({debit:.0f} lignes/s)' if debit else ''}, "
+                f"{f'{self._format_size(self.octets_copies)} recopiés par sendfile, ' if self.octets_copies else ''}"
+                f"{self._format_size(self.octets_lus)} lus, {self._format_size(self.octets_ecrits)} écrits, "
+                f"pic mémoire {self._format_size(self.memoire_max)}")
+
+
+def _measured(methode):
+    """
+    Décorateur des opérations de GestionCSV : si stats est activé, l'opération
+    est mesurée (voir StatistiquesOperation), la mesure affichée sur la sortie
+    d'erreur et conservée dans last_stats. Une opération appelée par une autre
+    fait partie de la mesure de celle-ci.
+    """
+    @functools.wraps(methode)
+    def mesurer(self, *args, **kwargs):
+        if not self.stats or self._mesure is not None:
+            return methode(self, *args, **kwargs)
+
+        fichier = args[0] if args else next(iter(kwargs.values()), None)
+        if isinstance(fichier, (list, tuple)):
+            fichier = ", ".join(map(str, fichier))
+        with StatistiquesOperation(methode.__name__, fichier) as mesure:
+            self._mesure = mesure
+            try:
+                mesure.resultat = methode(self, *args, **kwargs)
+            finally:
+                self._mesure = None
+        self.last_stats = mesure
+        print(mesure, file=sys.stderr)
+        return mesure.resultat
+    return mesurer
+
+
+class StockageCSV:
+    """
+    Moteur de stockage par défaut : un fichier texte CSV par liste de produits.
+    Interface commune des moteurs de stockage (voir GestionCSV.STORAGE_BACKENDS) :
+    read_header, accepts, create, append, write et iter_rows. Les fonctions propres
+    au format texte (index annexe, journal d'ajouts, suppressions différées,
+    fusion par recopie d'octets) ne sont disponibles qu'avec ce moteur (texte = True).
+    Les moteurs qui lisent le fichier en flux (flux = True) fournissent open ;
+    les moteurs indexés (indexe = True) fournissent en plus delete, select et merge.
+    """
+    texte = True
+    flux = True
+    indexe = False
+
+    def open(self, file_path, mode='r'):
+        """
+        Ouvre le fichier, en binaire si mode contient 'b', en texte UTF-8 sinon.
+        """
+        if 'b' in mode:
+            return open(file_path, mode)
+        return open(file_path, mode, newline='', encoding='utf-8')
+
+    def read_header(self, file_path):
+        with self.open(file_path) as file:
+            return next(csv.reader(file), None)
+
+    def accepts(self, row):
+        """
+        Indique si une ligne peut être stockée : toute ligne convient en CSV.
+        """
+        return True
+
+    def create(self, file_path, headers):
+        """
+        Crée le fichier (FileExistsError s'il existe déjà).
+        """
+        with self.open(file_path, mode='x') as file:
+            csv.writer(file).writerow(headers)
+
+    def append(self, file_path, rows):
+        with self.open(file_path, mode='a') as file:
+            csv.writer(file).writerows(StatistiquesOperation.counted(rows, 'lignes_ecrites'))
+
+    def write(self, file_path, rows):
+        """
+        Écrit un fichier complet à partir de ses lignes, entêtes en premier.
+        Renvoie le nombre de lignes qui n'ont pas pu être stockées.
+        """
+        with self.open(file_path, mode='w') as file:
+            csv.writer(file).writerows(StatistiquesOperation.counted(rows, 'lignes_ecrites', entetes=1))
+        return 0
+
+    def iter_rows(self, file_path):
+        """
+        Parcourt les lignes du fichier sous forme de listes de chaînes, entêtes en premier.
+        """
+        with self.open(file_path) as file:
+            yield from StatistiquesOperation.counted(csv.reader(file), 'lignes_lues', entetes=1)
+
+
+class StockageCSVCompresse(StockageCSV):
+    """
+    Fichier CSV compressé (.csv.gz, .csv.xz ou .csv.zst), lu et écrit en flux.
+    Un ajout écrit un nouveau membre (gzip), flux (xz) ou trame (zstd) à la fin
+    du fichier, sans recompresser ce qui précède : tous ces formats acceptent
+    la concaténation. Le format .zst nécessite le module zstandard.
+    """
+    texte = False
+    # Niveau 6 pour gzip : le niveau 9 par défaut coûte beaucoup pour peu de gain
+    GZIP_LEVEL = 6
+
+    def __init__(self, format_compression):
+        self.format_compression = format_compression
+
+    def open(self, file_path, mode='r'):
+        mode_brut = mode.replace('b', '').replace('t', '') + 'b'
+        if self.format_compression == 'gz':
+            import gzip
+            brut = gzip.open(file_path, mode_brut, compresslevel=self.GZIP_LEVEL)
+        elif self.format_compression == 'xz':
+            import lzma
+            brut = lzma.open(file_path, mode_brut)
+        else:
+            brut = self._open_zstd(file_path, mode_brut)
+        if 'b' in mode:
+            return brut
+        return io.TextIOWrapper(brut, encoding='utf-8', newline='')
+
+    @staticmethod
+    def _open_zstd(file_path, mode_brut):
+        zstandard = _import_zstandard()
+        if zstandard is None:
+            raise ImportError(f"Le module zstandard est nécessaire pour le fichier '{file_path}' (pip install zstandard).")
+        fichier = open(file_path, mode_brut)
+        if 'r' in mode_brut:
+            return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(fichier, read_across_frames=True, closefd=True))
+        return zstandard.ZstdCompressor().stream_writer(fichier, closefd=True)
+
+
+class StockageTypes(abc.ABC):
+    """
+    Base des moteurs de stockage dont les colonnes sont fixes (celles de
+    GestionCSV.HEADERS) et typées : la quantité doit être un entier (voir
+    parse_quantity) et le prix un nombre. Les sous-classes fournissent
+    _iter_products, qui génère les produits du fichier (Produit), dont
+    iter_rows tire les lignes de texte.
+    """
+    texte = False
+    flux = False
+    indexe = False
+
+    def __init__(self, headers):
+        self.headers = list(headers)
+
+    @staticmethod
+    def parse_quantity(quantite):
+        """
+        Convertit une quantité en int : "10" comme "10.0" sont acceptés, une
+        valeur non entière ou qui n'est pas un nombre lève ValueError.
+        Règle commune à tous les moteurs typés et à TableProduits.
+        """
+        nombre = GestionCSV._parse_number(quantite)
+        if isinstance(nombre, float):
+            if not nombre.is_integer():
+                raise ValueError(f"quantité non entière : {quantite!r}")
+            nombre = int(nombre)
+        return nombre
+
+    def read_header(self, file_path):
+        return list(self.headers)
+
+    def accepts(self, row):
+        try:
+            self.parse_quantity(row[1])
+            float(row[2])
+        except (ValueError, TypeError, IndexError):
+            return False
+        return len(row) == len(self.headers)
+
+    @abc.abstractmethod
+    def _iter_products(self, file_path):
+        """
+        Génère les produits (Produit) du fichier, dans l'ordre.
+        """
+
+    def iter_rows(self, file_path):
+        yield list(self.headers)
+        for nom, quantite, prix, categorie in self._iter_products(file_path):
+            yield [nom, str(quantite), str(int(prix)) if prix.is_integer() and abs(prix) < 1e15 else repr(prix), categorie]
+
+
+class StockageColonnes(StockageTypes):
+    """
+    Moteur de stockage binaire par colonnes (extension .col), lu par mmap sans
+    analyse de texte. Le fichier commence par MAGIC, suivi de blocs écrits les
+    uns après les autres : un ajout écrit un nouveau bloc, une réécriture des
+    blocs de BLOCK_SIZE lignes. Au-delà de SMALL_BLOCKS_MAX petits blocs (moins
+    de BLOCK_SIZE lignes) en fin de fichier, un ajout les fusionne avec les
+    nouvelles lignes, pour que le fichier ne garde pas un dictionnaire de
+    chaînes par ajout. Chaque bloc contient, après son entête
+    (nombre de lignes, nombre et taille des chaînes), les quantités (int64),
+    les prix (float64), les noms et les catégories (uint32, indices dans le
+    dictionnaire de chaînes du bloc), puis ce dictionnaire (longueurs uint32 et
+    chaînes UTF-8). Tout est en petit-boutiste et aligné sur 8 octets.
+    Les colonnes et leurs types sont ceux de StockageTypes.
+    """
+    MAGIC = b'GCOL\x00\x00\x00\x01'
+    BLOCK_HEADER = struct.Struct('<IIQ')
+    BLOCK_SIZE = 65536
+    SMALL_BLOCKS_MAX = 32
+
+    def create(self, file_path, headers):
+        with open(file_path, mode='xb') as file:
+            file.write(self.MAGIC)
+
+    def append(self, file_path, rows):
+        """
+        Ajoute les lignes dans un nouveau bloc, après avoir retiré un dernier
+        bloc incomplet (ajout interrompu). Si le fichier se termine déjà par
+        SMALL_BLOCKS_MAX petits blocs, ils sont réécrits avec les nouvelles
+        lignes en blocs de BLOCK_SIZE lignes, dans une copie du fichier qui le
+        remplace ensuite (le début du fichier est recopié sans décodage).
+        """
+        with open(file_path, mode='r+b') as file:
+            if file.read(len(self.MAGIC)) != self.MAGIC:
+                raise ValueError(f"Le fichier '{file_path}' n'est pas au format de stockage par colonnes.")
+            blocs = list(self._iter_blocks(file))
+            fin = blocs[-1][1] if blocs else len(self.MAGIC)
+            petits = list(itertools.takewhile(lambda bloc: bloc[2] < self.BLOCK_SIZE, reversed(blocs)))
+            if len(petits) < self.SMALL_BLOCKS_MAX:
+                file.truncate(fin)
+                file.seek(fin)
+                return self._write_blocks(file, rows)
+
+            debut = petits[-1][0]
+            table = TableProduits()
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as vue:
+                for position, _, _ in reversed(petits):
+                    nb_lignes, nb_chaines, taille_chaines = self.BLOCK_HEADER.unpack_from(vue, position)
+                    corps = position + self.BLOCK_HEADER.size
+                    self._decode_block(vue[corps:corps + 24 * nb_lignes + 4 * nb_chaines + taille_chaines],
+                                       nb_lignes, nb_chaines, table)
+
+            import shutil
+            import tempfile
+            fd, temp_file = tempfile.mkstemp(prefix=os.path.basename(file_path) + '.', suffix='.tmp',
+                                             dir=os.path.dirname(file_path) or '.')
+            try:
+                with os.fdopen(fd, mode='wb') as sortie:
+                    file.seek(0)
+                    restant = debut
+                    while restant > 0:
+                        bloc = file.read(min(restant, GestionCSV.COPY_BUFFER_SIZE))
+                        if not bloc:
+                            break
+                        sortie.write(bloc)
+                        restant -= len(bloc)
+                    rejetes = self._write_blocks(sortie, rows, table)
+                shutil.copymode(file_path, temp_file)
+                os.replace(temp_file, file_path)
+            except BaseException:
+                os.remove(temp_file)
+                raise
+        return rejetes
+
+    def _iter_blocks(self, file):
+        """
+        Génère (début, fin, nombre de lignes) des blocs complets du fichier, en
+        ne lisant que leurs entêtes.
+        """
+        taille_fichier = os.fstat(file.fileno()).st_size
+        position = len(self.MAGIC)
+        while position + self.BLOCK_HEADER.size <= taille_fichier:
+            file.seek(position)
+            nb_lignes, nb_chaines, taille_chaines = self.BLOCK_HEADER.unpack(file.read(self.BLOCK_HEADER.size))
+            taille = 24 * nb_lignes + 4 * nb_chaines + taille_chaines
+            fin = position + self.BLOCK_HEADER.size + taille + (-taille % 8)
+            if fin > taille_fichier:
+                return
+            yield position, fin, nb_lignes
+            position = fin
+
+    def write(self, file_path, rows):
+        rows = iter(rows)
+        next(rows, None)  # Entêtes : les colonnes sont fixes
+        with open(file_path, mode='wb') as file:
+            file.write(self.MAGIC)
+            return self._write_blocks(file, rows)
+
+    def _write_blocks(self, file, rows, table=None):
+        """
+        Écrit les lignes par blocs de BLOCK_SIZE, à la suite des produits déjà
+        dans table s'il est donné ; renvoie le nombre de lignes rejetées
+        (quantité ou prix invalide).
+        """
+        rejetes = 0
+        table = table if table is not None else TableProduits()
+        ecrites = -len(table)
+        for row in rows:
+            try:
+                table.append(*row)
+            except (ValueError, TypeError):
+                rejetes += 1
+                continue
+            if len(table) >= self.BLOCK_SIZE:
+                file.write(self._encode_block(table))
+                ecrites += len(table)
+                table = TableProduits()
+        if len(table):
+            file.write(self._encode_block(table))
+            ecrites += len(table)
+        StatistiquesOperation.count('lignes_ecrites', ecrites)
+        return rejetes
+
+    def _encode_block(self, table):
+        chaines = [chaine.encode('utf-8') for chaine in table.chaines]
+        colonnes = [table.quantites, table.prix, table.noms, table.categories, array.array('I', map(len, chaines))]
+        if sys.byteorder == 'big':
+            colonnes = [array.array(colonne.typecode, colonne) for colonne in colonnes]
+            for colonne in colonnes:
+                colonne.byteswap()
+        blob = b''.join(chaines)
+        corps = b''.join(colonne.tobytes() for colonne in colonnes) + blob
+        corps += b'\x00' * (-len(corps) % 8)
+        return self.BLOCK_HEADER.pack(len(table), len(chaines), len(blob)) + corps
+
+    def load(self, file_path):
+        """
+        Charge le fichier dans une TableProduits. Un dernier bloc incomplet
+        (ajout interrompu) est ignoré.
+        """
+        table = TableProduits()
+        with open(file_path, mode='rb') as file:
+            if file.read(len(self.MAGIC)) != self.MAGIC:
+                raise ValueError(f"Le fichier '{file_path}' n'est pas au format de stockage par colonnes.")
+            if os.fstat(file.fileno()).st_size == len(self.MAGIC):
+                return table
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as vue:
+                position = len(self.MAGIC)
+                while position + self.BLOCK_HEADER.size <= len(vue):
+                    nb_lignes, nb_chaines, taille_chaines = self.BLOCK_HEADER.unpack_from(vue, position)
+                    debut = position + self.BLOCK_HEADER.size
+                    taille = 24 * nb_lignes + 4 * nb_chaines + taille_chaines
+                    position = debut + taille + (-taille % 8)
+                    if position > len(vue):
+                        break
+                    self._decode_block(vue[debut:debut + taille], nb_lignes, nb_chaines, table)
+        StatistiquesOperation.count('lignes_lues', len(table))
+        return table
+
+    @staticmethod
+    def _decode_block(vue, nb_lignes, nb_chaines, table):
+        colonnes = []
+        position = 0
+        for typecode, nombre in (('q', nb_lignes), ('d', nb_lignes), ('I', nb_lignes), ('I', nb_lignes), ('I', nb_chaines)):
+            colonne = array.array(typecode)
+            taille = colonne.itemsize * nombre
+            colonne.frombytes(vue[position:position + taille])
+            if sys.byteorder == 'big':
+                colonne.byteswap()
+            colonnes.append(colonne)
+            position += taille
+        quantites, prix, noms, categories, longueurs = colonnes
+
+        chaines = []
+        for longueur in longueurs:
+            chaines.append(bytes(vue[position:position + longueur]).decode('utf-8'))
+            position += longueur
+
+        # Indices du dictionnaire du bloc -> indices de la table
+        indices = [table._intern(chaine) for chaine in chaines]
+        if indices != list(range(len(indices))):
+            noms = array.array('I', map(indices.__getitem__, noms))
+            categories = array.array('I', map(indices.__getitem__, categories))
+        table.noms.extend(noms)
+        table.categories.extend(categories)
+        table.quantites.extend(quantites)
+        table.prix.extend(prix)
+
+    def _iter_products(self, file_path):
+        return iter(self.load(file_path))
+
+
+class StockageSQLite(StockageTypes):
+    """
+    Moteur de stockage SQLite (extension .sqlite) : chaque fichier est une base
+    contenant une table produits, indexée sur le nom et la catégorie (colonnes
+    et règles de validation de StockageTypes). Les ajouts
+    en lot se font dans une seule transaction, les suppressions et les
+    recherches par nom ou catégorie passent par les index, et une fusion de
+    bases SQLite se fait par INSERT ... SELECT, sans relire les lignes en Python.
+    """
+    indexe = True
+    SCHEMA = (
+        "CREATE TABLE produits (id INTEGER PRIMARY KEY, nom TEXT NOT NULL, quantite INTEGER NOT NULL, "
+        "prix REAL NOT NULL, categorie TEXT NOT NULL)",
+        "CREATE INDEX produits_nom ON produits (nom)",
+        "CREATE INDEX produits_categorie ON produits (categorie)",
+    )
+    COLONNES = "nom, quantite, prix, categorie"
+
+    @staticmethod
+    def _connect(file_path):
+        import sqlite3
+        return contextlib.closing(sqlite3.connect(file_path))
+
+    def _create_schema(self, connexion):
+        for instruction in self.SCHEMA:
+            connexion.execute(instruction)
+
+    def create(self, file_path, headers):
+        # Création exclusive du fichier, que SQLite accepte ensuite comme base vide
+        os.close(os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+        with self._connect(file_path) as connexion, connexion:
+            self._create_schema(connexion)
+
+    @staticmethod
+    def _typed_rows(rows, rejets):
+        for row in rows:
+            try:
+                yield row[0], StockageTypes.parse_quantity(row[1]), float(row[2]), row[3]
+            except (ValueError, TypeError, IndexError):
+                rejets[0] += 1
+
+    def append(self, file_path, rows):
+        with self._connect(file_path) as connexion, connexion:
+            connexion.executemany(f"INSERT INTO produits ({self.COLONNES}) VALUES (?, ?, ?, ?)",
+                                  StatistiquesOperation.counted(self._typed_rows(rows, [0]), 'lignes_ecrites'))
+
+    def write(self, file_path, rows):
+        rows = iter(rows)
+        next(rows, None)  # Entêtes : les colonnes sont fixes
+        rejets = [0]
+        with self._connect(file_path) as connexion, connexion:
+            self._create_schema(connexion)
+            connexion.executemany(f"INSERT INTO produits ({self.COLONNES}) VALUES (?, ?, ?, ?)",
+                                  StatistiquesOperation.counted(self._typed_rows(rows, rejets), 'lignes_ecrites'))
+        return rejets[0]
+
+    def _iter_products(self, file_path, where="", parametres=()):
+        with self._connect(file_path) as connexion:
+            curseur = connexion.execute(f"SELECT {self.COLONNES} FROM produits {where} ORDER BY id", parametres)
+            yield from StatistiquesOperation.counted(map(Produit._make, curseur), 'lignes_lues')
+
+    def load(self, file_path):
+        table = TableProduits()
+        for product in self._iter_products(file_path):
+            table.append(*product)
+        return table
+
+    def delete(self, file_path, noms):
+        """
+        Supprime les produits des noms donnés ; renvoie le nombre de lignes supprimées par nom.
+        """
+        supprimees = {}
+        with self._connect(file_path) as connexion, connexion:
+            for nom in noms:
+                supprimees[nom] = connexion.execute("DELETE FROM produits WHERE nom = ?", (nom,)).rowcount
+        return supprimees
+
+    def select(self, file_path, product_name=None, product_categ=None, product_prize=None, product_quantity=None):
+        """
+        Produits correspondant à au moins un des critères (mêmes règles que TableProduits.select).
+        """
+        conditions = []
+        parametres = []
+        for colonne, valeur, conversion in (('nom', product_name, str), ('categorie', product_categ, str),
+                                            ('prix', product_prize, float), ('quantite', product_quantity, float)):
+            if valeur is None:
+                continue
+            try:
+                parametres.append(conversion(valeur))
+            except ValueError:
+                continue
+            conditions.append(f"{colonne} = ?")
+        if not conditions:
+            return iter(())
+        return self._iter_products(file_path, "WHERE " + " OR ".join(conditions), parametres)
+
+    def merge(self, output_path, input_paths):
+        """
+        Écrit dans output_path (base vide) les produits de toutes les bases
+        d'entrée, dans l'ordre, par INSERT ... SELECT. Renvoie les
+        statistiques par catégorie (ResumeStock) du résultat, calculées par
+        SQLite sur la base écrite.
+        """
+        with self._connect(output_path) as connexion:
+            with connexion:
+                self._create_schema(connexion)
+            for file_path in input_paths:
+                connexion.execute("ATTACH DATABASE ? AS entree", (file_path,))
+                try:
+                    with connexion:
+                        copiees = connexion.execute(f"INSERT INTO produits ({self.COLONNES}) "
+                                                    f"SELECT {self.COLONNES} FROM entree.produits ORDER BY id").rowcount
+                    StatistiquesOperation.count('lignes_lues', copiees)
+                    StatistiquesOperation.count('lignes_ecrites', copiees)
+                finally:
+                    connexion.execute("DETACH DATABASE entree")
+            curseur = connexion.execute("SELECT categorie, COUNT(*), SUM(quantite), SUM(quantite * prix), MIN(prix), "
+                                        "MAX(prix) FROM produits GROUP BY categorie")
+            return ResumeStock({categorie: list(valeurs) for categorie, *valeurs in curseur})
+
+
+class GestionCSV:
+    """
+    Cette classe gère la création, la modification, la recherche, et la fusion
+    de fichiers CSV dans des répertoires spécifiques.
+    """
+    LISTE_CSV_DIR = "liste_csv"
+    RECAP_CSV_DIR = "recap_csv"
+    HEADERS = ['nom du produit', 'quantité', 'prix unitaire', 'catégorie']
+    INDEX_SUFFIX = ".idx"
+    # Incrémenté lorsque le contenu de l'index change, pour reconstruire les anciens
+    INDEX_VERSION = 3
+    # Tables de l'index annexe (base SQLite, voir _build_index)
+    INDEX_SCHEMA = (
+        "CREATE TABLE signature (taille INTEGER, mtime_ns INTEGER)",
+        "CREATE TABLE cles (colonne INTEGER, valeur TEXT, offsets BLOB, PRIMARY KEY (colonne, valeur)) WITHOUT ROWID",
+    )
+    TOMBSTONE_SUFFIX = ".tomb"
+    MANIFEST_SUFFIX = ".manifest"
+    LOCK_SUFFIX = ".lock"
+    JOURNAL_SUFFIX = ".journal"
+    # Journal en cours de report dans le fichier, et taille du fichier avant ce report
+    PENDING_SUFFIX = ".pending"
+    CHECKPOINT_SUFFIX = ".ckpt"
+    # Manifeste d'un récapitulatif réparti en partitions (voir merge_csv)
+    PARTITIONS_SUFFIX = ".partitions"
+    # Filtre de Bloom des noms de produits (voir FiltreBloom)
+    BLOOM_SUFFIX = ".bloom"
+    # Statistiques par catégorie (voir load_stats)
+    SUMMARY_SUFFIX = ".summary"
+    SUMMARY_VERSION = 1
+    SIDECAR_SUFFIXES = (INDEX_SUFFIX, TOMBSTONE_SUFFIX, MANIFEST_SUFFIX, LOCK_SUFFIX, JOURNAL_SUFFIX, PENDING_SUFFIX,
+                        CHECKPOINT_SUFFIX, PARTITIONS_SUFFIX, BLOOM_SUFFIX, SUMMARY_SUFFIX, ".tmp", "-journal")
+    # Taille du journal d'ajouts à partir de laquelle il est reporté dans le fichier
+    JOURNAL_CHECKPOINT_SIZE = 4 * 1024 * 1024
+    # fsync du journal après chaque ajout (durabilité en cas de panne du système)
+    JOURNAL_SYNC = False
+    # Moteurs de stockage selon l'extension du fichier, CSV pour toute autre extension
+    STORAGE_BACKENDS = {
+        '.col': StockageColonnes(HEADERS),
+        '.sqlite': StockageSQLite(HEADERS),
+        '.gz': StockageCSVCompresse('gz'),
+        '.xz': StockageCSVCompresse('xz'),
+        '.zst': StockageCSVCompresse('zst'),
+    }
+    DEFAULT_STORAGE = StockageCSV()
+    # Proportion de lignes supprimées à partir de laquelle compact réécrit le fichier
+    COMPACT_THRESHOLD = 0.2
+    # Nombre de lignes écrites d'un coup lors d'un import en masse
+    IMPORT_FLUSH_SIZE = 10000
+    MAX_REJECTS_REPORTED = 10
+    # Taille des blocs recopiés lors d'une fusion sans décodage
+    COPY_BUFFER_SIZE = 1024 * 1024
+    OUTPUT_FORMATS = ('text', 'csv', 'jsonl', 'table')
+    # Nombre de lignes utilisées pour calculer la largeur des colonnes du format 'table'
+    TABLE_SAMPLE_SIZE = 100
+    # Nombre de fonctions affichées avec --profile
+    PROFILE_TOP = 20
+    # Recherche sur plusieurs fichiers : lots de résultats en attente d'affichage,
+    # produits par lot envoyé par un processus de travail, lignes par table
+    # évaluée pour une requête et lignes lues entre deux vérifications de l'arrêt
+    MULTI_SEARCH_QUEUE_SIZE = 64
+    MULTI_SEARCH_BATCH = 500
+    MULTI_SEARCH_CHUNK = 10000
+    MULTI_SEARCH_CHECK = 1024
+    AGGREGATE_KEYS = ('name', 'name_categ')
+    PRICE_POLICIES = ('last', 'min', 'max', 'mean')
+    # Nombre maximal de produits agrégés en mémoire avant déversement sur disque
+    AGGREGATE_RUN_SIZE = 100000
+    # Colonne servant à répartir les lignes d'une fusion partitionnée
+    PARTITION_KEYS = {'name': 0, 'categ': 3}
+    PARTITION_COUNT = 16
+    # Nombre maximal de partitions, toutes ouvertes en même temps pendant la fusion
+    MAX_PARTITIONS = 512
+
+    def __init__(self, cache=None, journal=False, stats=False, create_directories=True):
+        # Les actions qui ne créent pas de fichier n'ont pas besoin des répertoires
+        if create_directories:
+            self.ensure_directories()
+        # CacheFichiers optionnel des tables et index déjà lus (voir InterfaceInteractif)
+        self.cache = cache
+        # Avec journal=True, les ajouts passent par le journal d'ajouts (voir _journal_append)
+        self.journal = journal
+        # Avec stats=True, chaque opération est mesurée (voir _measured) ; last_stats
+        # contient la StatistiquesOperation de la dernière opération terminée
+        # par le thread appelant (le démon exécute ses requêtes dans plusieurs threads)
+        self.stats = stats
+        self._mesures = threading.local()
+        self._verrous = threading.local()
+
+    @property
+    def last_stats(self):
+        return getattr(self._mesures, 'derniere', None)
+
+    @last_stats.setter
+    def last_stats(self, mesure):
+        self._mesures.derniere = mesure
+
+    @property
+    def _mesure(self):
+        return getattr(self._mesures, 'en_cours', None)
+
+    @_mesure.setter
+    def _mesure(self, mesure):
+        self._mesures.en_cours = mesure
+
+    def ensure_directories(self):
+        """
+        Crée les répertoires nécessaires s'ils n'existent pas déjà.
+        """
+        os.makedirs(self.LISTE_CSV_DIR, exist_ok=True)
+        os.makedirs(self.RECAP_CSV_DIR, exist_ok=True)
+
+    def get_file_path(self, file_name, is_recap):
+        """
+        Renvoie le chemin complet du fichier CSV, en fonction du fait qu'il s'agit
+        d'un fichier récapitulatif ou non.
+        """
+        directory = self.RECAP_CSV_DIR if is_recap else self.LISTE_CSV_DIR
+        return os.path.join(directory, file_name)
+
+    @classmethod
+    def _storage(cls, file_path):
+        """
+        Renvoie le moteur de stockage d'un fichier, choisi d'après son extension.
+        """
+        return cls.STORAGE_BACKENDS.get(os.path.splitext(file_path)[1], cls.DEFAULT_STORAGE)
+
+    @contextlib.contextmanager
+    def _lock(self, file_path, shared=False):
+        """
+        Verrou consultatif (fcntl.flock) d'un fichier CSV, exclusif par défaut.
+        Il est pris sur un fichier annexe (LOCK_SUFFIX) qui n'est jamais remplacé,
+        contrairement au fichier CSV lui-même après une suppression. Réentrant
+        pour un même thread ; sans fcntl (Windows), aucun verrou n'est pris.
+        """
+        tenus = getattr(self._verrous, 'tenus', None)
+        if tenus is None:
+            tenus = self._verrous.tenus = set()
+        if fcntl is None or file_path in tenus:
+            yield
+            return
+
+        with open(file_path + self.LOCK_SUFFIX, mode='a') as verrou:
+            fcntl.flock(verrou, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            tenus.add(file_path)
+            try:
+                yield
+            finally:
+                tenus.discard(file_path)
+                fcntl.flock(verrou, fcntl.LOCK_UN)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _atomic_rewrite(file_path):
+        """
+        Fournit un fichier temporaire au nom unique, à côté de file_path, qui
+        remplace file_path à la sortie du bloc (ou est supprimé en cas d'erreur).
+        Le bloc peut supprimer lui-même le fichier temporaire pour laisser
+        file_path inchangé.
+        """
+        import shutil
+        import tempfile
+
+        fd, temp_file = tempfile.mkstemp(prefix=os.path.basename(file_path) + '.', suffix='.tmp',
+                                         dir=os.path.dirname(file_path) or '.')
+        os.close(fd)
+        try:
+            if os.path.exists(file_path):
+                shutil.copymode(file_path, temp_file)
+            else:
+                # Droits habituels d'un nouveau fichier (mkstemp le crée en 0600)
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(temp_file, 0o666 & ~umask)
+            yield temp_file
+            if os.path.exists(temp_file):
+                os.replace(temp_file, file_path)
+        except BaseException:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+
+    def _journal_append(self, file_path, rows):
+        """
+        Ajoute des lignes au journal d'ajouts du fichier en une seule écriture
+        (O_APPEND), sous verrou partagé : plusieurs écrivains ajoutent en même
+        temps sans attendre leur tour. Les lignes sont reportées en une fois dans
+        le fichier CSV par _checkpoint, avant toute lecture ou réécriture.
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        data = buffer.getvalue().encode('utf-8')
+        StatistiquesOperation.count('lignes_ecrites', len(rows))
+
+        with self._lock(file_path, shared=True):
+            fd = os.open(file_path + self.JOURNAL_SUFFIX, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                while data:
+                    data = data[os.write(fd, data):]
+                if self.JOURNAL_SYNC:
+                    os.fsync(fd)
+                taille = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+
+        if taille >= self.JOURNAL_CHECKPOINT_SIZE:
+            self._checkpoint(file_path)
+
+    def _checkpoint(self, file_path):
+        """
+        Reporte dans le fichier CSV les lignes en attente dans son journal d'ajouts,
+        sous verrou exclusif. Le journal est d'abord renommé (PENDING_SUFFIX) et la
+        taille du fichier notée (CHECKPOINT_SUFFIX) : un report interrompu est
+        rejoué à l'identique au prochain appel, après avoir tronqué le fichier.
+        """
+        journal_path = file_path + self.JOURNAL_SUFFIX
+        pending_path = file_path + self.PENDING_SUFFIX
+        checkpoint_path = file_path + self.CHECKPOINT_SUFFIX
+        if not os.path.exists(journal_path) and not os.path.exists(pending_path):
+            return
+
+        with self._lock(file_path):
+            if os.path.exists(pending_path):
+                # Reprise d'un report interrompu
+                try:
+                    with open(checkpoint_path, mode='r', encoding='utf-8') as file:
+                        taille = json.load(file)['taille']
+                except (OSError, ValueError, KeyError):
+                    taille = None
+                self._apply_pending(file_path, taille)
+
+            if os.path.exists(journal_path):
+                if os.path.getsize(journal_path):
+                    # Point de reprise d'un report terminé : il ne doit pas servir au suivant
+                    if os.path.exists(checkpoint_path):
+                        os.remove(checkpoint_path)
+                    os.replace(journal_path, pending_path)
+                    self._apply_pending(file_path, None)
+                else:
+                    os.remove(journal_path)
+
+    def _apply_pending(self, file_path, taille):
+        """
+        Ajoute au fichier CSV, tronqué à taille octets, le contenu du journal
+        renommé, puis supprime ce journal et le point de reprise.
+        taille vaut None pour un report qui n'a pas encore commencé.
+        """
+        pending_path = file_path + self.PENDING_SUFFIX
+        checkpoint_path = file_path + self.CHECKPOINT_SUFFIX
+        if taille is None:
+            taille = os.path.getsize(file_path)
+            with open(checkpoint_path, mode='w', encoding='utf-8') as file:
+                json.dump({'taille': taille}, file)
+                file.flush()
+                os.fsync(file.fileno())
+
+        with open(pending_path, mode='rb') as file:
+            data = file.read()
+        # Une dernière ligne incomplète (écriture interrompue) est ignorée
+        data = data[:data.rfind(b'\n') + 1]
+
+        table = self._cache_begin_write(file_path)
+        signature = self._summary_signature(file_path)
+        with open(file_path, mode='r+b') as file:
+            file.truncate(taille)
+            file.seek(0, os.SEEK_END)
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        if table is not None:
+            for product_info in csv.reader(io.StringIO(data.decode('utf-8'))):
+                self._append_to_table(table, product_info)
+        self._cache_end_write(file_path, table)
+        if os.path.exists(file_path + self.BLOOM_SUFFIX) or os.path.exists(file_path + self.SUMMARY_SUFFIX):
+            rows = [row for row in csv.reader(io.StringIO(data.decode('utf-8'))) if row]
+            self._after_append(file_path, rows, signature)
+
+        os.remove(pending_path)
+        os.remove(checkpoint_path)
+
+    @_measured
+    def create_csv(self, file_name):
+        """
+        Crée un fichier CSV avec des entêtes prédéfinies s'il n'existe pas déjà.
+        """
+        file_path = self.get_file_path(file_name, is_recap=False)
+
+        headers = self.HEADERS
+        try:
+            # Création exclusive : un fichier créé entre-temps par un autre processus n'est pas écrasé
+            self._storage(file_path).create(file_path, headers)
+        except FileExistsError:
+            print(f"Le fichier '{file_path}' existe déjà.")
+            return
+
+        print(f"Fichier '{file_path}' créé avec les colonnes : {', '.join(headers)}.")
+
+    @_measured
+    def add_product(self, file_name, product_info, is_recap):
+        """
+        Ajoute un produit (ligne) dans le fichier CSV spécifié.
+        product_info est une liste au format [nom, quantite, prix, categorie].
+        """
+        file_path = self.get_file_path(file_name, is_recap)
+
+        if not os.path.exists(file_path):
+            print(f"Le fichier '{file_path}' n'existe pas. Veuillez le créer d'abord.")
+            return
+
+        stockage = self._storage(file_path)
+        if not stockage.accepts(product_info):
+            print(f"Produit refusé : la quantité doit être un entier et le prix un nombre dans le fichier '{file_path}'.")
+            return
+
+        if self.journal and stockage.texte:
+            self._journal_append(file_path, [product_info])
+        else:
+            with self._lock(file_path):
+                self._checkpoint(file_path)
+                table = self._cache_begin_write(file_path)
+                signature = self._summary_signature(file_path)
+                stockage.append(file_path, [product_info])
+                if table is not None:
+                    self._append_to_table(table, product_info)
+                self._cache_end_write(file_path, table)
+                self._after_append(file_path, [product_info], signature)
+
+        print(f"Produit ajouté au fichier '{file_path}'.")
+
+    @staticmethod
+    def _append_to_table(table, product_info):
+        try:
+            table.append(*product_info)
+        except (ValueError, TypeError):
+            table.rejetes += 1
+
+    def _cache_signature(self, file_path):
+        """
+        Signature d'un fichier pour le cache : celle du fichier et de son journal de suppressions.
+        """
+        tombstone_path = file_path + self.TOMBSTONE_SUFFIX
+        tombstones = self._file_signature(tombstone_path) if os.path.exists(tombstone_path) else None
+        return (tuple(self._file_signature(file_path)), tombstones and tuple(tombstones))
+
+    def _cache_begin_write(self, file_path):
+        """
+        Avant une écriture : renvoie la table en cache du fichier si elle est à
+        jour (à modifier ensuite comme le fichier), None sinon.
+        """
+        if self.cache is None or not os.path.exists(file_path):
+            return None
+        return self.cache.peek((file_path, 'table'), self._cache_signature(file_path))
+
+    def _cache_end_write(self, file_path, table):
+        """
+        Après une écriture : enregistre la table mise à jour sous la nouvelle
+        signature du fichier (ou l'oublie si table est None). L'index en cache
+        est oublié, il sera relu ou reconstruit à la prochaine recherche.
+        """
+        if self.cache is None:
+            return
+        self.cache.invalidate((file_path, 'index'))
+        if table is None:
+            self.cache.invalidate((file_path, 'table'))
+        else:
+            self.cache.put((file_path, 'table'), self._cache_signature(file_path), table, table.nbytes)
+
+    @_measured
+    def add_products(self, file_name, products, is_recap, flush_size=None, line_numbers=None):
+        """
+        Ajoute un lot de produits au fichier CSV, sous un seul verrou.
+        Les lignes sont écrites par paquets de flush_size (IMPORT_FLUSH_SIZE par défaut)
+        et celles dont le nombre de colonnes ne correspond pas aux entêtes (ou que
+        le moteur de stockage ne peut pas stocker) sont rejetées. Les messages de
+        rejet donnent le numéro de la ligne dans le lot, ou dans line_numbers
+        (numéros des produits dans leur source, un script par exemple).
+        Renvoie le nombre de lignes ajoutées et rejetées.
+        """
+        file_path = self.get_file_path(file_name, is_recap)
+        flush_size = flush_size or self.IMPORT_FLUSH_SIZE
+
+        if not os.path.exists(file_path):
+            print(f"Le fichier '{file_path}' n'existe pas. Veuillez le créer d'abord.")
+            return None
+
+        stockage = self._storage(file_path)
+        entetes = stockage.read_header(file_path)
+        if entetes is None:
+            # Un fichier vide (sans entêtes) reçoit d'abord les entêtes par défaut
+            with self._lock(file_path):
+                if os.path.getsize(file_path) == 0:
+                    stockage.write(file_path, [self.HEADERS])
+            entetes = self.HEADERS
+        nb_colonnes = len(entetes)
+
+        counts = {'ajoutes': 0, 'rejetes': 0}
+
+        def valides():
+            numeros = itertools.count(1) if line_numbers is None else line_numbers
+            for numero, product_info in zip(numeros, products):
+                if not product_info:
+                    continue
+                if len(product_info) != nb_colonnes:
+                    raison = f"{len(product_info)} colonne(s) au lieu de {nb_colonnes}"
+                elif not stockage.accepts(product_info):
+                    raison = "quantité ou prix invalide"
+                else:
+                    yield product_info
+                    continue
+                counts['rejetes'] += 1
+                if counts['rejetes'] <= self.MAX_REJECTS_REPORTED:
+                    print(f"Ligne {numero} rejetée : {raison}.")
+
+        if self.journal and stockage.texte:
+            # Un paquet par écriture dans le journal, sans verrou exclusif
+            rows = valides()
+            while True:
+                batch = list(itertools.islice(rows, flush_size))
+                if not batch:
+                    break
+                self._journal_append(file_path, batch)
+                counts['ajoutes'] += len(batch)
+            return counts
+
+        with self._lock(file_path):
+            self._checkpoint(file_path)
+            table = self._cache_begin_write(file_path)
+            batch = []
+            for product_info in valides():
+                batch.append(product_info)
+                if table is not None:
+                    self._append_to_table(table, product_info)
+                if len(batch) >= flush_size:
+                    self._append_batch(file_path, stockage, batch)
+                    counts['ajoutes'] += len(batch)
+                    batch.clear()
+
+            self._append_batch(file_path, stockage, batch)
+            counts['ajoutes'] += len(batch)
+
+            self._cache_end_write(file_path, table)
+        return counts
+
+    def _append_batch(self, file_path, stockage, batch):
+        """
+        Écrit un paquet de lignes à la fin du fichier et met à jour ses fichiers annexes.
+        """
+        signature = self._summary_signature(file_path)
+        stockage.append(file_path, batch)
+        self._after_append(file_path, batch, signature)
+
+    def _after_append(self, file_path, rows, signature):
+        """
+        Reporte des lignes qui viennent d'être ajoutées au fichier dans son
+        filtre de Bloom et son résumé, s'ils existent et correspondent à la
+        signature du fichier avant l'ajout (voir _summary_signature).
+        """
+        self._bloom_add(file_path, [row[0] for row in rows if row], signature[0])
+        self._summary_add(file_path, rows, signature)
+
+    @_measured
+    def import_products(self, file_name, source, is_recap=False, source_format=None, flush_size=None):
+        """
+        Importe en masse des produits depuis l'entrée standard ('-'), un autre
+        fichier CSV, un fichier JSON-lines (une liste ou un objet par ligne) ou
+        un fichier d'un autre moteur de stockage (par exemple .col).
+        Affiche le débit obtenu à la fin de l'import.
+        """
+        if source_format is None:
+            source_format = 'jsonl' if source.endswith(('.jsonl', '.ndjson')) else 'csv'
+        if source_format not in ('csv', 'jsonl'):
+            print(f"Format d'import '{source_format}' inconnu (formats acceptés : csv, jsonl).")
+            return None
+
+        if source != '-' and not os.path.exists(source):
+            print(f"Le fichier source '{source}' n'existe pas.")
+            return None
+
+        debut = time.perf_counter()
+        if source == '-':
+            rows = StatistiquesOperation.counted(self._read_source(sys.stdin, source_format), 'lignes_lues')
+            counts = self.add_products(file_name, rows, is_recap, flush_size)
+        elif not self._storage(source).texte:
+            rows = self._storage(source).iter_rows(source)
+            next(rows, None)  # Passe les entêtes
+            counts = self.add_products(file_name, rows, is_recap, flush_size)
+        else:
+            with open(source, mode='r', newline='', encoding='utf-8') as file:
+                rows = StatistiquesOperation.counted(self._read_source(file, source_format), 'lignes_lues')
+                counts = self.add_products(file_name, rows, is_recap, flush_size)
+        duree = time.perf_counter() - debut
+
+        if counts is not None:
+            debit = counts['ajoutes'] / duree if duree > 0 else float('inf')
+            print(f"{counts['ajoutes']} produit(s) importé(s) dans le fichier "
+                  f"'{self.get_file_path(file_name, is_recap)}' en {duree:.2f} s ({debit:.0f} lignes/s), "
+                  f"{counts['rejetes']} ligne(s) rejetée(s).")
+        return counts
+
+    def _read_source(self, file, source_format):
+        """
+        Renvoie les lignes d'une source d'import sous forme de listes de chaînes.
+        Une ligne d'entêtes identique à HEADERS en tête d'un CSV est ignorée.
+        """
+        if source_format == 'csv':
+            reader = csv.reader(file)
+            for row in reader:
+                if row != self.HEADERS:
+                    yield row
+                break
+            yield from reader
+            return
+
+        for ligne in file:
+            if not ligne.strip():
+                continue
+            try:
+                data = json.loads(ligne)
+            except ValueError:
+                data = None
+            if isinstance(data, dict):
+                # Colonnes prises par leur nom : un objet incomplet a moins de
+                # colonnes que les entêtes et sera rejeté
+                data = [data[header] for header in self.HEADERS if header in data]
+            elif not isinstance(data, list):
+                data = [ligne]  # Rejetée ensuite pour nombre de colonnes invalide
+            yield ['' if value is None else str(value) for value in data]
+
+    @_measured
+    def export_products(self, file_name, output_file, is_recap=False):
+        """
+        Convertit un fichier vers le moteur de stockage de output_file (par exemple
+        de produits.csv vers produits.col, ou l'inverse), dans le même répertoire.
+        Les lignes que le moteur de destination ne peut pas stocker sont signalées.
+        Renvoie le nombre de produits exportés.
+        """
+        file_path = self.get_file_path(file_name, is_recap)
+        output_path = self.get_file_path(output_file, is_recap)
+
+        if not os.path.exists(file_path):
+            print(f"Le fichier '{file_path}' n'existe pas.")
+            return None
+
+        self._checkpoint(file_path)
+        lus = 0
+
+        def lignes():
+            nonlocal lus
+            rows = self._iter_live_rows(file_path)
+            yield next(rows, self.HEADERS)
+            for row in rows:
+                lus += 1
+                yield row
+
+        with self._lock(output_path):
+            self._checkpoint(output_path)
+            with self._atomic_rewrite(output_path) as temp_file:
+                rejetes = self._storage(output_path).write(temp_file, lignes())
+            self._remove_tombstones(output_path)
+            self._cache_end_write(output_path, None)
+
+        print(f"{lus - rejetes} produit(s) exporté(s) de '{file_path}' vers '{output_path}'.")
+        if rejetes:
+            print(f"{rejetes} ligne(s) ignorée(s) : quantité ou prix invalide.")
+        return lus - rejetes
+
+    @_measured
+    def delete_product(self, file_name, product_name, is_recap, lazy=False):
+        """
+        Supprime toutes les occurrences (toutes les lignes) du produit spécifié par son nom.
+        Avec lazy=True, le fichier n'est pas réécrit : la suppression est seulement
+        consignée dans le journal de suppressions (voir compact).
+        """
+        return self.delete_products(file_name, [product_name], is_recap, lazy=lazy)
+
+    @_measured
+    def delete_products(self, file_name, product_names, is_recap, lazy=False):
+        """
+        Supprime en une seule réécriture du fichier toutes les occurrences des
+        produits dont le nom figure dans product_names.
+        Renvoie le nombre de lignes supprimées pour chaque nom.
+        """
+        file_path = self.get_file_path(file_name, is_recap)
+
+        if not os.path.exists(file_path):
+            print(f"Le fichier '{file_path}' n'existe pas.")
+            return None
+
+        # Verrou exclusif : aucun ajout ne peut se glisser entre la lecture et le remplacement du fichier
+        with self._lock(file_path):
+            self._checkpoint(file_path)
+            # dict plutôt que set pour conserver l'ordre des noms dans le rapport
+            lines_deleted = dict.fromkeys(product_names, 0)
+
+            if self._bloom_excludes(file_path, lines_deleted):
+                # Aucun des noms n'est dans le fichier : ni réécriture ni journal de suppressions
+                for product_name in lines_deleted:
+                    print(f"Produit '{product_name}' non trouvé dans le fichier '{file_path}'.")
+                return lines_deleted
+
+            table = self._cache_begin_write(file_path)
+            if table is not None:
+                table = table.without(lines_deleted)
+
+            stockage = self._storage(file_path)
+            if lazy and stockage.texte:
+                # Noms dont le filtre de Bloom ou l'index donne le nombre de lignes :
+                # seuls les noms présents (ou inconnus) sont consignés
+                comptes = self._count_live_names(file_path, lines_deleted)
+                lines_deleted.update(comptes)
+                marques = [product_name for product_name in lines_deleted if comptes.get(product_name) != 0]
+                if marques:
+                    # Toutes les lignes commençant avant la fin actuelle du fichier sont supprimées
+                    size = os.path.getsize(file_path)
+                    with open(file_path + self.TOMBSTONE_SUFFIX, mode='a', newline='', encoding='utf-8') as file:
+                        csv.writer(file).writerows([product_name, size] for product_name in marques)
+                    self._cache_end_write(file_path, table)
+                for product_name in lines_deleted:
+                    if product_name in marques:
+                        print(f"Produit '{product_name}' marqué comme supprimé dans le fichier '{file_path}'.")
+                    else:
+                        print(f"Produit '{product_name}' non trouvé dans le fichier '{file_path}'.")
+                return lines_deleted
+
+            if stockage.indexe:
+                # Suppression par l'index, sans réécriture du fichier
+                lines_deleted.update(stockage.delete(file_path, lines_deleted))
+            else:
+                # Filtre de Bloom et résumé recalculés pendant la réécriture, s'ils existent déjà
+                noms = set() if stockage.flux and os.path.exists(file_path + self.BLOOM_SUFFIX) else None
+                resume = ResumeStock() if os.path.exists(file_path + self.SUMMARY_SUFFIX) else None
+
+                def restantes():
+                    rows = self._iter_live_rows(file_path)
+                    headers = next(rows, None)
+                    if headers is None:  # Fichier vide
+                        return
+                    yield headers
+                    for row in rows:
+                        if row and row[0] in lines_deleted:
+                            lines_deleted[row[0]] += 1
+                            continue
+                        if row:
+                            if noms is not None:
+                                noms.add(row[0])
+                            if resume is not None:
+                                resume.add_row(row)
+                        yield row
+
+                with self._atomic_rewrite(file_path) as temp_file:
+                    rejetes = stockage.write(temp_file, restantes())
+
+                self._remove_tombstones(file_path)
+                if noms is not None:
+                    self._save_bloom(file_path, noms)
+                if resume is not None and not rejetes:
+                    self._save_summary(file_path, resume)
+            self._cache_end_write(file_path, table)
+
+            for product_name, count in lines_deleted.items():
+                if count > 0:
+                    print(f"{count} occurrence(s) du produit '{product_name}' ont été supprimées du fichier '{file_path}'.")
+                else:
+                    print(f"Produit '{product_name}' non trouvé dans le fichier '{file_path}'.")
+            return lines_deleted
+
+    @staticmethod
+    def read_names_file(names_file):
+        """
+        Lit un fichier texte contenant un nom de produit par ligne (lignes vides ignorées).
+        """
+        with open(names_file, mode='r', encoding='utf-8') as file:
+            return [ligne.strip() for ligne in file if ligne.strip()]
+
+    @_measured
+    def compact(self, file_name, is_recap=False, threshold=None, force=False):
+        """
+        Réécrit le fichier sans les lignes marquées comme supprimées, dès que leur
+        proportion dépasse le seuil (COMPACT_THRESHOLD par défaut) ou si force=True.
+        """
+        file_path = self.get_file_path(file_name, is_recap)
+        threshold = self.COMPACT_THRESHOLD if threshold is None else threshold
+
+        if not os.path.exists(file_path):
+            print(f"Le fichier '{file_path}' n'existe pas.")
+            return
+
+        with self._lock(file_path):
+            self._compact(file_path, threshold, force)
+
+    def _compact(self, file_path, threshold, force):
+        """
+        Compactage en une seule lecture du fichier : les lignes non supprimées
+        sont écrites dans le fichier temporaire pendant le décompte, qui ne
+        remplace le fichier que si le taux de lignes supprimées atteint le seuil.
+        """
+        tombstones = self._load_tombstones(file_path)
+        if not tombstones:
+            print(f"Aucune suppression en attente pour le fichier '{file_path}'.")
+            return
+
+        # Les lignes visibles ne changent pas : la table en cache reste valable
+        table = self._cache_begin_write(file_path)
+        # Filtre de Bloom et résumé recalculés pendant la lecture, s'ils existent déjà
+        noms = set() if os.path.exists(file_path + self.BLOOM_SUFFIX) else None
+        resume = ResumeStock() if os.path.exists(file_path + self.SUMMARY_SUFFIX) else None
+        total = vivantes = 0
+
+        def vivantes_lues():
+            nonlocal total, vivantes
+            rows = self._iter_rows_with_offsets(file_path)
+            for _, headers in rows:
+                yield headers
+                break
+            for offset, row in rows:
+                total += 1
+                if row and offset < tombstones.get(row[0], -1):
+                    continue
+                vivantes += 1
+                if row:
+                    if noms is not None:
+                        noms.add(row[0])
+                    if resume is not None:
+                        resume.add_row(row)
+                yield row
+
+        with self._atomic_rewrite(file_path) as temp_file:
+            self._storage(file_path).write(temp_file, vivantes_lues())
+            ratio = (total - vivantes) / total if total else 1.0
+            if ratio < threshold and not force:
+                os.remove(temp_file)  # Le fichier n'est pas remplacé
+
+        if ratio < threshold and not force:
+            print(f"Taux de lignes supprimées de {ratio:.0%} inférieur au seuil de {threshold:.0%} : "
+                  f"compactage du fichier '{file_path}' non nécessaire.")
+            return
+
+        self._remove_tombstones(file_path)
+        self._cache_end_write(file_path, table)
+        if noms is not None:
+            self._save_bloom(file_path, noms)
+        if resume is not None:
+            self._save_summary(file_path, resume)
+        print(f"Fichier '{file_path}' compacté : {total - vivantes} ligne(s) supprimée(s) définitivement.")
+
+    @classmethod
+    def _load_tombstones(cls, file_path):
+        """
+        Renvoie le journal de suppressions d'un fichier sous la forme
+        {nom du produit: offset}, où toute ligne de ce produit commençant avant
+        l'offset est considérée comme supprimée.
+        """
+        tombstone_path = file_path + cls.TOMBSTONE_SUFFIX
+        if not os.path.exists(tombstone_path):
+            return {}
+
+        tombstones = {}
+        with open(tombstone_path, mode='r', encoding='utf-8') as file:
+            for product_name, offset in csv.reader(file):
+                tombstones[product_name] = max(int(offset), tombstones.get(product_name, 0))
+        return tombstones
+
+    def _remove_tombstones(self, file_path):
+        """
+        Supprime le journal de suppressions d'un fichier qui vient d'être réécrit,
+        ses offsets n'étant plus valables.
+        """
+        tombstone_path = file_path + self.TOMBSTONE_SUFFIX
+        if os.path.exists(tombstone_path):
+            os.remove(tombstone_path)
+
+    @classmethod
+    def _iter_live_rows(cls, file_path):
+        """
+        Parcourt les lignes d'un fichier CSV (entêtes comprises) en ignorant
+        celles qui sont marquées comme supprimées. Les autres moteurs de stockage
+        fournissent directement leurs lignes, sous forme de chaînes.
+        """
+        stockage = cls._storage(file_path)
+        tombstones = cls._load_tombstones(file_path) if stockage.texte else None
+        if not tombstones:
+            # Sans suppression différée, lecture directe du texte, sans offsets
+            yield from stockage.iter_rows(file_path)
+            return
+
+        rows = cls._iter_rows_with_offsets(file_path)
+        for _, headers in rows:
+            yield headers
+            break
+
+        for offset, row in rows:
+            if not (row and offset < tombstones.get(row[0], -1)):
+                yield row
+
+    @_measured
+    def merge_csv(self, input_files, output_file, workers=None, aggregate=None, price_policy='last', full=False,
+                  partition_by=None, partition_count=None, max_rows=None, max_bytes=None):
+        """
+        Fusionne plusieurs fichiers CSV individuels en un seul fichier récapitulatif.
+        Avec workers > 1, chaque fichier d'entrée est lu et validé dans un processus
+        séparé, puis les résultats sont écrits dans l'ordre des fichiers d'entrée.
+        Avec aggregate ('name' ou 'name_categ'), le récapitulatif contient une seule
+        ligne par produit, triée par nom, avec la somme des quantités et un prix
+        choisi selon price_policy ('last', 'min', 'max' ou 'mean', moyenne pondérée
+        par les quantités).
+        Sinon, la fusion est incrémentale : seuls les fichiers modifiés depuis la
+        fusion précédente sont relus, sauf si full=True.
+        Si un des fichiers n'est pas au format CSV (voir STORAGE_BACKENDS), la
+        fusion se fait ligne à ligne, sans processus de travail ni manifeste.
+        Avec partition_by ('name' ou 'categ'), le récapitulatif est réparti en
+        partition_count fichiers (PARTITION_COUNT par défaut) selon une empreinte
+        du nom ou de la catégorie ; avec max_rows ou max_bytes, en fichiers
+        successifs d'au plus max_rows lignes ou max_bytes octets (non compressés).
+        Les partitions (recap.part-0000.csv, ...) sont décrites par un manifeste
+        (recap.csv.partitions) : une recherche sur recap.csv ne lit alors que
+        les partitions pouvant contenir le nom ou la catégorie cherchés.
+        """
+        input_paths = [self.get_file_path(file, is_recap=False) for file in input_files]
+        output_path = self.get_file_path(output_file, is_recap=True)
+        for file_path in input_paths:
+            self._checkpoint(file_path)
+        texte = all(self._storage(file_path).texte for file_path in input_paths + [output_path])
+
+        with self._lock(output_path):
+            self._cache_end_write(output_path, None)
+
+            if partition_by or max_rows or max_bytes:
+                self._merge_partitioned(input_paths, output_path, aggregate, partition_by, partition_count,
+                                        max_rows, max_bytes)
+                return
+            self._remove_partitions(output_path)
+
+            if aggregate:
+                if aggregate not in self.AGGREGATE_KEYS or price_policy not in self.PRICE_POLICIES:
+                    print(f"Mode d'agrégation '{aggregate}' ou politique de prix '{price_policy}' inconnu "
+                          f"(modes : {', '.join(self.AGGREGATE_KEYS)} ; prix : {', '.join(self.PRICE_POLICIES)}).")
+                    return
+                existing_paths = []
+                for file_path in input_paths:
+                    if os.path.exists(file_path):
+                        existing_paths.append(file_path)
+                    else:
+                        print(f"Erreur : Le fichier '{file_path}' n'existe pas.")
+                resume = self._merge_aggregate(existing_paths, output_path, aggregate, price_policy)
+                self._remove_manifest(output_path)
+                self._save_summary(output_path, resume)
+                print(f"Fichier récapitulatif créé : {output_path}")
+                return
+
+            if workers and workers > 1 and texte:
+                resume = self._merge_parallel(input_paths, output_path, workers)
+                self._remove_manifest(output_path)
+                self._save_summary(output_path, resume)
+                print(f"Fichier récapitulatif créé : {output_path}")
+                return
+
+            existing_paths = []
+            for file_path in input_paths:
+                if os.path.exists(file_path):
+                    existing_paths.append(file_path)
+                else:
+                    print(f"Erreur : Le fichier '{file_path}' n'existe pas.")
+
+            self._check_headers(existing_paths)
+            if texte:
+                resume = self._merge_sequential(existing_paths, output_path, full=full)
+            else:
+                stockage = self._storage(output_path)
+                if stockage.indexe and all(self._storage(file_path) is stockage for file_path in existing_paths):
+                    with self._atomic_rewrite(output_path) as temp_file:
+                        resume = stockage.merge(temp_file, existing_paths)
+                elif stockage.flux and all(self._storage(file_path).flux for file_path in existing_paths):
+                    resume = self._merge_streams(existing_paths, output_path)
+                else:
+                    resume = self._merge_rows(existing_paths, output_path)
+                self._remove_manifest(output_path)
+
+            # Résumé calculé pendant l'écriture : ni le récapitulatif ni les fichiers d'entrée ne sont relus
+            self._save_summary(output_path, resume)
+            print(f"Fichier récapitulatif créé : {output_path}")
+
+    def _merge_streams(self, input_paths, output_path):
+        """
+        Fusion de fichiers CSV dont certains sont compressés : le contenu de chaque
+        fichier d'entrée (après ses entêtes) est décompressé et recopié par blocs
+        dans le récapitulatif, compressé au fil de l'eau, sans décoder le CSV.
+        Un fichier aux entêtes différents ou avec des suppressions en attente
+        est relu ligne à ligne. Les noms des produits (pour le filtre de Bloom
+        du récapitulatif) et ses statistiques, renvoyées, sont relevés au passage.
+        """
+        stockage = self._storage(output_path)
+        header = self._first_header(input_paths)
+        noms = set()
+        resume = ResumeStock()
+
+        with self._atomic_rewrite(output_path) as temp_file, stockage.open(temp_file, mode='wb') as outfile:
+            if header is not None:
+                outfile.write(self._encode_rows([header]))
+            for file_path in input_paths:
+                entree = self._storage(file_path)
+                lecteur = BlocsCSV(resume)
+                if self._load_tombstones(file_path) or entree.read_header(file_path) != header:
+                    rows = self._iter_live_rows(file_path)
+                    next(rows, None)  # Passe les entêtes
+                    for lot in iter(lambda: list(itertools.islice(rows, self.IMPORT_FLUSH_SIZE)), []):
+                        outfile.write(self._encode_rows(lot))
+                        lecteur.add_rows(lot)
+                        StatistiquesOperation.count('lignes_ecrites', len(lot))
+                else:
+                    with entree.open(file_path, mode='rb') as infile:
+                        infile.readline()  # Passe les entêtes
+                        dernier = b'\n'
+                        for bloc in iter(lambda: infile.read(self.COPY_BUFFER_SIZE), b''):
+                            outfile.write(bloc)
+                            lecteur.feed(bloc)
+                            dernier = bloc[-1:]
+                            self._count_copied(bloc)
+                        if dernier != b'\n':
+                            outfile.write(b'\r\n')
+                noms.update(lecteur.close())
+        self._save_merge_bloom(output_path, noms)
+        return resume
+
+    def _merge_rows(self, input_paths, output_path):
+        """
+        Fusion ligne à ligne, quel que soit le moteur de stockage des fichiers.
+        Les lignes que le moteur du récapitulatif ne peut pas stocker sont
+        écartées avant l'écriture : les noms du filtre de Bloom et les
+        statistiques renvoyées ne portent que sur les lignes écrites.
+        """
+        stockage = self._storage(output_path)
+        noms = set()
+        resume = ResumeStock()
+        rejetes = 0
+
+        def lignes():
+            nonlocal rejetes
+            header = None
+            for file_path in input_paths:
+                rows = self._iter_live_rows(file_path)
+                file_header = next(rows, None)
+                if header is None and file_header is not None:
+                    header = file_header
+                    yield header
+                for row in rows:
+                    if not stockage.accepts(row):
+                        rejetes += 1
+                        continue
+                    if row:
+                        noms.add(row[0].encode('utf-8'))
+                        resume.add_row(row)
+                    yield row
+
+        with self._atomic_rewrite(output_path) as temp_file:
+            rejetes += stockage.write(temp_file, lignes())
+        self._save_merge_bloom(output_path, noms)
+        if rejetes:
+            print(f"{rejetes} ligne(s) ignorée(s) : quantité ou prix invalide.")
+        return resume
+
+    def _merge_partitioned(self, input_paths, output_path, aggregate, partition_by, partition_count, max_rows, max_bytes):
+        """
+        Fusion en partitions (voir merge_csv) : les lignes des fichiers d'entrée
+        sont réparties au fil de la lecture entre les fichiers de partition, puis
+        le manifeste des partitions remplace le récapitulatif unique éventuel.
+        """
+        stockage = self._storage(output_path)
+        partition_count = partition_count or self.PARTITION_COUNT
+        if aggregate:
+            print("Le partitionnement ne peut pas être combiné à l'agrégation.")
+            return
+        if not stockage.flux:
+            print("Le partitionnement n'est possible que pour un récapitulatif CSV (éventuellement compressé).")
+            return
+        if partition_by and (max_rows or max_bytes):
+            print("Choisir soit une clé de partitionnement, soit une taille maximale de partition.")
+            return
+        if partition_by and partition_by not in self.PARTITION_KEYS:
+            print(f"Clé de partitionnement '{partition_by}' inconnue (clés : {', '.join(self.PARTITION_KEYS)}).")
+            return
+        if partition_by and not 1 <= partition_count <= self.MAX_PARTITIONS:
+            print(f"Le nombre de partitions doit être compris entre 1 et {self.MAX_PARTITIONS}.")
+            return
+        if (max_rows is not None and max_rows <= 0) or (max_bytes is not None and max_bytes <= 0):
+            print("La taille maximale d'une partition doit être positive.")
+            return
+
+        existing_paths = []
+        for file_path in input_paths:
+            if os.path.exists(file_path):
+                existing_paths.append(file_path)
+            else:
+                print(f"Erreur : Le fichier '{file_path}' n'existe pas.")
+        self._check_headers(existing_paths)
+        header = self._first_header(existing_paths) or list(self.HEADERS)
+
+        def lignes():
+            for file_path in existing_paths:
+                rows = self._iter_live_rows(file_path)
+                next(rows, None)  # Passe les entêtes
+                yield from rows
+
+        partitions = []
+        flux = []
+        noms = []
+        resumes = []
+        with contextlib.ExitStack() as pile:
+            def ouvrir():
+                nom = self._partition_name(os.path.basename(output_path), len(partitions))
+                temp_file = pile.enter_context(self._atomic_rewrite(os.path.join(os.path.dirname(output_path), nom)))
+                flux.append(pile.enter_context(stockage.open(temp_file, mode='wb')))
+                noms.append(set())
+                resumes.append(ResumeStock())
+                entete = self._encode_rows([header])
+                flux[-1].write(entete)
+                partitions.append({'file': nom, 'rows': 0, 'bytes': len(entete)})
+
+            def ecrire(numero, donnees, nb_lignes):
+                flux[numero].write(donnees)
+                partitions[numero]['rows'] += nb_lignes
+                partitions[numero]['bytes'] += len(donnees)
+                StatistiquesOperation.count('lignes_ecrites', nb_lignes)
+
+            if partition_by:
+                colonne = self.PARTITION_KEYS[partition_by]
+                for _ in range(partition_count):
+                    ouvrir()
+                lots = [[] for _ in range(partition_count)]
+                ignorees = 0
+                for row in lignes():
+                    if len(row) <= colonne:
+                        ignorees += 1
+                        continue
+                    numero = self._partition_index(row[colonne], partition_count)
+                    lots[numero].append(row)
+                    noms[numero].add(row[0])
+                    resumes[numero].add_row(row)
+                    if len(lots[numero]) >= self.IMPORT_FLUSH_SIZE:
+                        ecrire(numero, self._encode_rows(lots[numero]), len(lots[numero]))
+                        lots[numero] = []
+                for numero, lot in enumerate(lots):
+                    if lot:
+                        ecrire(numero, self._encode_rows(lot), len(lot))
+                if ignorees:
+                    print(f"{ignorees} ligne(s) ignorée(s) : colonne de partitionnement absente.")
+            else:
+                # Chaque ligne est encodée seule pour connaître sa taille
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                ouvrir()
+                lot = []
+                octets_lot = 0  # Taille des lignes de lot, tenue à jour au fil des ajouts
+                for row in lignes():
+                    writer.writerow(row)
+                    donnees = buffer.getvalue().encode('utf-8')
+                    buffer.seek(0)
+                    buffer.truncate()
+                    courante = partitions[-1]
+                    lignes_courantes = courante['rows'] + len(lot)
+                    octets_courants = courante['bytes'] + octets_lot
+                    if lignes_courantes and ((max_rows and lignes_courantes >= max_rows)
+                                             or (max_bytes and octets_courants + len(donnees) > max_bytes)):
+                        ecrire(len(partitions) - 1, b''.join(lot), len(lot))
+                        lot = []
+                        octets_lot = 0
+                        ouvrir()
+                    lot.append(donnees)
+                    octets_lot += len(donnees)
+                    if row:
+                        noms[-1].add(row[0])
+                        resumes[-1].add_row(row)
+                    if len(lot) >= self.IMPORT_FLUSH_SIZE:
+                        ecrire(len(partitions) - 1, b''.join(lot), len(lot))
+                        lot = []
+                        octets_lot = 0
+                ecrire(len(partitions) - 1, b''.join(lot), len(lot))
+
+        for partition, noms_partition, resume in zip(partitions, noms, resumes):
+            partition_path = os.path.join(os.path.dirname(output_path), partition['file'])
+            self._save_bloom(partition_path, noms_partition)
+            self._save_summary(partition_path, resume)
+
+        manifest = {'header': header, 'key': partition_by, 'count': len(partitions),
+                    'max_rows': max_rows, 'max_bytes': max_bytes, 'partitions': partitions}
+        with self._atomic_rewrite(output_path + self.PARTITIONS_SUFFIX) as temp_file:
+            with open(temp_file, mode='w', encoding='utf-8') as file:
+                json.dump(manifest, file, ensure_ascii=False, indent=1)
+
+        # Le récapitulatif unique et les partitions d'une fusion précédente sont remplacés
+        self._remove_partitions(output_path, garder=[partition['file'] for partition in partitions])
+        print(f"Fichier récapitulatif créé : {output_path} ({len(partitions)} partition(s))")
+
+    @staticmethod
+    def _partition_name(file_name, numero):
+        """
+        Nom du fichier de la partition numero : recap.csv -> recap.part-0007.csv
+        (recap.csv.gz -> recap.part-0007.csv.gz).
+        """
+        racine, extension = os.path.splitext(file_name)
+        if isinstance(GestionCSV._storage(file_name), StockageCSVCompresse):
+            racine, extension_csv = os.path.splitext(racine)
+            extension = extension_csv + extension
+        return f"{racine}.part-{numero:04d}{extension}"
+
+    @staticmethod
+    def _partition_index(valeur, nombre):
+        """
+        Partition d'une valeur de la colonne de partitionnement : empreinte
+        stable d'un processus à l'autre (contrairement à hash).
+        """
+        return zlib.crc32(valeur.encode('utf-8')) % nombre
+
+    def _load_partitions(self, file_path):
+        """
+        Renvoie le manifeste des partitions d'un récapitulatif, ou None s'il
+        n'est pas partitionné.
+        """
+        try:
+            with open(file_path + self.PARTITIONS_SUFFIX, mode='r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _select_partitions(self, manifest, product_name=None, product_categ=None, product_prize=None, product_quantity=None):
+        """
+        Renvoie les fichiers des partitions pouvant contenir des produits
+        correspondant aux critères : une seule partition si le seul critère
+        porte sur la clé de partitionnement, toutes sinon.
+        """
+        fichiers = [partition['file'] for partition in manifest['partitions']]
+        criteres = {'name': product_name, 'categ': product_categ}
+        cle = manifest.get('key')
+        if cle in criteres and criteres[cle] is not None and product_prize is None and product_quantity is None \
+                and all(valeur is None for nom, valeur in criteres.items() if nom != cle):
+            return [fichiers[self._partition_index(criteres[cle], len(fichiers))]]
+        return fichiers
+
+    def _remove_partitions(self, output_path, garder=()):
+        """
+        Supprime les partitions d'un récapitulatif (sauf celles de garder) et,
+        si garder est donné, le récapitulatif unique qu'elles remplacent ; sans
+        garder, supprime aussi le manifeste des partitions.
+        """
+        manifest = self._load_partitions(output_path)
+        dossier = os.path.dirname(output_path)
+        if manifest is not None:
+            for partition in manifest['partitions']:
+                if partition['file'] not in garder:
+                    chemin = os.path.join(dossier, partition['file'])
+                    for annexe in ('', self.INDEX_SUFFIX, self.TOMBSTONE_SUFFIX, self.BLOOM_SUFFIX, self.SUMMARY_SUFFIX):
+                        if os.path.exists(chemin + annexe):
+                            os.remove(chemin + annexe)
+            if not garder:
+                os.remove(output_path + self.PARTITIONS_SUFFIX)
+        if garder:
+            for annexe in ('', self.INDEX_SUFFIX, self.TOMBSTONE_SUFFIX, self.MANIFEST_SUFFIX, self.BLOOM_SUFFIX,
+                           self.SUMMARY_SUFFIX):
+                if os.path.exists(output_path + annexe):
+                    os.remove(output_path + annexe)
+
+    def _merge_aggregate(self, input_paths, output_path, aggregate, price_policy):
+        """
+        Fusion avec agrégation par produit, en mémoire bornée : les agrégats
+        partiels sont accumulés dans un dictionnaire d'au plus AGGREGATE_RUN_SIZE
+        clés, déversé trié dans un fichier temporaire dès qu'il est plein, puis
+        les fichiers temporaires sont fusionnés (tri externe).
+        Renvoie le résumé (ResumeStock) du récapitulatif écrit.
+        """
+        nb_colonnes_cle = 2 if aggregate == 'name_categ' else 1
+        runs = []
+        partiels = {}
+        rejetes = 0
+        header = None
+        sequence = 0
+
+        try:
+            for file_path in input_paths:
+                rows = self._iter_live_rows(file_path)
+                file_header = next(rows, None)
+                if header is None:
+                    header = file_header
+
+                for row in rows:
+                    sequence += 1
+                    try:
+                        partiel = self._partial_aggregate(row, sequence)
+                    except (ValueError, IndexError):
+                        rejetes += 1
+                        continue
+
+                    cle = (row[0], row[3])[:nb_colonnes_cle]
+                    if cle in partiels:
+                        partiels[cle] = self._combine_partials(partiels[cle], partiel)
+                    else:
+                        partiels[cle] = partiel
+                        if len(partiels) >= self.AGGREGATE_RUN_SIZE:
+                            runs.append(self._spill_run(partiels))
+                            partiels = {}
+
+            if runs and partiels:
+                runs.append(self._spill_run(partiels))
+                partiels = {}
+
+            if runs:
+                flux = heapq.merge(*(self._read_run(run, nb_colonnes_cle) for run in runs), key=lambda item: item[0])
+            else:
+                flux = sorted(partiels.items())
+
+            resume = ResumeStock()
+            noms = set()
+
+            def agregees():
+                cle_courante = None
+                cumul = None
+                for cle, partiel in flux:
+                    if cle == cle_courante:
+                        cumul = self._combine_partials(cumul, partiel)
+                        continue
+                    if cumul is not None:
+                        yield self._aggregated_row(cle_courante, cumul, price_policy)
+                    cle_courante, cumul = cle, partiel
+                if cumul is not None:
+                    yield self._aggregated_row(cle_courante, cumul, price_policy)
+
+            def lignes():
+                if header is not None:
+                    yield header
+                for row in agregees():
+                    resume.add_row(row)
+                    noms.add(row[0].encode('utf-8'))
+                    yield row
+
+            with self._atomic_rewrite(output_path) as temp_file:
+                self._storage(output_path).write(temp_file, lignes())
+        finally:
+            for run in runs:
+                run.close()
+        self._save_merge_bloom(output_path, noms)
+
+        if rejetes:
+            print(f"{rejetes} ligne(s) ignorée(s) : quantité ou prix invalide.")
+        return resume
+
+    @staticmethod
+    def _parse_number(value):
+        """
+        Convertit une chaîne en int si possible, sinon en float (ValueError sinon).
+        """
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
+
+    @classmethod
+    def _partial_aggregate(cls, row, sequence):
+        """
+        Agrégat partiel d'une ligne : [quantité totale, somme quantité × prix,
+        prix min, prix max, numéro de la dernière ligne, dernier prix, dernière
+        catégorie]. Les prix sont conservés avec leur écriture d'origine.
+        """
+        quantite = cls._parse_number(row[1])
+        prix = (float(row[2]), row[2])
+        return [quantite, quantite * prix[0], prix, prix, sequence, row[2], row[3]]
+
+    @staticmethod
+    def _combine_partials(a, b):
+        dernier = a if a[4] > b[4] else b
+        return [a[0] + b[0], a[1] + b[1], min(a[2], b[2]), max(a[3], b[3])] + dernier[4:]
+
+    @staticmethod
+    def _spill_run(partiels):
+        """
+        Écrit les agrégats partiels, triés par clé, dans un fichier temporaire.
+        """
+        import tempfile
+        run = tempfile.TemporaryFile(mode='w+', newline='', encoding='utf-8')
+        writer = csv.writer(run)
+        for cle, p in sorted(partiels.items()):
+            writer.writerow(list(cle) + [p[0], repr(p[1]), p[2][1], p[3][1], p[4], p[5], p[6]])
+        run.seek(0)
+        return run
+
+    @classmethod
+    def _read_run(cls, run, nb_colonnes_cle):
+        for row in csv.reader(run):
+            cle, valeurs = tuple(row[:nb_colonnes_cle]), row[nb_colonnes_cle:]
+            yield cle, [cls._parse_number(valeurs[0]), float(valeurs[1]),
+                        (float(valeurs[2]), valeurs[2]), (float(valeurs[3]), valeurs[3]),
+                        int(valeurs[4]), valeurs[5], valeurs[6]]
+
+    @classmethod
+    def _aggregated_row(cls, cle, partiel, price_policy):
+        quantite, somme_valeur, prix_min, prix_max, _, dernier_prix, categorie = partiel
+        if price_policy == 'min':
+            prix = prix_min[1]
+        elif price_policy == 'max':
+            prix = prix_max[1]
+        elif price_policy == 'mean' and quantite:
+            prix = cls._format_number(somme_valeur / quantite)
+        else:
+            prix = dernier_prix
+        return [cle[0], cls._format_number(quantite), prix, categorie]
+
+    @staticmethod
+    def _format_number(value):
+        """
+        Écrit un nombre sans partie décimale inutile (30000.0 devient 30000).
+        """
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(round(value, 6)) if isinstance(value, float) else str(value)
+
+    def _merge_sequential(self, input_paths, output_path, full=False):
+        """
+        Fusion des fichiers d'entrée les uns après les autres. Chaque fichier
+        constitue un segment du récapitulatif, décrit dans un manifeste annexe
+        (taille, date de modification, empreinte SHA-256, position dans le
+        récapitulatif) : une nouvelle fusion réutilise les segments des fichiers
+        inchangés et ne relit que les fichiers modifiés ou nouveaux. De même,
+        le filtre de Bloom de la fusion précédente est complété des seuls noms
+        des fichiers relus, relevés pendant leur recopie. Renvoie les
+        statistiques du récapitulatif, combinaison de celles des segments
+        (conservées dans le manifeste). full=True force la reconstruction complète.
+        """
+        # Entêtes du premier fichier qui en possède (un fichier vide n'en a pas)
+        header_line = b''
+        for file_path in input_paths:
+            header_line = self._read_header_line(file_path)[0]
+            if header_line:
+                break
+        if header_line and not header_line.endswith(b'\n'):
+            header_line += b'\r\n'
+        header = next(csv.reader([header_line.decode('utf-8')]), None)
+
+        manifest = None if full else self._load_manifest(output_path, header)
+        anciens = {entree['path']: entree for entree in manifest['inputs']} if manifest else {}
+
+        entrees = []
+        for file_path in input_paths:
+            entree = self._input_fingerprint(file_path)
+            ancien = anciens.get(file_path)
+            entree['ancien'] = ancien if ancien and self._same_input(entree, ancien) else None
+            entrees.append(entree)
+
+        # Segments réutilisables sur place : préfixe commun avec la fusion précédente
+        prefixe = 0
+        if manifest:
+            for entree, ancien in zip(entrees, manifest['inputs']):
+                if entree['ancien'] is not ancien:
+                    break
+                prefixe += 1
+
+        # Sans filtre de Bloom précédent, les noms des segments réutilisés sont
+        # relevés en les recopiant : le récapitulatif est alors réécrit
+        filtre = self._load_bloom(output_path) if manifest else None
+        sur_place = prefixe > 0 and filtre is not None and not any(entree['ancien'] for entree in entrees[prefixe:])
+        if sur_place:
+            for entree in entrees[:prefixe]:
+                entree.update({cle: entree['ancien'][cle] for cle in ('start', 'end', 'sha256', 'resume')})
+            with open(output_path, mode='r+b') as outfile:
+                outfile.truncate(entrees[prefixe - 1]['ancien']['end'])
+                outfile.seek(0, os.SEEK_END)
+                noms = self._write_segments(outfile, entrees[prefixe:], header, None)
+        else:
+            ancien_recap = open(output_path, mode='rb') if manifest else None
+            try:
+                with self._atomic_rewrite(output_path) as temp_file:
+                    with open(temp_file, mode='wb') as outfile:
+                        outfile.write(header_line)
+                        noms = self._write_segments(outfile, entrees, header, ancien_recap, filtre is None)
+            finally:
+                if ancien_recap:
+                    ancien_recap.close()
+
+        if manifest:
+            reutilises = sum(1 for entree in entrees if entree['ancien'])
+            print(f"Fusion incrémentale : {reutilises} fichier(s) réutilisé(s), "
+                  f"{len(entrees) - reutilises} fichier(s) relu(s).")
+
+        for entree in entrees:
+            del entree['ancien']
+        self._save_manifest(output_path, header, entrees)
+
+        # Les noms des segments réutilisés sont déjà dans le filtre précédent
+        # (les noms supprimés depuis y restent : au pire des faux positifs).
+        # Un filtre trop petit pour les nouveaux noms est supprimé : la fusion
+        # suivante réécrit le récapitulatif et relève tous ses noms.
+        if filtre is not None and filtre.nombre + len(noms) > filtre.capacite:
+            os.remove(output_path + self.BLOOM_SUFFIX)
+        else:
+            self._save_merge_bloom(output_path, noms, filtre)
+
+        # Statistiques du récapitulatif : celles des segments, enregistrées dans le manifeste
+        resume = ResumeStock()
+        for entree in entrees:
+            resume.update(ResumeStock(entree['resume']['categories'], entree['resume']['ignorees']))
+        return resume
+
+    def _write_segments(self, outfile, entrees, header, ancien_recap, noms_anciens=True):
+        """
+        Écrit à la fin de outfile le segment de chaque fichier d'entrée, en le
+        recopiant depuis l'ancien récapitulatif s'il est inchangé, et complète
+        les entrées du manifeste (position dans le récapitulatif, empreinte,
+        statistiques des lignes du segment). Renvoie l'ensemble des noms des
+        lignes des fichiers relus, et aussi de celles des segments recopiés si
+        noms_anciens est vrai (sans filtre de Bloom précédent à compléter),
+        relevés pendant l'écriture.
+        """
+        noms = set()
+        for entree in entrees:
+            entree['start'] = outfile.tell()
+            ancien = entree['ancien']
+            if ancien is not None:
+                lecteur = BlocsCSV() if noms_anciens else None
+                self._copy_range(ancien_recap, outfile, ancien['start'], ancien['end'] - ancien['start'], lecteur)
+                if lecteur is not None:
+                    noms.update(lecteur.close())
+                entree['sha256'] = ancien['sha256']
+                entree['resume'] = ancien['resume']
+            else:
+                resume = ResumeStock()
+                lecteur = BlocsCSV(resume)
+                self._write_input(outfile, entree['path'], header, lecteur)
+                noms.update(lecteur.close())
+                entree['sha256'] = self._file_hash(entree['path'])
+                entree['resume'] = {'categories': resume.categories, 'ignorees': resume.ignorees}
+            entree['end'] = outfile.tell()
+        return noms
+
+    def _write_input(self, outfile, file_path, header, lecteur):
+        """
+        Écrit les lignes d'un fichier d'entrée à la fin de outfile : directement
+        en octets si ses entêtes sont identiques et qu'aucune ligne n'est à
+        ignorer, sinon ligne à ligne avec csv.writer. Les lignes écrites sont
+        données au passage à lecteur (BlocsCSV).
+        """
+        header_line, header_end = self._read_header_line(file_path)
+        file_header = next(csv.reader([header_line.decode('utf-8')]), None)
+
+        if file_header != header or self._load_tombstones(file_path):
+            rows = self._iter_live_rows(file_path)
+            next(rows, None)  # Passe les entêtes
+            while True:
+                paquet = list(itertools.islice(rows, self.IMPORT_FLUSH_SIZE))
+                if not paquet:
+                    break
+                outfile.write(self._encode_rows(paquet))
+                lecteur.add_rows(paquet)
+                StatistiquesOperation.count('lignes_ecrites', len(paquet))
+            return
+
+        size = os.path.getsize(file_path)
+        if size == header_end:
+            return
+
+        with open(file_path, mode='rb') as infile:
+            self._copy_range(infile, outfile, header_end, size - header_end, lecteur)
+            infile.seek(size - 1)
+            if infile.read(1) != b'\n':
+                outfile.write(b'\r\n')
+
+    def _input_fingerprint(self, file_path):
+        """
+        Décrit l'état d'un fichier d'entrée pour le manifeste de fusion.
+        Le journal de suppressions en fait partie, car il change les lignes lues.
+        """
+        size, mtime_ns = self._file_signature(file_path)
+        tombstone_path = file_path + self.TOMBSTONE_SUFFIX
+        tombstones = self._file_signature(tombstone_path) if os.path.exists(tombstone_path) else None
+        return {'path': file_path, 'size': size, 'mtime_ns': mtime_ns, 'tombstones': tombstones}
+
+    def _same_input(self, entree, ancien):
+        """
+        Indique si un fichier d'entrée est inchangé depuis la dernière fusion.
+        L'empreinte n'est recalculée que si seule la date de modification diffère.
+        """
+        if entree['size'] != ancien['size'] or entree['tombstones'] != ancien['tombstones']:
+            return False
+        if entree['mtime_ns'] == ancien['mtime_ns']:
+            return True
+        return self._file_hash(entree['path']) == ancien['sha256']
+
+    @classmethod
+    def _file_hash(cls, file_path):
+        """
+        Empreinte SHA-256 d'un fichier, lu par blocs de COPY_BUFFER_SIZE octets.
+        """
+        import hashlib
+        empreinte = hashlib.sha256()
+        with open(file_path, mode='rb') as file:
+            for bloc in iter(lambda: file.read(cls.COPY_BUFFER_SIZE), b''):
+                empreinte.update(bloc)
+        return empreinte.hexdigest()
+
+    def _load_manifest(self, output_path, header):
+        """
+        Renvoie le manifeste de la dernière fusion vers output_path, ou None s'il
+        n'existe pas ou ne correspond plus au récapitulatif (modifié depuis, ou
+        entêtes différents).
+        """
+        manifest_path = output_path + self.MANIFEST_SUFFIX
+        if not os.path.exists(manifest_path) or not os.path.exists(output_path):
+            return None
+
+        try:
+            with open(manifest_path, mode='r', encoding='utf-8') as file:
+                manifest = json.load(file)
+        except ValueError:
+            return None
+
+        if manifest.get('output') != self._file_signature(output_path) or manifest.get('header') != header:
+            return None
+        # Manifeste écrit avant l'ajout des statistiques de chaque segment : inutilisable
+        if any('resume' not in entree for entree in manifest.get('inputs', ())):
+            return None
+        return manifest
+
+    def _save_manifest(self, output_path, header, entrees):
+        manifest = {'header': header, 'output': self._file_signature(output_path), 'inputs': entrees}
+        with open(output_path + self.MANIFEST_SUFFIX, mode='w', encoding='utf-8') as file:
+            json.dump(manifest, file, ensure_ascii=False, indent=1)
+
+    def _remove_manifest(self, output_path):
+        """
+        Supprime le manifeste d'un récapitulatif produit autrement que par une
+        fusion séquentielle simple.
+        """
+        manifest_path = output_path + self.MANIFEST_SUFFIX
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+    def _copy_range(self, infile, outfile, offset, count, lecteur=None):
+        """
+        Recopie count octets de infile, à partir de offset, à la fin de outfile.
+        Avec lecteur (BlocsCSV), les octets passent par le processus pour lui
+        être donnés au fil de la copie ; sinon, sendfile les recopie sans les
+        faire passer par le processus quand le système le permet.
+        """
+        outfile.flush()
+        if lecteur is None and hasattr(os, 'sendfile'):
+            try:
+                while count > 0:
+                    sent = os.sendfile(outfile.fileno(), infile.fileno(), offset, count)
+                    if sent == 0:
+                        break
+                    offset += sent
+                    count -= sent
+                    # Les octets ne passent pas par le processus : seul leur nombre est compté
+                    StatistiquesOperation.count('octets_copies', sent)
+                # sendfile écrit via le descripteur : on replace l'objet fichier à la fin
+                outfile.seek(0, os.SEEK_END)
+                return
+            except OSError:
+                outfile.seek(0, os.SEEK_END)
+
+        infile.seek(offset)
+        while count > 0:
+            bloc = infile.read(min(count, self.COPY_BUFFER_SIZE))
+            if not bloc:
+                break
+            outfile.write(bloc)
+            if lecteur is not None:
+                lecteur.feed(bloc)
+            count -= len(bloc)
+            self._count_copied(bloc)
+
+    @staticmethod
+    def _count_copied(bloc):
+        """
+        Compte, dans les mesures en cours, les lignes d'un bloc recopié sans décodage.
+        """
+        if StatistiquesOperation.active():
+            lignes = bloc.count(b'\n')
+            StatistiquesOperation.count('lignes_lues', lignes)
+            StatistiquesOperation.count('lignes_ecrites', lignes)
+
+    @staticmethod
+    def _read_header_line(file_path):
+        """
+        Renvoie la ligne d'entêtes brute d'un fichier et l'offset de la fin de
+        cette ligne, en la cherchant dans le fichier projeté en mémoire.
+        """
+        with open(file_path, mode='rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return b'', 0
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                fin = mapped.find(b'\n')
+                fin = len(mapped) if fin == -1 else fin + 1
+                return mapped[:fin], fin
+
+    def _check_headers(self, input_paths):
+        """
+        Vérifie que tous les fichiers d'entrée ont les mêmes entêtes que le premier.
+        Signale chaque fichier dont les entêtes diffèrent.
+        """
+        reference = None
+        identiques = True
+        for file_path in input_paths:
+            header = self._storage(file_path).read_header(file_path)
+            if reference is None:
+                reference = header
+            elif header != reference:
+                print(f"Attention : les entêtes du fichier '{file_path}' diffèrent de ceux du premier fichier.")
+                identiques = False
+        return identiques
+
+    def _first_header(self, input_paths):
+        """
+        Renvoie les entêtes du premier fichier d'entrée qui en possède (un
+        fichier vide n'en a pas), ou None.
+        """
+        for file_path in input_paths:
+            header = self._storage(file_path).read_header(file_path)
+            if header is not None:
+                return header
+        return None
+
+    def _merge_parallel(self, input_paths, output_path, workers):
+        """
+        Fusion avec un pool de processus. Chaque fichier d'entrée est préparé
+        dans un processus de travail, qui renvoie seulement la plage d'octets à
+        recopier (voir _prepare_merge_input) ; le processus principal recopie
+        ces plages dans l'ordre des fichiers d'entrée (sendfile si possible).
+        Au plus 2 * workers fichiers sont préparés en avance. Le filtre de Bloom
+        du récapitulatif est construit à partir des noms relevés pendant la
+        recopie des plages, comme les statistiques renvoyées.
+        """
+        import concurrent.futures
+
+        existing_paths = [file_path for file_path in input_paths if os.path.exists(file_path)]
+        self._check_headers(existing_paths)
+        header = self._first_header(existing_paths)
+        dossier = os.path.dirname(output_path) or '.'
+
+        en_cours = collections.deque()
+        noms = set()
+        resume = ResumeStock()
+        try:
+            with self._atomic_rewrite(output_path) as temp_file, open(temp_file, mode='wb') as outfile, \
+                    concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                if header is not None:
+                    outfile.write(self._encode_rows([header]))
+
+                for file_path in input_paths:
+                    en_cours.append((file_path, executor.submit(self._prepare_merge_input, file_path, header, dossier)))
+                    if len(en_cours) >= 2 * workers:
+                        noms.update(self._write_merge_input(outfile, *en_cours.popleft(), resume))
+
+                while en_cours:
+                    noms.update(self._write_merge_input(outfile, *en_cours.popleft(), resume))
+        finally:
+            # Après une erreur : fichiers temporaires des préparations non recopiées
+            for file_path, future in en_cours:
+                if not future.cancel() and future.exception() is None and future.result() is not None:
+                    chemin = future.result()[0]
+                    if chemin != file_path:
+                        os.remove(chemin)
+
+        self._save_merge_bloom(output_path, noms)
+        return resume
+
+    def _write_merge_input(self, outfile, file_path, future, resume):
+        """
+        Recopie la plage préparée d'un fichier d'entrée (voir
+        _prepare_merge_input) et renvoie les noms des lignes recopiées,
+        relevés pendant la copie comme leurs statistiques, ajoutées à resume.
+        """
+        resultat = future.result()
+        if resultat is None:
+            print(f"Erreur : Le fichier '{file_path}' n'existe pas.")
+            return set()
+
+        chemin, debut, taille, complement, rejetes = resultat
+        lecteur = BlocsCSV(resume)
+        try:
+            with open(chemin, mode='rb') as infile:
+                self._copy_range(infile, outfile, debut, taille, lecteur)
+            outfile.write(complement)
+        finally:
+            if chemin != file_path:
+                os.remove(chemin)
+        if rejetes:
+            print(f"{rejetes} ligne(s) du fichier '{file_path}' ignorée(s) : nombre de colonnes invalide.")
+        return lecteur.close()
+
+    @classmethod
+    def _prepare_merge_input(cls, file_path, header, dossier):
+        """
+        Prépare, dans un processus de travail, un fichier d'entrée à recopier
+        dans le récapitulatif. Renvoie (chemin, début, taille, complément, lignes
+        rejetées) : les octets [début, début + taille) de chemin, suivis de
+        complément (fin de ligne manquante), ou None si le fichier n'existe pas.
+        Si les entêtes sont identiques à ceux du récapitulatif et qu'aucune ligne
+        n'est marquée comme supprimée, la plage est celle qui suit la ligne
+        d'entêtes du fichier lui-même, sans décoder le CSV. Sinon, les lignes
+        valides sont écrites dans un fichier temporaire de dossier, que le
+        processus principal supprime après l'avoir recopié.
+        """
+        if not os.path.exists(file_path):
+            return None
+
+        header_line, header_end = cls._read_header_line(file_path)
+        if not header_line:
+            return file_path, 0, 0, b'', 0
+        if not cls._load_tombstones(file_path) and next(csv.reader([header_line.decode('utf-8')]), None) == header:
+            taille = os.path.getsize(file_path) - header_end
+            complement = b''
+            if taille:
+                with open(file_path, mode='rb') as file:
+                    file.seek(-1, os.SEEK_END)
+                    complement = b'' if file.read(1) == b'\n' else b'\r\n'
+            return file_path, header_end, taille, complement, 0
+
+        import tempfile
+
+        rows = cls._iter_live_rows(file_path)
+        next(rows, None)  # Passe les entêtes
+        rejetes = 0
+        fd, temp_file = tempfile.mkstemp(prefix=os.path.basename(file_path) + '.', suffix='.tmp', dir=dossier)
+        try:
+            with open(fd, mode='w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                for row in rows:
+                    if header is None or len(row) == len(header):
+                        writer.writerow(row)
+                    else:
+                        rejetes += 1
+        except BaseException:
+            os.remove(temp_file)
+            raise
+        return temp_file, 0, os.path.getsize(temp_file), b'', rejetes
+
+    @staticmethod
+    def _encode_rows(rows):
+        """
+        Sérialise des lignes au format CSV (même dialecte que csv.writer) et les encode en UTF-8.
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    @staticmethod
+    def _iter_rows_with_offsets(file_path):
+        """
+        Parcourt un fichier CSV en renvoyant des couples (position, ligne), où
+        position est l'offset en octets du début de l'enregistrement.
+        Le premier couple renvoyé correspond à la ligne d'entêtes.
+        """
+        with open(file_path, mode='rb') as file:
+            position = 0
+
+            def lignes():
+                nonlocal position
+                for ligne in file:
+                    position += len(ligne)
+                    yield ligne.decode('utf-8')
+
+            reader = csv.reader(lignes())
+            debut = 0
+            lues = 0
+            try:
+                for row in reader:
+                    lues += 1
+                    yield debut, row
+                    debut = position
+            finally:
+                StatistiquesOperation.count('lignes_lues', max(lues - 1, 0))  # Sans les entêtes
+
+    @staticmethod
+    def _read_row_at(file, offset):
+        """
+        Lit l'enregistrement CSV qui commence à l'offset donné d'un fichier ouvert en binaire.
+        """
+        file.seek(offset)
+        reader = csv.reader(ligne.decode('utf-8') for ligne in file)
+        return next(reader)
+
+    @staticmethod
+    def _file_signature(file_path):
+        """
+        Renvoie la signature (taille, date de modification) d'un fichier,
+        utilisée pour savoir si un fichier annexe est encore à jour.
+        """
+        stat = os.stat(file_path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _bloom_excludes(self, file_path, noms):
+        """
+        Indique si le filtre de Bloom du fichier, s'il existe et est à jour,
+        garantit qu'aucun des noms ne figure dans le fichier. Seuls l'entête et
+        quelques octets du filtre sont lus (mmap).
+        """
+        try:
+            with open(file_path + self.BLOOM_SUFFIX, mode='rb') as file, \
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                filtre = FiltreBloom(buffer)
+                if filtre.signature != self._file_signature(file_path):
+                    return False
+                return not any(str(nom) in filtre for nom in noms)
+        except (OSError, ValueError, struct.error):
+            return False
+
+    def _bloom_add(self, file_path, noms, signature):
+        """
+        Ajoute au filtre de Bloom du fichier les noms des lignes qui viennent
+        d'y être ajoutées, le fichier ayant la signature donnée avant l'ajout.
+        Un filtre absent ou périmé est laissé tel quel ; un filtre plein (plus
+        de noms que sa capacité) est reconstruit.
+        """
+        try:
+            with open(file_path + self.BLOOM_SUFFIX, mode='r+b') as file, mmap.mmap(file.fileno(), 0) as buffer:
+                filtre = FiltreBloom(buffer)
+                if filtre.signature != signature:
+                    return
+                # Les bits d'abord, la signature ensuite : un ajout interrompu laisse un filtre périmé
+                filtre.add_many([str(nom) for nom in noms])
+                plein = filtre.nombre > filtre.capacite
+                if not plein:
+                    filtre.set_signature(self._file_signature(file_path))
+        except (OSError, ValueError, struct.error):
+            return
+        if plein:
+            self._build_bloom(file_path)
+
+    def _save_bloom(self, file_path, noms):
+        """
+        Écrit le filtre de Bloom d'un fichier qui vient d'être écrit, à partir
+        de la collection de ses noms de produits (capacité double, pour les ajouts).
+        """
+        filtre = FiltreBloom.create(2 * len(noms), self._file_signature(file_path))
+        filtre.add_many(noms)
+        filtre.set_signature(filtre.signature)
+        with self._atomic_rewrite(file_path + self.BLOOM_SUFFIX) as temp_file:
+            with open(temp_file, mode='wb') as file:
+                file.write(filtre.buffer)
+
+    def _build_bloom(self, file_path):
+        """
+        Construit le filtre de Bloom d'un fichier lu en flux (CSV, éventuellement compressé).
+        """
+        stockage = self._storage(file_path)
+        if not os.path.exists(file_path) or not stockage.flux:
+            return
+        self._save_bloom(file_path, self._file_names(file_path))
+
+    def _load_bloom(self, file_path):
+        """
+        Renvoie une copie modifiable (FiltreBloom sur un bytearray) du filtre de
+        Bloom du fichier s'il existe et est à jour, None sinon.
+        """
+        try:
+            with open(file_path + self.BLOOM_SUFFIX, mode='rb') as file:
+                filtre = FiltreBloom(bytearray(file.read()))
+        except (OSError, ValueError, struct.error):
+            return None
+        return filtre if filtre.signature == self._file_signature(file_path) else None
+
+    def _file_names(self, file_path):
+        """
+        Renvoie l'ensemble des noms de produits (encodés en UTF-8) des lignes
+        non supprimées d'un fichier.
+        """
+        stockage = self._storage(file_path)
+        tombstones = self._load_tombstones(file_path)
+        # Sans suppressions en attente, inutile de suivre la position des lignes
+        if stockage.texte and not tombstones:
+            return self._read_names(file_path)
+        rows = self._iter_live_rows(file_path) if tombstones else stockage.iter_rows(file_path)
+        next(rows, None)  # Passe les entêtes
+        return {row[0].encode('utf-8') for row in rows if row}
+
+    def _save_merge_bloom(self, output_path, noms, filtre=None):
+        """
+        Enregistre le filtre de Bloom d'un récapitulatif qui vient d'être écrit
+        par une fusion, à partir des noms de ses lignes relevés pendant la
+        fusion (octets UTF-8) : le récapitulatif n'est pas relu. Avec filtre
+        (filtre de la fusion précédente, assez grand pour les noms), seuls les
+        noms des lignes relues sont donnés et y sont ajoutés. Seuls les
+        récapitulatifs lus en flux ont un filtre.
+        """
+        if not self._storage(output_path).flux:
+            return
+        if filtre is None:
+            self._save_bloom(output_path, noms)
+            return
+        filtre.add_many(list(noms))
+        filtre.set_signature(self._file_signature(output_path))
+        with self._atomic_rewrite(output_path + self.BLOOM_SUFFIX) as temp_file:
+            with open(temp_file, mode='wb') as file:
+                file.write(filtre.buffer)
+
+    @classmethod
+    def _read_names(cls, file_path):
+        """
+        Renvoie l'ensemble des noms de produits d'un fichier CSV, encodés en
+        UTF-8, lu par blocs (voir BlocsCSV).
+        """
+        lecteur = BlocsCSV()
+        with open(file_path, mode='rb') as file:
+            file.readline()  # Entêtes
+            dernier = b'\n'
+            for bloc in iter(lambda: file.read(cls.COPY_BUFFER_SIZE), b''):
+                lecteur.feed(bloc)
+                StatistiquesOperation.count('lignes_lues', bloc.count(b'\n'))
+                dernier = bloc[-1:]
+        if dernier != b'\n':
+            StatistiquesOperation.count('lignes_lues', 1)
+        return lecteur.close()
+
+    def _summary_signature(self, file_path):
+        """
+        Signature d'un fichier pour son résumé : celle du fichier et de son
+        journal de suppressions (une suppression différée change les statistiques).
+        """
+        tombstone_path = file_path + self.TOMBSTONE_SUFFIX
+        tombstones = self._file_signature(tombstone_path) if os.path.exists(tombstone_path) else None
+        return [self._file_signature(file_path), tombstones]
+
+    def _load_summary(self, file_path, signature):
+        """
+        Renvoie le résumé enregistré d'un fichier s'il correspond à la signature
+        donnée (voir _summary_signature), None sinon.
+        """
+        try:
+            with open(file_path + self.SUMMARY_SUFFIX, mode='rb') as file:
+                return self._decode_summary(file.read(), signature)
+        except OSError:
+            return None
+
+    def _decode_summary(self, contenu, signature):
+        try:
+            data = json.loads(contenu)
+            if data.get('version') != self.SUMMARY_VERSION or data.get('signature') != signature:
+                return None
+            return ResumeStock(data['categories'], data['ignorees'])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def _encode_summary(self, resume, signature):
+        # La signature est écrite en dernier (voir _summary_add) ; json.dumps
+        # utilise l'encodeur en C, contrairement à json.dump
+        data = {'version': self.SUMMARY_VERSION, 'categories': resume.categories,
+                'ignorees': resume.ignorees, 'signature': signature}
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    def _save_summary(self, file_path, resume, signature=None):
+        """
+        Enregistre le résumé d'un fichier, associé à sa signature actuelle (ou à
+        celle qu'il avait lorsque le résumé a été calculé).
+        """
+        contenu = self._encode_summary(resume, signature or self._summary_signature(file_path))
+        with self._atomic_rewrite(file_path + self.SUMMARY_SUFFIX) as temp_file:
+            with open(temp_file, mode='wb') as file:
+                file.write(contenu)
+
+    def _summary_add(self, file_path, rows, signature):
+        """
+        Ajoute au résumé d'un fichier, s'il existe et correspond à signature
+        (celle du fichier avant l'ajout), des lignes qui viennent d'y être ajoutées.
+        Le fichier annexe est réécrit sur place, sous le verrou exclusif de
+        l'ajout : la signature étant écrite en dernier, une écriture interrompue
+        laisse un résumé illisible ou associé à l'ancienne signature, donc ignoré.
+        """
+        try:
+            with open(file_path + self.SUMMARY_SUFFIX, mode='r+b') as file:
+                resume = self._decode_summary(file.read(), signature)
+                if resume is None:
+                    return
+                for row in rows:
+                    if row:
+                        resume.add_row(row)
+                file.seek(0)
+                file.write(self._encode_summary(resume, self._summary_signature(file_path)))
+                file.truncate()
+        except OSError:
+            return
+
+    def _file_summary(self, file_path):
+        """
+        Résumé à jour d'un fichier : celui qui est enregistré, ou à défaut celui
+        calculé en lisant le fichier, enregistré pour les appels suivants. Le
+        calcul se fait sous le verrou partagé du fichier : un ajout concurrent
+        ne peut pas y ajouter des lignes que _summary_add compterait ensuite
+        une seconde fois.
+        """
+        self._checkpoint(file_path)
+        signature = self._summary_signature(file_path)
+        resume = self._load_summary(file_path, signature)
+        if resume is not None:
+            return resume
+
+        with self._lock(file_path, shared=True):
+            signature = self._summary_signature(file_path)
+            resume = ResumeStock()
+            rows = self._iter_live_rows(file_path)
+            next(rows, None)  # Passe les entêtes
+            for row in rows:
+                if row:
+                    resume.add_row(row)
+            self._save_summary(file_path, resume, signature)
+        return resume
+
+    @_measured
+    def build_index(self, file_name, is_recap=False):
+        """
+        Construit (ou reconstruit) l'index annexe d'un fichier CSV.
+        L'index associe, pour chacune des quatre colonnes, chaque valeur
+        aux offsets des lignes qui la contiennent. Le filtre de Bloom des noms
+        de produits est reconstruit en même temps.
+        """
+        file_path = self.get_file_path(file_name, is_recap)
+
+        if not os.path.exists(file_path):
+            print(f"Le fichier '{file_path}' n'existe pas.")
+            return None
+
+        if not self._storage(file_path).texte:
+            print(f"L'index annexe n'est disponible que pour les fichiers CSV : '{file_path}' est lu par colonnes.")
+            return None
+
+        self._checkpoint(file_path)
+        index = self._build_index(file_path)
+        nb_lignes = sum(len(offsets) for offsets in index[0].values())
+        print(f"Index construit pour le fichier '{file_path}' ({nb_lignes} ligne(s)).")
+        return index
+
+    def _build_index(self, file_path):
+        signature = self._file_signature(file_path)
+        index = [{} for _ in self.HEADERS]
+
+        rows = self._iter_rows_with_offsets(file_path)
+        next(rows, None)  # Passe les entêtes
+        for offset, row in rows:
+            for i, (colonne, valeur) in enumerate(zip(index, row)):
+                colonne.setdefault(self._match_key(i, valeur), []).append(offset)
+        # Noms des lignes non supprimées
+        tombstones = self._load_tombstones(file_path)
+        self._save_bloom(file_path, [nom for nom, offsets in index[0].items()
+                                     if any(offset >= tombstones.get(nom, -1) for offset in offsets)])
+
+        # Base SQLite : une ligne par valeur de chaque colonne, avec ses offsets
+        # (entiers 64 bits) ; une recherche ne lit que les valeurs cherchées
+        with self._atomic_rewrite(file_path + self.INDEX_SUFFIX) as temp_file:
+            with StockageSQLite._connect(temp_file) as connexion:
+                # Base temporaire remplacée d'un coup : ni journal ni synchronisation
+                connexion.execute("PRAGMA journal_mode = OFF")
+                connexion.execute("PRAGMA synchronous = OFF")
+                connexion.execute(f"PRAGMA user_version = {self.INDEX_VERSION}")
+                for instruction in self.INDEX_SCHEMA:
+                    connexion.execute(instruction)
+                connexion.execute("INSERT INTO signature VALUES (?, ?)", signature)
+                connexion.executemany("INSERT INTO cles VALUES (?, ?, ?)",
+                                      ((i, valeur, array.array('q', offsets).tobytes())
+                                       for i, colonne in enumerate(index) for valeur, offsets in colonne.items()))
+                connexion.commit()
+
+        self._cache_index(file_path, signature, index)
+        return index
+
+    def _cache_index(self, file_path, signature, index):
+        if self.cache is not None:
+            # Estimation grossière : une clé et un décalage par ligne et par colonne
+            taille = sum(len(colonne) * 64 + sum(len(offsets) for offsets in colonne.values()) * 32
+                         for colonne in index)
+            self.cache.put((file_path, 'index'), tuple(signature), index, taille)
+
+    def _index_offsets(self, file_path, cles, build=False):
+        """
+        Renvoie l'ensemble des offsets des lignes dont au moins une colonne vaut
+        la clé donnée pour cette colonne dans cles (None pour une colonne sans
+        critère), d'après l'index à jour du fichier, ou None s'il n'en possède pas.
+        Seules les entrées des clés cherchées sont lues dans l'index annexe ; dans
+        une session (cache), l'index entier est chargé une fois et gardé en mémoire.
+        Un index dont la signature ne correspond plus au fichier est reconstruit.
+        """
+        index_path = file_path + self.INDEX_SUFFIX
+        if not build and not os.path.exists(index_path):
+            return None
+
+        signature = self._file_signature(file_path)
+        index = None
+        if self.cache is not None:
+            index = self.cache.get((file_path, 'index'), tuple(signature))
+            if index is None:
+                index = self._read_index(index_path, signature)
+                if index is not None:
+                    self._cache_index(file_path, signature, index)
+        else:
+            offsets = self._read_index(index_path, signature, cles)
+            if offsets is not None:
+                return offsets
+
+        if index is None:
+            index = self._build_index(file_path)
+        offsets = set()
+        for colonne, cle in zip(index, cles):
+            if cle is not None:
+                offsets.update(colonne.get(cle, ()))
+        return offsets
+
+    @contextlib.contextmanager
+    def _open_index(self, index_path, signature):
+        """
+        Ouvre l'index annexe s'il existe et correspond à la signature du fichier :
+        fournit la connexion SQLite, ou None si l'index est absent, périmé, d'un
+        format antérieur (JSON) ou endommagé.
+        """
+        import sqlite3
+
+        if not os.path.exists(index_path):
+            yield None
+            return
+        with StockageSQLite._connect(index_path) as connexion:
+            try:
+                valide = connexion.execute("PRAGMA user_version").fetchone()[0] == self.INDEX_VERSION \
+                    and list(connexion.execute("SELECT taille, mtime_ns FROM signature").fetchone()) == signature
+            except (sqlite3.DatabaseError, TypeError):
+                valide = False
+            yield connexion if valide else None
+
+    def _read_index(self, index_path, signature, cles=None):
+        """
+        Lit l'index annexe s'il est à jour (sinon renvoie None). Avec cles,
+        renvoie l'ensemble des offsets des clés cherchées (voir _index_offsets) ;
+        sans cles, l'index entier, sous forme d'une table valeur -> offsets par colonne.
+        """
+        with self._open_index(index_path, signature) as connexion:
+            if connexion is None:
+                return None
+            if cles is None:
+                index = [{} for _ in self.HEADERS]
+                for i, valeur, offsets in connexion.execute("SELECT colonne, valeur, offsets FROM cles"):
+                    index[i][valeur] = array.array('q', offsets).tolist()
+                return index
+            offsets = set()
+            for i, cle in enumerate(cles):
+                if cle is not None:
+                    ligne = connexion.execute("SELECT offsets FROM cles WHERE colonne = ? AND valeur = ?",
+                                              (i, cle)).fetchone()
+                    if ligne is not None:
+                        offsets.update(array.array('q', ligne[0]))
+            return offsets
+
+    def _count_live_names(self, file_path, noms):
+        """
+        Renvoie, sans lire le fichier, le nombre de lignes non supprimées de
+        chaque nom lorsque le filtre de Bloom (absence) ou l'index à jour du
+        fichier permet de le connaître ; les autres noms sont absents du résultat.
+        """
+        comptes = {nom: 0 for nom in noms if self._bloom_excludes(file_path, [nom])}
+        restants = [nom for nom in noms if nom not in comptes]
+        if not restants:
+            return comptes
+
+        signature = self._file_signature(file_path)
+        index = self.cache.peek((file_path, 'index'), tuple(signature)) if self.cache is not None else None
+        tombstones = self._load_tombstones(file_path)
+        with self._open_index(file_path + self.INDEX_SUFFIX, signature) as connexion:
+            if index is None and connexion is None:
+                return comptes
+            for nom in restants:
+                if index is not None:
+                    offsets = index[0].get(nom, ())
+                else:
+                    ligne = connexion.execute("SELECT offsets FROM cles WHERE colonne = 0 AND valeur = ?",
+                                              (nom,)).fetchone()
+                    offsets = array.array('q', ligne[0]) if ligne is not None else ()
+                comptes[nom] = sum(1 for offset in offsets if offset >= tombstones.get(nom, -1))
+        return comptes
+
+    def iter_products(self, file_name, product_name=None, product_categ=None, product_prize=None, product_quantity=None, is_recap=False, use_index=None):
+        """
+        Générateur renvoyant un à un, sous forme de Produit, les produits d'un
+        fichier CSV correspondant à au moins un des critères (tous les produits
+        si aucun critère n'est donné). La mémoire utilisée ne dépend pas de la
+        taille du fichier.
+        use_index : None pour utiliser l'index annexe s'il existe, True pour le
+        construire au besoin, False pour toujours lire le fichier entier.
+        Un récapitulatif partitionné (voir merge_csv) est lu partition par
+        partition, en ne lisant que celles pouvant contenir les produits cherchés.
+        """
+        file_path = self.get_file_path(file_name, is_recap)
+
+        if not os.path.exists(file_path):
+            manifest = self._load_partitions(file_path)
+            if manifest is None:
+                raise FileNotFoundError(f"Le fichier '{file_path}' n'existe pas.")
+            for partition in self._select_partitions(manifest, product_name, product_categ, product_prize, product_quantity):
+                yield from self.iter_products(os.path.join(os.path.dirname(file_name), partition), product_name,
+                                              product_categ, product_prize, product_quantity, is_recap, use_index)
+            return
+
+        stockage = self._storage(file_path)
+        criteres = (product_name, product_categ, product_prize, product_quantity)
+        if product_name is not None and stockage.flux and all(critere is None for critere in criteres[1:]):
+            # Nom absent du filtre de Bloom : absent du fichier, qui n'est pas lu
+            self._checkpoint(file_path)
+            if self._bloom_excludes(file_path, [product_name]):
+                return
+
+        if stockage.indexe and any(critere is not None for critere in criteres):
+            # Requête sur les index du moteur de stockage
+            yield from stockage.select(file_path, *criteres)
+            return
+
+        if (self.cache is not None and use_index is not True) or not stockage.flux:
+            # Table déjà chargée dans la session (ou stockage par colonnes) : pas
+            # de relecture du texte. Une table incomplète (lignes rejetées) ne
+            # remplace pas la lecture.
+            table = self._load_table(file_path)
+            if not table.rejetes:
+                if any(critere is not None for critere in criteres):
+                    yield from table.select(*criteres)
+                else:
+                    yield from table
+                return
+
+        # Critères dans l'ordre des colonnes : nom, quantité, prix, catégorie
+        criteres = [product_name, product_quantity, product_prize, product_categ]
+
+        for row in self._iter_matching_rows(file_path, criteres, use_index):
+            yield self._to_product(row)
+
+    def _iter_matching_rows(self, file_path, criteres, use_index):
+        self._checkpoint(file_path)
+        cles = [self._match_key(i, valeur) if valeur else None for i, valeur in enumerate(criteres)]
+        offsets = None
+        if use_index is not False and any(criteres) and self._storage(file_path).texte:
+            offsets = self._index_offsets(file_path, cles, build=bool(use_index))
+
+        rows = self._iter_live_rows(file_path)
+        next(rows, None)  # Passe les entêtes
+
+        if offsets is not None:
+            rows.close()
+            return StatistiquesOperation.counted(self._read_rows_at(file_path, sorted(offsets)), 'lignes_lues')
+        if not any(criteres):
+            return rows
+
+        # Critères actifs calculés une fois : le nom et la catégorie sont
+        # comparés directement, la quantité et le prix en tant que nombres
+        textes = [(i, cle) for i, cle in enumerate(cles) if cle is not None and i not in (1, 2)]
+        nombres = [(i, cle) for i, cle in enumerate(cles) if cle is not None and i in (1, 2)]
+        if len(textes) == 1 and not nombres:
+            i, cle = textes[0]
+            return (row for row in rows if row[i] == cle)
+        match_key = self._match_key
+        return (row for row in rows
+                if any(row[i] == cle for i, cle in textes)
+                or any(match_key(i, row[i]) == cle for i, cle in nombres))
+
+    @staticmethod
+    def _match_key(colonne, valeur):
+        """
+        Forme normalisée d'une valeur pour la comparaison avec un critère : la
+        quantité et le prix sont comparés en tant que nombres (30000 == 30000.0).
+        """
+        if colonne in (1, 2):
+            try:
+                return repr(float(valeur))
+            except ValueError:
+                pass
+        return valeur
 
-    def get_file_path(self, file_name, is_recap):
+    @classmethod
+    def _to_product(cls, row):
         """
-        Renvoie le chemin complet du fichier CSV, en fonction du fait qu'il s'agit
-        d'un fichier récapitulatif ou non.
+        Convertit une ligne CSV en ProduitLu, qui garde les textes de la ligne.
+        Une quantité ou un prix qui n'est pas un nombre est conservé tel quel.
         """
-        directory = self.RECAP_CSV_DIR if is_recap else self.LISTE_CSV_DIR
-        return os.path.join(directory, file_name)
+        row = (row + [''] * len(cls.HEADERS))[:len(cls.HEADERS)]
+        valeurs = []
+        for valeur in row[1:3]:
+            try:
+                valeurs.append(cls._parse_number(valeur))
+            except ValueError:
+                valeurs.append(valeur)
+        return ProduitLu.from_texts(row, valeurs[0], valeurs[1])
 
-    def create_csv(self, file_name):
+    def load_products(self, file_name, is_recap=False):
         """
-        Crée un fichier CSV avec des entêtes prédéfinies s'il n'existe pas déjà.
+        Charge les produits d'un fichier CSV dans une TableProduits (lignes
+        marquées comme supprimées exclues). Les lignes dont la quantité n'est
+        pas un entier ou le prix pas un nombre sont ignorées et signalées.
         """
-        file_path = self.get_file_path(file_name, is_recap=False)
+        file_path = self.get_file_path(file_name, is_recap)
 
-        if os.path.exists(file_path):
-            print(f"Le fichier '{file_path}' existe déjà.")
-            return
+        if not os.path.exists(file_path):
+            print(f"Le fichier '{file_path}' n'existe pas.")
+            return None
 
-        headers = ['nom du produit', 'quantité', 'prix unitaire', 'catégorie']
-        with open(file_path, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(headers)
+        table = self._load_table(file_path)
+        if table.rejetes:
+            print(f"{table.rejetes} ligne(s) du fichier '{file_path}' ignorée(s) : quantité ou prix invalide.")
+        return table
 
-        print(f"Fichier '{file_path}' créé avec les colonnes : {', '.join(headers)}.")
+    def _load_table(self, file_path):
+        self._checkpoint(file_path)
+        if self.cache is None:
+            return self._read_table(file_path)
 
-    def add_product(self, file_name, product_info, is_recap):
+        signature = self._cache_signature(file_path)
+        table = self.cache.get((file_path, 'table'), signature)
+        if table is None:
+            table = self._read_table(file_path)
+            self.cache.put((file_path, 'table'), signature, table, table.nbytes)
+        return table
+
+    def _read_table(self, file_path):
+        stockage = self._storage(file_path)
+        if not stockage.flux:
+            return stockage.load(file_path)
+
+        table = TableProduits()
+        rejetes = 0
+        rows = self._iter_live_rows(file_path)
+        next(rows, None)  # Passe les entêtes
+        for row in rows:
+            try:
+                table.append(*row)
+            except (ValueError, TypeError):
+                rejetes += 1
+        table.rejetes = rejetes
+        return table
+
+    def query_products(self, file_name, query, is_recap=False):
         """
-        Ajoute un produit (ligne) dans le fichier CSV spécifié.
-        product_info est une liste au format [nom, quantite, prix, categorie].
+        Renvoie, dans l'ordre du fichier, les produits satisfaisant une requête
+        (texte ou Requete, voir la classe Requete), évaluée par colonnes sur le
+        fichier chargé en mémoire. Lève ValueError si la requête est invalide.
         """
+        requete = query if isinstance(query, Requete) else Requete(query)
+        manifest = self._load_partitions(self.get_file_path(file_name, is_recap))
+        if manifest is not None and not os.path.exists(self.get_file_path(file_name, is_recap)):
+            return itertools.chain.from_iterable(
+                self.query_products(os.path.join(os.path.dirname(file_name), partition['file']), requete, is_recap)
+                for partition in manifest['partitions'])
         file_path = self.get_file_path(file_name, is_recap)
-
         if not os.path.exists(file_path):
-            print(f"Le fichier '{file_path}' n'existe pas. Veuillez le créer d'abord.")
-            return
-
-        with open(file_path, mode='a', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(product_info)
+            print(f"Le fichier '{file_path}' n'existe pas.")
+            return []
+        return self._evaluate_query(file_path, requete)
 
-        print(f"Produit ajouté au fichier '{file_path}'.")
+    def _evaluate_query(self, file_path, requete):
+        """
+        Évalue une Requete sur la table d'un fichier. Les lignes que la table ne
+        peut pas contenir (quantité non entière ou prix invalide) ne sont pas
+        évaluées : leur nombre est signalé sur la sortie d'erreur, pour ne pas
+        mêler le message aux résultats.
+        """
+        table = self._load_table(file_path)
+        if table.rejetes:
+            print(f"{table.rejetes} ligne(s) du fichier '{file_path}' non évaluée(s) par la requête : "
+                  f"quantité ou prix invalide.", file=sys.stderr)
+        return (table[i] for i in requete.evaluate(table))
 
-    def delete_product(self, file_name, product_name, is_recap):
+    def load_stats(self, file_name, is_recap=False):
         """
-        Supprime toutes les occurrences (toutes les lignes) du produit spécifié par son nom.
+        Renvoie les statistiques par catégorie (ResumeStock) des produits d'un
+        fichier, ou None s'il n'existe pas. Elles sont enregistrées dans un
+        fichier annexe (SUMMARY_SUFFIX), mis à jour par les ajouts et recalculé
+        par les suppressions et les fusions : le fichier n'est lu que si ce
+        résumé manque ou ne correspond plus au fichier. Les statistiques d'un
+        récapitulatif partitionné combinent celles de ses partitions.
         """
         file_path = self.get_file_path(file_name, is_recap)
+        if os.path.exists(file_path):
+            return self._file_summary(file_path)
 
-        if not os.path.exists(file_path):
+        manifest = self._load_partitions(file_path)
+        if manifest is None:
             print(f"Le fichier '{file_path}' n'existe pas.")
-            return
+            return None
+        resume = ResumeStock()
+        for partition in manifest['partitions']:
+            resume.update(self._file_summary(os.path.join(os.path.dirname(file_path), partition['file'])))
+        return resume
 
-        temp_file = file_path + '.tmp'
-        lines_deleted = 0
+    @_measured
+    def show_stats(self, file_name, is_recap=False, output_format='table'):
+        """
+        Affiche, pour chaque catégorie puis pour l'ensemble du fichier, le nombre
+        de produits, la somme des quantités, la valeur du stock (quantité × prix
+        unitaire) et les prix minimal et maximal, au format output_format
+        ('text', 'csv', 'jsonl' ou 'table'). Renvoie les statistiques (voir load_stats).
+        """
+        if output_format not in self.OUTPUT_FORMATS:
+            print(f"Format de sortie '{output_format}' inconnu (formats acceptés : {', '.join(self.OUTPUT_FORMATS)}).")
+            return None
 
-        with open(file_path, mode='r', encoding='utf-8') as infile, open(temp_file, mode='w', newline='', encoding='utf-8') as outfile:
-            reader = csv.reader(infile)
-            writer = csv.writer(outfile)
+        resume = self.load_stats(file_name, is_recap)
+        if resume is None:
+            return None
 
-            headers = next(reader)
-            writer.writerow(headers)
+        # Les formats destinés à d'autres outils gardent la sortie standard pour les statistiques
+        messages = sys.stdout if output_format in ('text', 'table') else sys.stderr
+        if output_format == 'text':
+            found = self._print_text(resume.rows(), ResumeStock.HEADERS, f"Statistiques du fichier '{file_name}':")
+        else:
+            found = getattr(self, f"_print_{output_format}")(resume.rows(), ResumeStock.HEADERS)
+        if not found:
+            print(f"Aucun produit dans le fichier '{file_name}'.", file=messages)
+        if resume.ignorees:
+            print(f"{resume.ignorees} ligne(s) ignorée(s) : quantité ou prix invalide.", file=messages)
+        return resume
 
-            for row in reader:
-                if row[0] == product_name:
-                    lines_deleted += 1
-                else:
-                    writer.writerow(row)
+    def _expand_pattern(self, pattern, is_recap=False):
+        """
+        Renvoie la liste triée des fichiers désignés par un motif : un répertoire
+        (tous ses fichiers CSV) ou un motif glob, relatif au répertoire des
+        fichiers individuels (ou récapitulatifs) s'il ne désigne pas de répertoire.
+        Les fichiers annexes (index, journal de suppressions...) sont exclus.
+        """
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*')
+        elif not os.path.dirname(pattern):
+            pattern = self.get_file_path(pattern, is_recap)
 
-        os.replace(temp_file, file_path)
+        return sorted(path for path in glob.glob(pattern)
+                      if os.path.isfile(path) and not path.endswith(self.SIDECAR_SUFFIXES))
 
-        if lines_deleted > 0:
-            print(f"{lines_deleted} occurrence(s) du produit '{product_name}' ont été supprimées du fichier '{file_path}'.")
-        else:
-            print(f"Produit '{product_name}' non trouvé dans le fichier '{file_path}'.")
+    @staticmethod
+    def _is_pattern(file_name):
+        """
+        Indique si le nom désigne plusieurs fichiers (motif glob ou répertoire).
+        """
+        return glob.has_magic(file_name) or os.path.isdir(file_name)
 
-    def merge_csv(self, input_files, output_file):
+    def iter_products_multi(self, pattern, product_name=None, product_categ=None, product_prize=None, product_quantity=None, is_recap=False, query=None, workers=None, limit=None):
         """
-        Fusionne plusieurs fichiers CSV individuels en un seul fichier récapitulatif.
+        Recherche dans tous les fichiers désignés par pattern (voir _expand_pattern),
+        parcourus en parallèle par un pool de workers processus (le décodage du
+        CSV occupe le processeur : des threads se partageraient le GIL). Génère
+        des couples (chemin du fichier, Produit) au fur et à mesure qu'ils sont
+        trouvés, transmis par lots de MULTI_SEARCH_BATCH produits.
+        query (texte ou Requete) remplace les critères s'il est donné.
+        Chaque processus s'arrête après limit résultats pour son fichier ; dès
+        que limit résultats ont été renvoyés (ou que le générateur est fermé),
+        les processus s'arrêtent entre deux lignes et les fichiers restants
+        sont ignorés.
         """
-        input_paths = [self.get_file_path(file, is_recap=False) for file in input_files]
-        output_path = self.get_file_path(output_file, is_recap=True)
+        file_paths = self._expand_pattern(pattern, is_recap)
+        requete = Requete(query) if isinstance(query, str) else query
+        criteres = [product_name, product_quantity, product_prize, product_categ]
+        if not file_paths:
+            return
 
-        header_written = False
+        import concurrent.futures
+        import multiprocessing
 
-        with open(output_path, mode='w', newline='', encoding='utf-8') as outfile:
-            writer = None
+        contexte = multiprocessing.get_context()
+        resultats = contexte.Queue(maxsize=self.MULTI_SEARCH_QUEUE_SIZE)
+        arret = contexte.Event()
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers or min(os.cpu_count() or 1, len(file_paths)), mp_context=contexte,
+            initializer=type(self)._init_search_worker, initargs=(resultats, arret))
+        try:
+            futures = [executor.submit(type(self)._search_worker, file_path, criteres, requete, limit,
+                                       StatistiquesOperation.active())
+                       for file_path in file_paths]
+            restants = len(file_paths)
+            trouves = 0
+            while restants:
+                try:
+                    file_path, element = resultats.get(timeout=0.1)
+                except queue.Empty:
+                    # Processus de travail interrompu avant d'avoir pu signaler sa fin
+                    for future in futures:
+                        if future.done() and future.exception() is not None:
+                            raise future.exception()
+                    continue
+                if isinstance(element, BaseException):
+                    raise element
+                if isinstance(element, int):
+                    # Fin du fichier, avec le nombre de lignes lues
+                    StatistiquesOperation.count('lignes_lues', element)
+                    restants -= 1
+                    continue
+                for product in element:
+                    yield file_path, product
+                    trouves += 1
+                    if limit and trouves >= limit:
+                        return
+        finally:
+            arret.set()
+            executor.shutdown(wait=True, cancel_futures=True)
 
-            for file_path in input_paths:
-                if not os.path.exists(file_path):
-                    print(f"Erreur : Le fichier '{file_path}' n'existe pas.")
+    @classmethod
+    def _init_search_worker(cls, resultats, arret):
+        """
+        Initialisation d'un processus de travail de iter_products_multi : la file
+        des résultats et l'événement d'arrêt sont transmis à la création du
+        processus. Les lots encore en attente à l'arrêt peuvent être perdus.
+        """
+        resultats.cancel_join_thread()
+        cls._recherche = (resultats, arret)
+
+    @classmethod
+    def _search_worker(cls, file_path, criteres, requete, limit, mesurer):
+        """
+        Recherche dans un fichier, dans un processus de travail : dépose dans la
+        file des résultats des couples (file_path, lot de produits), puis
+        (file_path, nombre de lignes lues) ou (file_path, exception).
+        """
+        resultats, arret = cls._recherche
+
+        def deposer(element):
+            # Abandonne si la recherche est arrêtée, pour ne pas bloquer sur une file pleine
+            while not arret.is_set():
+                try:
+                    resultats.put((file_path, element), timeout=0.1)
+                    return True
+                except queue.Full:
                     continue
+            return False
 
-                with open(file_path, mode='r', encoding='utf-8') as infile:
-                    reader = csv.reader(infile)
-                    header = next(reader)
+        gestion_csv = cls(create_directories=False)
+        mesure = StatistiquesOperation('recherche', file_path) if mesurer else contextlib.nullcontext()
+        try:
+            with mesure:
+                if requete is not None:
+                    products = gestion_csv._iter_query_chunks(file_path, requete, arret)
+                else:
+                    rows = gestion_csv._iter_matching_rows(file_path, criteres, None)
+                    products = map(cls._to_product, cls._until(rows, arret))
+                lot = []
+                for product in itertools.islice(products, limit):
+                    lot.append(product)
+                    if len(lot) >= cls.MULTI_SEARCH_BATCH:
+                        if not deposer(lot):
+                            return
+                        lot = []
+                if lot and not deposer(lot):
+                    return
+        except Exception as erreur:
+            deposer(erreur)
+            return
+        deposer(mesure.lignes_lues if mesurer else 0)
 
-                    if not header_written:
-                        writer = csv.writer(outfile)
-                        writer.writerow(header)
-                        header_written = True
+    @classmethod
+    def _until(cls, rows, arret):
+        """
+        Parcourt rows jusqu'à ce que l'événement arret soit positionné, vérifié
+        toutes les MULTI_SEARCH_CHECK lignes.
+        """
+        for numero, row in enumerate(rows):
+            if not numero % cls.MULTI_SEARCH_CHECK and arret.is_set():
+                return
+            yield row
 
-                    for row in reader:
-                        writer.writerow(row)
+    def _iter_query_chunks(self, file_path, requete, arret):
+        """
+        Évalue une requête sur un fichier lu en flux par tables successives de
+        MULTI_SEARCH_CHUNK lignes, en s'arrêtant entre deux lignes dès que
+        l'événement arret est positionné : la mémoire utilisée ne dépend pas de
+        la taille du fichier. Les autres moteurs de stockage sont chargés en une fois.
+        """
+        if not self._storage(file_path).flux:
+            yield from self._evaluate_query(file_path, requete)
+            return
 
-        print(f"Fichier récapitulatif créé : {output_path}")
+        self._checkpoint(file_path)
+        rows = self._iter_live_rows(file_path)
+        next(rows, None)  # Passe les entêtes
+        rejetes = 0
+        fin = False
+        while not fin:
+            table = TableProduits()
+            lues = 0
+            while lues < self.MULTI_SEARCH_CHUNK:
+                if arret.is_set():
+                    return
+                avant = lues
+                for row in itertools.islice(rows, self.MULTI_SEARCH_CHECK):
+                    lues += 1
+                    try:
+                        table.append(*row)
+                    except (ValueError, TypeError):
+                        rejetes += 1
+                if lues - avant < self.MULTI_SEARCH_CHECK:
+                    fin = True
+                    break
+            for i in requete.evaluate(table):
+                yield table[i]
+        if rejetes:
+            print(f"{rejetes} ligne(s) du fichier '{file_path}' non évaluée(s) par la requête : "
+                  f"quantité ou prix invalide.", file=sys.stderr)
 
-    def search_product(self, file_name, product_name=None, product_categ=None, product_prize=None, product_quantity=None, is_recap=False):
+    @_measured
+    def search_product(self, file_name, product_name=None, product_categ=None, product_prize=None, product_quantity=None, is_recap=False, use_index=None, output_format='text', query=None, limit=None, workers=None):
         """
-        Recherche des produits dans un fichier CSV en fonction de différents critères.
-        Affiche toutes les lignes correspondant à ces critères.
+        Recherche des produits dans un fichier CSV en fonction de différents critères,
+        ou d'une requête (query, voir la classe Requete) qui remplace alors les critères.
+        Affiche toutes les lignes correspondant à ces critères, au fur et à mesure,
+        au format output_format : 'text' (un champ par ligne), 'csv', 'jsonl' ou 'table'.
+        use_index : None pour utiliser l'index annexe s'il existe, True pour le
+        construire au besoin, False pour toujours lire le fichier entier.
+        file_name peut aussi être un motif glob ou un répertoire : les fichiers
+        sont alors parcourus en parallèle (workers processus) et chaque résultat
+        est accompagné de son fichier. La recherche s'arrête après limit résultats.
         """
+        if output_format not in self.OUTPUT_FORMATS:
+            print(f"Format de sortie '{output_format}' inconnu (formats acceptés : {', '.join(self.OUTPUT_FORMATS)}).")
+            return
+
+        if self._is_pattern(file_name):
+            self._search_files(file_name, product_name, product_categ, product_prize, product_quantity,
+                               is_recap, output_format, query, limit, workers)
+            return
+
         file_path = self.get_file_path(file_name, is_recap)
+        manifest = None if os.path.exists(file_path) else self._load_partitions(file_path)
 
-        if not os.path.exists(file_path):
+        if not os.path.exists(file_path) and manifest is None:
             print(f"Le fichier '{file_path}' n'existe pas.")
             return
 
-        with open(file_path, mode='r', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            headers = next(reader)
+        if manifest is not None:
+            headers = manifest['header']
+        else:
+            headers = self._storage(file_path).read_header(file_path) or self.HEADERS
 
-            found = False
-            for row in reader:
-                if ((product_name and row[0] == product_name) or
-                    (product_categ and row[3] == product_categ) or
-                    (product_prize and row[2] == product_prize) or
-                    (product_quantity and row[1] == product_quantity)):
-
-                    if not found:
-                        print(f"Produits trouvés dans {'recapitulatif' if is_recap else 'fichier individuel'} '{file_name}':")
-                        found = True
-                    for header, value in zip(headers, row):
-                        print(f"{header}: {value}")
-                    print("-" * 30)
+        if query:
+            try:
+                products = self.query_products(file_name, query, is_recap)
+            except ValueError as erreur:
+                print(f"Requête invalide : {erreur}.")
+                return
+        else:
+            products = self.iter_products(file_name, product_name=product_name, product_categ=product_categ,
+                                          product_prize=product_prize, product_quantity=product_quantity,
+                                          is_recap=is_recap, use_index=use_index)
+        if limit:
+            products = itertools.islice(products, limit)
+
+        if output_format == 'text':
+            title = f"Produits trouvés dans {'recapitulatif' if is_recap else 'fichier individuel'} '{file_name}':"
+            found = self._print_text(products, headers, title)
+        else:
+            found = getattr(self, f"_print_{output_format}")(products, headers)
+
+        if not found:
+            message = f"Aucun produit trouvé correspondant aux critères dans le fichier '{file_name}'."
+            # Les formats destinés à d'autres outils gardent la sortie standard vide
+            print(message, file=sys.stdout if output_format == 'text' else sys.stderr)
+
+    def _search_files(self, pattern, product_name, product_categ, product_prize, product_quantity, is_recap, output_format, query, limit, workers):
+        """
+        Affiche les résultats d'une recherche sur plusieurs fichiers, chacun
+        précédé du fichier dont il provient.
+        """
+        if not self._expand_pattern(pattern, is_recap):
+            print(f"Aucun fichier ne correspond à '{pattern}'.")
+            return
+
+        try:
+            requete = Requete(query) if query else None
+        except ValueError as erreur:
+            print(f"Requête invalide : {erreur}.")
+            return
+
+        resultats = self.iter_products_multi(pattern, product_name=product_name, product_categ=product_categ,
+                                             product_prize=product_prize, product_quantity=product_quantity,
+                                             is_recap=is_recap, query=requete, workers=workers, limit=limit)
+        headers = ['fichier'] + self.HEADERS
+        if output_format == 'jsonl':
+            products = ((file_path,) + tuple(product) for file_path, product in resultats)
+        else:
+            products = ([file_path] + self._display_values(product) for file_path, product in resultats)
+        if output_format == 'text':
+            found = self._print_text(products, headers, f"Produits trouvés dans les fichiers '{pattern}':")
+        else:
+            found = getattr(self, f"_print_{output_format}")(products, headers)
 
+        if not found:
+            message = f"Aucun produit trouvé correspondant aux critères dans les fichiers '{pattern}'."
+            print(message, file=sys.stdout if output_format == 'text' else sys.stderr)
+
+    @classmethod
+    def _display_values(cls, product):
+        """
+        Valeurs d'un produit telles qu'affichées : celles écrites dans le fichier
+        pour un ProduitLu, sinon les nombres sans partie décimale inutile
+        (30000.0 est affiché 30000).
+        """
+        textes = getattr(product, 'textes', None)
+        if textes is not None:
+            return list(textes)
+        return [cls._format_number(value) if isinstance(value, float) else str(value) for value in product]
+
+    def _print_text(self, products, headers, title):
+        found = False
+        for product in products:
             if not found:
-                print(f"Aucun produit trouvé correspondant aux critères dans le fichier '{file_name}'.")
+                print(title)
+                found = True
+            for header, value in zip(headers, self._display_values(product)):
+                print(f"{header}: {value}")
+            print("-" * 30)
+        return found
+
+    def _print_csv(self, products, headers):
+        writer = csv.writer(sys.stdout, lineterminator='\n')
+        found = False
+        for product in products:
+            if not found:
+                writer.writerow(headers)
+                found = True
+            writer.writerow(self._display_values(product))
+        return found
+
+    @staticmethod
+    def _print_jsonl(products, headers):
+        found = False
+        for product in products:
+            print(json.dumps(dict(zip(headers, product)), ensure_ascii=False))
+            found = True
+        return found
+
+    def _print_table(self, products, headers):
+        """
+        Affiche les produits sous forme de tableau. La largeur des colonnes est
+        calculée sur les TABLE_SAMPLE_SIZE premières lignes seulement, pour ne
+        pas avoir à garder tout le résultat en mémoire.
+        """
+        lignes = map(self._display_values, products)
+        premiers = list(itertools.islice(lignes, self.TABLE_SAMPLE_SIZE))
+        if not premiers:
+            return False
+
+        largeurs = [max([len(header)] + [len(ligne[i]) for ligne in premiers])
+                    for i, header in enumerate(headers[:len(premiers[0])])]
+        def formater(valeurs):
+            return " | ".join(str(v).ljust(largeur) for v, largeur in zip(valeurs, largeurs)).rstrip()
+
+        print(formater(headers))
+        print("-+-".join("-" * largeur for largeur in largeurs))
+        for ligne in itertools.chain(premiers, lignes):
+            print(formater(ligne))
+        return True
+
+    def _read_rows_at(self, file_path, offsets):
+        """
+        Lit les lignes situées aux offsets donnés, en ignorant celles qui sont
+        marquées comme supprimées.
+        """
+        tombstones = self._load_tombstones(file_path)
+        with open(file_path, mode='rb') as file:
+            for offset in offsets:
+                row = self._read_row_at(file, offset)
+                if offset >= tombstones.get(row[0], -1):
+                    yield row
 
 
 class InterfaceInteractif(cmd.Cmd):
@@ -171,10 +4148,33 @@ class InterfaceInteractif(cmd.Cmd):
         "Tapez 'help' pour voir les commandes disponibles.\n"
     )
     prompt = "(csv) "
+    CACHE_BUDGET_MB = 256
 
-    def __init__(self, gestion_csv):
+    def __init__(self, gestion_csv, cache_budget_mb=None):
         super().__init__()
         self.gestion_csv = gestion_csv
+        # Les fichiers lus restent en mémoire d'une commande à l'autre
+        if gestion_csv.cache is None:
+            budget = self.CACHE_BUDGET_MB if cache_budget_mb is None else cache_budget_mb
+            gestion_csv.cache = CacheFichiers(int(budget * 1024 * 1024))
+
+    @staticmethod
+    def _extract_options(args, names):
+        """
+        Sépare les options de la forme '--nom valeur' (pour les noms donnés)
+        des arguments positionnels. Renvoie (arguments positionnels, options).
+        """
+        positionnels = []
+        options = {}
+        i = 0
+        while i < len(args):
+            if args[i] in names and i + 1 < len(args):
+                options[args[i].lstrip('-')] = args[i + 1]
+                i += 2
+            else:
+                positionnels.append(args[i])
+                i += 1
+        return positionnels, options
 
     def do_create(self, arg):
         """
@@ -202,71 +4202,344 @@ class InterfaceInteractif(cmd.Cmd):
         product_info = [nom, quantite, prix, categorie]
         self.gestion_csv.add_product(file_name, product_info, is_recap=False)
 
-    def do_delete(self, arg):
+    def do_import(self, arg):
+        """
+        Importer en masse des produits depuis un fichier CSV ou JSON-lines.
+        Usage: import nom_fichier.csv source.csv|source.jsonl [--format csv|jsonl] [--flush_size N]
+        """
+        args, options = self._extract_options(arg.strip().split(), ("--format", "--flush_size"))
+        if len(args) != 2:
+            print("Usage: import nom_fichier.csv source.csv|source.jsonl [--format csv|jsonl] [--flush_size N]")
+            return
+
+        try:
+            flush_size = int(options["flush_size"]) if "flush_size" in options else None
+        except ValueError:
+            print("La taille de paquet doit être un nombre entier.")
+            return
+
+        file_name, source = args
+        self.gestion_csv.import_products(file_name, source, is_recap=False,
+                                         source_format=options.get("format"), flush_size=flush_size)
+
+    def do_export(self, arg):
         """
-        Supprimer un produit (toutes les occurrences) du fichier CSV.
-        Usage: delete nom_fichier.csv nom_produit
+        Convertir un fichier vers un autre moteur de stockage, d'après l'extension de la destination.
+        Usage: export nom_fichier.csv nom_fichier.col
         """
         args = arg.strip().split()
         if len(args) != 2:
-            print("Usage: delete nom_fichier.csv nom_produit")
+            print("Usage: export nom_fichier.csv nom_fichier.col")
+            return
+        self.gestion_csv.export_products(args[0], args[1], is_recap=False)
+
+    def do_delete(self, arg):
+        """
+        Supprimer un ou plusieurs produits (toutes les occurrences) du fichier CSV,
+        en une seule réécriture. Les noms peuvent être lus dans un fichier texte
+        (un nom par ligne) avec --from.
+        Avec --lazy, la suppression est seulement consignée (voir compact).
+        Usage: delete nom_fichier.csv nom_produit [nom_produit ...] [--lazy]
+               delete nom_fichier.csv --from noms.txt [--lazy]
+        """
+        commande = self._parse_delete(arg)
+        if commande is not None:
+            file_name, product_names, lazy = commande
+            self.gestion_csv.delete_products(file_name, product_names, is_recap=False, lazy=lazy)
+
+    def _parse_delete(self, arg):
+        """
+        Analyse les arguments de delete : renvoie (nom du fichier, noms des
+        produits, lazy), ou None après avoir affiché l'erreur.
+        """
+        args = arg.strip().split()
+        lazy = "--lazy" in args
+        args = [a for a in args if a != "--lazy"]
+
+        if len(args) == 3 and args[1] == "--from":
+            try:
+                product_names = self.gestion_csv.read_names_file(args[2])
+            except OSError:
+                print(f"Impossible de lire le fichier de noms '{args[2]}'.")
+                return None
+        elif len(args) >= 2 and "--from" not in args:
+            product_names = args[1:]
+        else:
+            print("Usage: delete nom_fichier.csv nom_produit [nom_produit ...] [--lazy]")
+            print("       delete nom_fichier.csv --from noms.txt [--lazy]")
+            return None
+        return args[0], product_names, lazy
+
+    def do_compact(self, arg):
+        """
+        Réécrire le fichier CSV sans les produits marqués comme supprimés,
+        si leur proportion dépasse le seuil (optionnel, entre 0 et 1).
+        Usage: compact nom_fichier.csv [seuil]
+        """
+        args = arg.strip().split()
+        if len(args) not in (1, 2):
+            print("Usage: compact nom_fichier.csv [seuil]")
             return
 
-        file_name, product_name = args
-        self.gestion_csv.delete_product(file_name, product_name, is_recap=False)
+        threshold = None
+        if len(args) == 2:
+            try:
+                threshold = float(args[1])
+            except ValueError:
+                print("Le seuil doit être un nombre entre 0 et 1.")
+                return
+        self.gestion_csv.compact(args[0], is_recap=False, threshold=threshold)
 
     def do_merge(self, arg):
         """
         Fusionner plusieurs fichiers CSV individuels en un fichier récapitulatif.
-        Usage: merge nom_recap.csv fichier1.csv fichier2.csv ...
+        Avec --workers N, les fichiers sont préparés en parallèle par N processus.
+        Avec --aggregate name|name_categ, une seule ligne par produit est conservée,
+        avec la somme des quantités et le prix choisi par --price_policy last|min|max|mean.
+        Sinon, seuls les fichiers modifiés depuis la dernière fusion sont relus,
+        sauf avec --full.
+        Avec --partition_by name|categ [--partitions N], --max_rows N ou
+        --max_bytes N, le récapitulatif est réparti en plusieurs fichiers.
+        Usage: merge nom_recap.csv fichier1.csv fichier2.csv ... [--workers N]
+               [--aggregate name|name_categ] [--price_policy last|min|max|mean] [--full]
+               [--partition_by name|categ] [--partitions N] [--max_rows N] [--max_bytes N]
         """
         args = arg.strip().split()
+        full = "--full" in args
+        args = [a for a in args if a != "--full"]
+        args, options = self._extract_options(args, ("--workers", "--aggregate", "--price_policy", "--partition_by",
+                                                     "--partitions", "--max_rows", "--max_bytes"))
+        nombres = {}
+        for option in ("workers", "partitions", "max_rows", "max_bytes"):
+            if option in options:
+                try:
+                    nombres[option] = int(options[option])
+                except ValueError:
+                    print(f"La valeur de --{option} doit être un nombre entier.")
+                    return
         if len(args) < 2:
-            print("Usage: merge nom_recap.csv fichier1.csv fichier2.csv ...")
+            print("Usage: merge nom_recap.csv fichier1.csv fichier2.csv ... [--workers N] "
+                  "[--aggregate name|name_categ] [--price_policy last|min|max|mean] [--full] "
+                  "[--partition_by name|categ] [--partitions N] [--max_rows N] [--max_bytes N]")
             return
 
         output_file = args[0]
         input_files = args[1:]
-        self.gestion_csv.merge_csv(input_files, output_file)
+        self.gestion_csv.merge_csv(input_files, output_file, workers=nombres.get("workers"),
+                                   aggregate=options.get("aggregate"),
+                                   price_policy=options.get("price_policy", "last"), full=full,
+                                   partition_by=options.get("partition_by"), partition_count=nombres.get("partitions"),
+                                   max_rows=nombres.get("max_rows"), max_bytes=nombres.get("max_bytes"))
 
     def do_search(self, arg):
         """
-        Rechercher un produit selon différents critères.
-        Usage: search nom_fichier.csv [--product_name "X"] [--product_categ "X"] [--product_prize "X"] [--product_quantity "X"]
+        Rechercher un produit selon différents critères, ou selon une requête
+        placée après --query (en dernier, jusqu'à la fin de la ligne).
+        Le format d'affichage peut être choisi avec --format text|csv|jsonl|table.
+        nom_fichier.csv peut être un motif (*.csv) ou un répertoire : les fichiers
+        sont alors parcourus en parallèle. --limit N arrête la recherche après N résultats.
+        Usage: search nom_fichier.csv [--product_name "X"] [--product_categ "X"] [--product_prize "X"] [--product_quantity "X"] [--format F] [--limit N] [--workers N]
+               search nom_fichier.csv [--format F] [--limit N] --query REQUÊTE
         Exemple: search voiture.csv --product_name "Tesla"
+                 search voiture.csv --query categorie = Sport AND prix < 40000
         """
-        args = arg.strip().split()
+        arg, _, query = arg.partition("--query")
+        args, options = self._extract_options(arg.strip().split(), (
+            "--product_name", "--product_categ", "--product_prize", "--product_quantity", "--format",
+            "--limit", "--workers"))
         if len(args) < 1:
             print("Usage: search nom_fichier.csv [options]")
             return
 
-        file_name = args[0]
-        # Extraction des options
-        product_name = None
-        product_categ = None
-        product_prize = None
-        product_quantity = None
-
-        # Parse simple des arguments restants
-        for i in range(1, len(args)):
-            if args[i] == "--product_name" and i+1 < len(args):
-                product_name = args[i+1]
-            elif args[i] == "--product_categ" and i+1 < len(args):
-                product_categ = args[i+1]
-            elif args[i] == "--product_prize" and i+1 < len(args):
-                product_prize = args[i+1]
-            elif args[i] == "--product_quantity" and i+1 < len(args):
-                product_quantity = args[i+1]
+        try:
+            limit = int(options["limit"]) if "limit" in options else None
+            workers = int(options["workers"]) if "workers" in options else None
+        except ValueError:
+            print("--limit et --workers doivent être des nombres entiers.")
+            return
 
         self.gestion_csv.search_product(
-            file_name,
-            product_name=product_name,
-            product_categ=product_categ,
-            product_prize=product_prize,
-            product_quantity=product_quantity,
-            is_recap=False
+            args[0],
+            product_name=options.get("product_name"),
+            product_categ=options.get("product_categ"),
+            product_prize=options.get("product_prize"),
+            product_quantity=options.get("product_quantity"),
+            is_recap=False,
+            output_format=options.get("format", "text"),
+            query=query.strip() or None,
+            limit=limit,
+            workers=workers
         )
 
+    def do_index(self, arg):
+        """
+        Construire l'index annexe d'un fichier CSV pour accélérer les recherches.
+        Usage: index nom_fichier.csv
+        """
+        args = arg.strip().split()
+        if len(args) != 1:
+            print("Usage: index nom_fichier.csv")
+            return
+        self.gestion_csv.build_index(args[0], is_recap=False)
+
+    def do_cache(self, arg):
+        """
+        Consulter ou régler le cache des fichiers lus pendant la session.
+        Usage: cache stats | cache clear | cache budget TAILLE_MO
+        """
+        args = arg.strip().split()
+        cache = self.gestion_csv.cache
+        if args == ['stats']:
+            stats = cache.stats()
+            print(f"Entrées : {stats['entrees']}")
+            print(f"Mémoire : {stats['memoire'] / (1024 * 1024):.1f} Mo / {stats['budget'] / (1024 * 1024):.1f} Mo")
+            print(f"Succès : {stats['hits']}, échecs : {stats['misses']} (taux {stats['ratio']:.0%})")
+            print(f"Évictions : {stats['evictions']}")
+        elif args == ['clear']:
+            cache.clear()
+            print("Cache vidé.")
+        elif len(args) == 2 and args[0] == 'budget':
+            try:
+                budget = float(args[1])
+            except ValueError:
+                print("Le budget doit être un nombre de mégaoctets.")
+                return
+            cache.resize(int(budget * 1024 * 1024))
+            print(f"Budget du cache fixé à {budget:g} Mo.")
+        else:
+            print("Usage: cache stats | cache clear | cache budget TAILLE_MO")
+
+    def do_stats(self, arg):
+        """
+        Afficher les statistiques d'un fichier par catégorie (nombre de produits,
+        quantité totale, valeur du stock, prix minimal et maximal), ou activer
+        et désactiver la mesure des commandes (durée, lignes et octets lus et
+        écrits, débit, pic de mémoire), affichée après chaque commande.
+        Usage: stats nom_fichier.csv [--is_recap] [--format text|csv|jsonl|table]
+               stats on | stats off
+        """
+        args = arg.strip().split()
+        if args == ['on']:
+            self.gestion_csv.stats = True
+            print("Mesure des commandes activée.")
+        elif args == ['off']:
+            self.gestion_csv.stats = False
+            print("Mesure des commandes désactivée.")
+        elif args:
+            is_recap = "--is_recap" in args
+            args, options = self._extract_options([a for a in args if a != "--is_recap"], ("--format",))
+            if len(args) != 1:
+                print("Usage: stats nom_fichier.csv [--is_recap] [--format text|csv|jsonl|table]")
+                return
+            self.gestion_csv.show_stats(args[0], is_recap, output_format=options.get("format", "table"))
+        else:
+            print("Usage: stats nom_fichier.csv [--is_recap] [--format F] | stats on | stats off "
+                  f"(mesure actuellement {'on' if self.gestion_csv.stats else 'off'})")
+
+    def do_batch(self, arg):
+        """
+        Exécuter un script de commandes (une commande du shell par ligne).
+        Usage: batch script.txt
+        """
+        args = arg.strip().split()
+        if len(args) != 1:
+            print("Usage: batch script.txt")
+            return
+        try:
+            with open(args[0], mode='r', encoding='utf-8') as file:
+                self.run_batch(file)
+        except OSError:
+            print(f"Impossible de lire le script '{args[0]}'.")
+
+    def run_batch(self, lignes):
+        """
+        Exécute un script de commandes du shell (une par ligne ; lignes vides et
+        commentaires '#' ignorés) dans ce processus, avec le même interpréteur
+        que le shell. Les 'add' consécutifs sur un même fichier sont regroupés
+        en un seul ajout (add_products), les 'delete' consécutifs sur un même
+        fichier en une seule réécriture (delete_products). Le script s'arrête à
+        la commande 'exit'. Affiche la durée de chaque commande et la durée
+        totale. Renvoie le nombre d'opérations exécutées.
+        """
+        # commande -> [lignes du script, opérations exécutées, durée]
+        durees = collections.defaultdict(lambda: [0, 0, 0.0])
+        groupe = None  # (commande, clé de regroupement, numéros des lignes du script, valeurs)
+        debut_total = time.perf_counter()
+
+        def executer(commande, nb_lignes, action):
+            debut = time.perf_counter()
+            arret = action()
+            duree = durees[commande]
+            duree[0] += nb_lignes
+            duree[1] += 1
+            duree[2] += time.perf_counter() - debut
+            return arret
+
+        for numero, ligne in enumerate(lignes, start=1):
+            ligne = ligne.strip()
+            if not ligne or ligne.startswith('#'):
+                continue
+
+            commande, arg, _ = self.parseline(ligne)
+            element = self._batch_item(commande, arg)
+            if groupe is not None and (element is None or element[0] != groupe[1]):
+                executer(groupe[0], len(groupe[3]), functools.partial(self._run_batch_group, *groupe))
+                groupe = None
+            if element is not None:
+                if groupe is None:
+                    groupe = (commande, element[0], [], [])
+                groupe[2].append(numero)
+                groupe[3].append(element[1])
+                continue
+            if commande == 'delete':
+                durees[commande][0] += 1  # Erreur déjà affichée par _parse_delete
+                continue
+            if executer(commande or ligne.split()[0], 1, functools.partial(self.onecmd, ligne)):
+                break
+
+        if groupe is not None:
+            executer(groupe[0], len(groupe[3]), functools.partial(self._run_batch_group, *groupe))
+
+        total = time.perf_counter() - debut_total
+        operations = sum(duree[1] for duree in durees.values())
+        print(f"Script exécuté : {sum(duree[0] for duree in durees.values())} commande(s), "
+              f"{operations} opération(s) en {total:.3f} s.")
+        for commande, (nb_lignes, nb_operations, duree) in durees.items():
+            print(f"  {commande} : {nb_lignes} commande(s), {nb_operations} opération(s), {duree:.3f} s")
+        return operations
+
+    def _batch_item(self, commande, arg):
+        """
+        Pour une ligne de script regroupable avec les suivantes ('add' ou
+        'delete'), renvoie (clé de regroupement, valeur) ; None sinon.
+        """
+        if commande == 'add':
+            args = arg.split()
+            if len(args) == 5:
+                return ('add', args[0]), args[1:]
+        elif commande == 'delete':
+            parsed = self._parse_delete(arg)
+            if parsed is not None:
+                file_name, product_names, lazy = parsed
+                return ('delete', file_name, lazy), product_names
+        return None
+
+    def _run_batch_group(self, commande, cle, numeros, valeurs):
+        """
+        Exécute en une seule opération des lignes 'add' ou 'delete' consécutives
+        (numeros : leurs numéros de ligne dans le script).
+        """
+        file_name = cle[1]
+        if commande == 'add':
+            counts = self.gestion_csv.add_products(file_name, valeurs, is_recap=False, line_numbers=numeros)
+            if counts is not None:
+                print(f"{counts['ajoutes']} produit(s) ajouté(s) au fichier "
+                      f"'{self.gestion_csv.get_file_path(file_name, is_recap=False)}' "
+                      f"(lignes {numeros[0]} et suivantes du script).")
+        else:
+            product_names = [nom for noms in valeurs for nom in noms]
+            self.gestion_csv.delete_products(file_name, product_names, is_recap=False, lazy=cle[2])
+
     def do_exit(self, arg):
         """Quitter le shell interactif."""
         print("Au revoir !")
@@ -277,30 +4550,409 @@ class InterfaceInteractif(cmd.Cmd):
         return self.do_exit(arg)
 
 
+class SortieParThread(io.TextIOBase):
+    """
+    Remplace sys.stdout pendant que le démon tourne : ce qu'affiche un thread
+    en train de capturer sa sortie (voir capture) va dans son propre tampon,
+    le reste dans la sortie d'origine. contextlib.redirect_stdout changerait
+    la sortie de tous les threads à la fois.
+    """
+
+    def __init__(self, sortie):
+        self.sortie = sortie
+        self._tampons = threading.local()
+
+    def writable(self):
+        return True
+
+    def write(self, texte):
+        tampon = getattr(self._tampons, 'tampon', None)
+        return (self.sortie if tampon is None else tampon).write(texte)
+
+    def flush(self):
+        if getattr(self._tampons, 'tampon', None) is None:
+            self.sortie.flush()
+
+    @contextlib.contextmanager
+    def capture(self):
+        """
+        Renvoie un io.StringIO qui reçoit ce qu'affiche le thread courant dans le bloc.
+        """
+        self._tampons.tampon = tampon = io.StringIO()
+        try:
+            yield tampon
+        finally:
+            self._tampons.tampon = None
+
+
+class ServeurCSV:
+    """
+    Démon gardant une instance de GestionCSV (et son cache de fichiers) en mémoire,
+    à l'écoute sur une socket Unix. Chaque requête est un objet JSON sur une ligne,
+    par exemple {"id": 1, "action": "add", "file_name": "produits.csv",
+    "product_info": ["Pomme", "50", "0.5", "Fruits"]}, et reçoit une réponse JSON
+    sur une ligne : {"id": 1, "ok": true, "result": ..., "output": "..."}.
+    Un client peut envoyer plusieurs requêtes sans attendre les réponses, qui lui
+    sont renvoyées dans l'ordre. Les requêtes sont exécutées dans des threads
+    (loop.run_in_executor), celles d'un même client une à une : une longue
+    fusion ne bloque pas les autres clients, qui partagent le même cache
+    (CacheFichiers est protégé par un verrou, les fichiers par GestionCSV._lock).
+    Si les statistiques sont activées (GestionCSV.stats), la réponse contient
+    aussi les mesures de l'opération ('stats', voir StatistiquesOperation).
+    """
+    SOCKET_PATH = 'gestion_csv.sock'
+    # Taille maximale d'une ligne de requête (un lot de produits à ajouter par exemple)
+    MAX_REQUEST_SIZE = 64 * 1024 * 1024
+    ACTIONS = ('ping', 'create', 'add', 'delete', 'merge', 'search', 'index', 'compact', 'export', 'stats', 'shutdown')
+
+    def __init__(self, gestion_csv, socket_path=None):
+        self.gestion_csv = gestion_csv
+        if gestion_csv.cache is None:
+            gestion_csv.cache = CacheFichiers()
+        self.socket_path = socket_path or self.SOCKET_PATH
+        self._serveur = None
+        self._sortie = None
+
+    def run(self):
+        """
+        Lance le démon jusqu'à la requête 'shutdown' (ou Ctrl+C).
+        """
+        import asyncio
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    async def serve(self):
+        import asyncio
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._serveur = await asyncio.start_unix_server(self._handle_client, path=self.socket_path,
+                                                        limit=self.MAX_REQUEST_SIZE)
+        print(f"Serveur à l'écoute sur '{self.socket_path}'.")
+        self._sortie = sys.stdout = SortieParThread(sys.stdout)
+        try:
+            async with self._serveur:
+                try:
+                    await self._serveur.serve_forever()
+                except asyncio.CancelledError:
+                    pass
+        finally:
+            sys.stdout = self._sortie.sortie
+            self._sortie = None
+
+    async def _handle_client(self, reader, writer):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    ligne = await reader.readline()
+                except ValueError:
+                    # Ligne plus longue que MAX_REQUEST_SIZE : la connexion est fermée
+                    writer.write(self._encode({'ok': False, 'error': "Requête trop longue."}))
+                    break
+                if not ligne:
+                    break
+                if not ligne.strip():
+                    continue
+                reponse = await loop.run_in_executor(None, self.handle_request, ligne)
+                writer.write(self._encode(reponse))
+                await writer.drain()
+                if reponse.get('action') == 'shutdown':
+                    self._serveur.close()
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _encode(reponse):
+        return (json.dumps(reponse, ensure_ascii=False) + '\n').encode('utf-8')
+
+    def handle_request(self, ligne):
+        """
+        Exécute une requête (ligne JSON) et renvoie la réponse sous forme de dictionnaire.
+        Les messages affichés par GestionCSV sont renvoyés dans 'output'. Toute
+        erreur de l'action est renvoyée dans 'error' sans couper la connexion.
+        """
+        try:
+            requete = json.loads(ligne)
+            if not isinstance(requete, dict):
+                raise ValueError("la requête doit être un objet JSON")
+        except ValueError as e:
+            return {'ok': False, 'error': f"Requête invalide : {e}"}
+
+        reponse = {'id': requete.get('id')} if 'id' in requete else {}
+        action = requete.get('action')
+        if action not in self.ACTIONS:
+            reponse.update(ok=False, error=f"Action inconnue : {action!r} (actions : {', '.join(self.ACTIONS)}).")
+            return reponse
+
+        capture = self._sortie.capture() if self._sortie is not None else contextlib.redirect_stdout(io.StringIO())
+        self.gestion_csv.last_stats = None
+        try:
+            with capture as sortie:
+                resultat = getattr(self, f'_action_{action}')(requete)
+        except KeyError as e:
+            reponse.update(ok=False, error=f"Paramètre manquant : {e.args[0]}", output=sortie.getvalue())
+            return reponse
+        except (OSError, ValueError, TypeError) as e:
+            reponse.update(ok=False, error=str(e), output=sortie.getvalue())
+            return reponse
+        except Exception as e:
+            reponse.update(ok=False, error=f"Erreur inattendue ({type(e).__name__}) : {e}", output=sortie.getvalue())
+            return reponse
+        reponse.update(ok=True, action=action, result=resultat, output=sortie.getvalue())
+        if self.gestion_csv.last_stats is not None:
+            reponse['stats'] = self.gestion_csv.last_stats.as_dict()
+        return reponse
+
+    def _action_ping(self, requete):
+        return 'pong'
+
+    def _action_shutdown(self, requete):
+        return None
+
+    def _action_create(self, requete):
+        self.gestion_csv.create_csv(requete['file_name'])
+
+    def _action_add(self, requete):
+        """
+        Ajoute un produit ('product_info') ou un lot de produits ('products').
+        """
+        if 'products' in requete:
+            return self.gestion_csv.add_products(requete['file_name'], requete['products'],
+                                                 requete.get('is_recap', False))
+        self.gestion_csv.add_product(requete['file_name'], [str(v) for v in requete['product_info']],
+                                     requete.get('is_recap', False))
+
+    def _action_delete(self, requete):
+        product_names = requete.get('product_names') or [requete['product_name']]
+        return self.gestion_csv.delete_products(requete['file_name'], product_names,
+                                                requete.get('is_recap', False), lazy=requete.get('lazy', False))
+
+    def _action_merge(self, requete):
+        self.gestion_csv.merge_csv(requete['input_files'], requete['output_file'],
+                                   workers=requete.get('workers'), aggregate=requete.get('aggregate'),
+                                   price_policy=requete.get('price_policy', 'last'), full=requete.get('full', False),
+                                   partition_by=requete.get('partition_by'), partition_count=requete.get('partitions'),
+                                   max_rows=requete.get('max_rows'), max_bytes=requete.get('max_bytes'))
+
+    def _action_index(self, requete):
+        self.gestion_csv.build_index(requete['file_name'], requete.get('is_recap', False))
+
+    def _action_compact(self, requete):
+        self.gestion_csv.compact(requete['file_name'], requete.get('is_recap', False),
+                                 threshold=requete.get('threshold'))
+
+    def _action_stats(self, requete):
+        """
+        Renvoie les statistiques par catégorie du fichier (voir ResumeStock.as_dict).
+        """
+        resume = self.gestion_csv.load_stats(requete['file_name'], requete.get('is_recap', False))
+        return resume.as_dict() if resume is not None else None
+
+    def _action_export(self, requete):
+        return self.gestion_csv.export_products(requete['file_name'], requete['output_file'],
+                                                requete.get('is_recap', False))
+
+    def _action_search(self, requete):
+        """
+        Renvoie les produits trouvés sous forme de dictionnaires (avec le fichier
+        d'origine pour une recherche sur un motif), au plus 'limit'.
+        """
+        gestion_csv = self.gestion_csv
+        file_name = requete['file_name']
+        is_recap = requete.get('is_recap', False)
+        criteres = {cle: requete.get(cle) for cle in ('product_name', 'product_categ', 'product_prize', 'product_quantity')}
+        limit = requete.get('limit')
+
+        if gestion_csv._is_pattern(file_name):
+            trouves = (dict(product._asdict(), fichier=file_path) for file_path, product in
+                       gestion_csv.iter_products_multi(file_name, is_recap=is_recap, query=requete.get('query'),
+                                                       workers=requete.get('workers'), limit=limit, **criteres))
+        elif requete.get('query'):
+            trouves = (product._asdict() for product in gestion_csv.query_products(file_name, requete['query'], is_recap))
+        else:
+            trouves = (product._asdict() for product in gestion_csv.iter_products(file_name, is_recap=is_recap, **criteres))
+        return list(itertools.islice(trouves, limit))
+
+
+class ClientCSV:
+    """
+    Client léger du démon ServeurCSV.
+    """
+
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path or ServeurCSV.SOCKET_PATH
+
+    def request(self, action, **params):
+        """
+        Envoie une requête et renvoie la réponse (dictionnaire).
+        """
+        return next(self.pipeline([dict(params, action=action)]))
+
+    def pipeline(self, requetes):
+        """
+        Envoie une suite de requêtes (dictionnaires, ou lignes JSON déjà encodées)
+        sans attendre les réponses, et génère les réponses dans l'ordre au fur et
+        à mesure qu'elles arrivent.
+        """
+        import socket
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connexion:
+            connexion.connect(self.socket_path)
+            # Envoi dans un thread : le serveur ne lit plus si nos réponses ne sont pas lues
+            envoi = threading.Thread(target=self._send_all, args=(connexion, requetes), daemon=True)
+            envoi.start()
+            with connexion.makefile('r', encoding='utf-8') as reponses:
+                for ligne in reponses:
+                    yield json.loads(ligne)
+            envoi.join()
+
+    @staticmethod
+    def _send_all(connexion, requetes):
+        import socket
+        try:
+            with connexion.makefile('w', encoding='utf-8') as flux:
+                for requete in requetes:
+                    if not isinstance(requete, str):
+                        requete = json.dumps(requete, ensure_ascii=False)
+                    flux.write(requete.rstrip('\n') + '\n')
+            connexion.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+
 def main():
     parser = argparse.ArgumentParser(description="Gérer les fichiers CSV (création, ajout, suppression, fusion, recherche).")
-    parser.add_argument("action", nargs="?", choices=['create', 'add', 'delete', 'merge', 'search'], help="Action à réaliser")
-    parser.add_argument("file_name", nargs="?", help="Nom du fichier CSV")
+    parser.add_argument("action", nargs="?", choices=['create', 'add', 'delete', 'merge', 'search', 'index', 'compact', 'import', 'export', 'stats', 'serve', 'client'],
+                        help="Action à réaliser ('serve' lance le démon, 'client' lui envoie des requêtes JSON)")
+    parser.add_argument("file_name", nargs="?",
+                        help="Nom du fichier CSV (pour 'search', un motif comme \"*.csv\" ou un répertoire est accepté)")
     parser.add_argument("--product_info", nargs=4, metavar=('NOM', 'QUANTITÉ', 'PRIX', 'CATÉGORIE'),
                         help="Informations du produit à ajouter : nom, quantité, prix unitaire, catégorie.")
+    parser.add_argument("--source",
+                        help="Fichier CSV ou JSON-lines à importer, ou '-' pour l'entrée standard (pour 'import'), "
+                             "ou fichier de requêtes JSON-lines (pour 'client', entrée standard par défaut).")
+    parser.add_argument("--format", choices=['text', 'csv', 'jsonl', 'table'],
+                        help="Format de la source (pour 'import' : csv ou jsonl, déduit de l'extension par défaut) "
+                             "ou de l'affichage des résultats (pour 'search' : text par défaut, pour 'stats' : table par défaut).")
+    parser.add_argument("--flush_size", type=int,
+                        help="Nombre de lignes écrites d'un coup (pour 'import').")
     parser.add_argument("--product_name", help="Nom du produit à supprimer ou rechercher.")
+    parser.add_argument("--product_names", nargs='+',
+                        help="Noms de plusieurs produits à supprimer en une seule passe (pour 'delete').")
+    parser.add_argument("--names_file",
+                        help="Fichier texte contenant un nom de produit à supprimer par ligne (pour 'delete').")
     parser.add_argument("--product_categ", help="Catégorie du produit à rechercher.")
     parser.add_argument("--product_prize", help="Prix du produit à rechercher.")
     parser.add_argument("--product_quantity", help="Quantité du produit à rechercher.")
+    parser.add_argument("--query",
+                        help="Requête combinant des conditions, par ex. \"categorie = Sport AND prix < 40000\" (pour 'search').")
+    parser.add_argument("--limit", type=int,
+                        help="Nombre maximal de résultats affichés (pour 'search').")
     parser.add_argument("--input_files", nargs='+', help="Liste des fichiers CSV à fusionner (pour 'merge').")
-    parser.add_argument("--output_file", help="Nom du fichier récapitulatif (pour 'merge').")
+    parser.add_argument("--output_file",
+                        help="Nom du fichier récapitulatif (pour 'merge') ou du fichier converti (pour 'export').")
+    parser.add_argument("--workers", type=int,
+                        help="Nombre de processus utilisés pour préparer les fichiers d'entrée (pour 'merge') "
+                             "ou parcourant les fichiers (pour 'search' sur un motif).")
+    parser.add_argument("--aggregate", choices=GestionCSV.AGGREGATE_KEYS,
+                        help="Une seule ligne par produit (nom, ou nom et catégorie) dans le récapitulatif (pour 'merge').")
+    parser.add_argument("--price_policy", choices=GestionCSV.PRICE_POLICIES, default='last',
+                        help="Prix retenu pour un produit agrégé : dernier, minimum, maximum ou moyenne pondérée (pour 'merge').")
+    parser.add_argument("--full", action="store_true",
+                        help="Reconstruit entièrement le récapitulatif au lieu de réutiliser la fusion précédente (pour 'merge').")
+    parser.add_argument("--partition_by", choices=list(GestionCSV.PARTITION_KEYS),
+                        help="Répartit le récapitulatif en partitions selon le nom ou la catégorie (pour 'merge').")
+    parser.add_argument("--partitions", type=int,
+                        help=f"Nombre de partitions avec --partition_by (par défaut {GestionCSV.PARTITION_COUNT}).")
+    parser.add_argument("--max_rows", type=int,
+                        help="Nombre maximal de lignes par partition du récapitulatif (pour 'merge').")
+    parser.add_argument("--max_bytes", type=int,
+                        help="Taille maximale en octets (non compressés) d'une partition du récapitulatif (pour 'merge').")
     parser.add_argument("--is_recap", action="store_true",
                         help="Indique si l'opération concerne un fichier récapitulatif.")
+    parser.add_argument("--use_index", action="store_true",
+                        help="Construit au besoin l'index annexe du fichier pour la recherche (pour 'search').")
+    parser.add_argument("--lazy", action="store_true",
+                        help="Consigne la suppression sans réécrire le fichier (pour 'delete', voir 'compact').")
+    parser.add_argument("--threshold", type=float,
+                        help="Proportion de lignes supprimées déclenchant la réécriture (pour 'compact').")
+    parser.add_argument("--journal", action="store_true",
+                        help="Écrire les ajouts dans le journal d'ajouts du fichier, reporté dans le fichier "
+                             "avant la lecture suivante (plusieurs écrivains simultanés).")
     parser.add_argument("--interactive", action="store_true", help="Lancer le programme en mode interactif")
+    parser.add_argument("--batch", metavar="FICHIER",
+                        help="Exécuter un script de commandes du shell interactif, une par ligne ('-' pour l'entrée standard).")
+    parser.add_argument("--cache_budget", type=float,
+                        help="Mémoire maximale en Mo du cache des fichiers lus (pour '--interactive' et 'serve', 256 par défaut).")
+    parser.add_argument("--stats", action="store_true",
+                        help="Affiche sur la sortie d'erreur la durée, les lignes et octets lus et écrits, "
+                             "le débit et le pic de mémoire de chaque opération.")
+    parser.add_argument("--profile", metavar="FICHIER",
+                        help="Profile l'action avec cProfile : statistiques enregistrées dans FICHIER "
+                             "(lisibles avec pstats) et fonctions les plus coûteuses affichées sur la sortie d'erreur.")
+    parser.add_argument("--socket",
+                        help=f"Chemin de la socket Unix du démon (pour 'serve' et 'client', '{ServeurCSV.SOCKET_PATH}' par défaut).")
 
     args = parser.parse_args()
-    gestionnaire = GestionCSV()
+
+    # Le client n'a besoin ni des répertoires ni d'un GestionCSV
+    if args.action == 'client':
+        try:
+            source = sys.stdin if args.source in (None, '-') else open(args.source, mode='r', encoding='utf-8')
+        except OSError:
+            print(f"Impossible de lire le fichier de requêtes '{args.source}'.")
+            return
+        client = ClientCSV(args.socket)
+        with source:
+            requetes = (ligne for ligne in source if ligne.strip())
+            try:
+                for reponse in client.pipeline(requetes):
+                    print(json.dumps(reponse, ensure_ascii=False))
+            except OSError:
+                print(f"Impossible de joindre le démon sur '{client.socket_path}'.")
+        return
+
+    # Seuls la création, la fusion, le démon et le shell (ou un script) peuvent créer un fichier dans un répertoire absent
+    gestionnaire = GestionCSV(journal=args.journal, stats=args.stats,
+                              create_directories=args.interactive or args.batch or args.action in ('create', 'merge', 'serve'))
+
+    if args.batch:
+        interface = InterfaceInteractif(gestionnaire, args.cache_budget)
+        if args.batch == '-':
+            interface.run_batch(sys.stdin)
+        else:
+            try:
+                with open(args.batch, mode='r', encoding='utf-8') as script:
+                    interface.run_batch(script)
+            except OSError:
+                print(f"Impossible de lire le script '{args.batch}'.")
+        return
 
     # Si mode interactif, on lance le shell
     if args.interactive:
-        InterfaceInteractif(gestionnaire).cmdloop()
+        InterfaceInteractif(gestionnaire, args.cache_budget).cmdloop()
+        return
+
+    if args.action == 'serve':
+        if args.cache_budget is not None:
+            gestionnaire.cache = CacheFichiers(int(args.cache_budget * 1024 * 1024))
+        ServeurCSV(gestionnaire, args.socket).run()
         return
 
+    profil = None
+    if args.profile:
+        import cProfile
+        profil = cProfile.Profile()
+        profil.enable()
+
     # Mode non-interactif (ligne de commande classique)
     if args.action == 'create':
         if args.file_name:
@@ -314,34 +4966,92 @@ def main():
         else:
             print("Veuillez fournir le nom du fichier et les informations du produit '--product_info'.")
 
+    elif args.action == 'import':
+        if args.file_name and args.source:
+            gestionnaire.import_products(args.file_name, args.source, args.is_recap,
+                                         source_format=args.format, flush_size=args.flush_size)
+        else:
+            print("Veuillez fournir le nom du fichier et la source à importer '--source'.")
+
+    elif args.action == 'export':
+        if args.file_name and args.output_file:
+            gestionnaire.export_products(args.file_name, args.output_file, args.is_recap)
+        else:
+            print("Veuillez fournir le nom du fichier et le fichier de destination '--output_file' (par exemple produits.col).")
+
     elif args.action == 'delete':
-        if args.file_name and args.product_name:
-            gestionnaire.delete_product(args.file_name, args.product_name, args.is_recap)
+        product_names = []
+        if args.product_name:
+            product_names.append(args.product_name)
+        if args.product_names:
+            product_names.extend(args.product_names)
+        try:
+            if args.names_file:
+                product_names.extend(gestionnaire.read_names_file(args.names_file))
+        except OSError:
+            print(f"Impossible de lire le fichier de noms '{args.names_file}'.")
         else:
-            print("Veuillez fournir le nom du fichier et le nom du produit à supprimer '--product_name'.")
+            if args.file_name and product_names:
+                gestionnaire.delete_products(args.file_name, product_names, args.is_recap, lazy=args.lazy)
+            else:
+                print("Veuillez fournir le nom du fichier et le nom du produit à supprimer '--product_name' "
+                      "(ou plusieurs avec '--product_names' / '--names_file').")
 
     elif args.action == 'merge':
         if args.input_files and args.output_file:
-            gestionnaire.merge_csv(args.input_files, args.output_file)
+            gestionnaire.merge_csv(args.input_files, args.output_file, workers=args.workers,
+                                   aggregate=args.aggregate, price_policy=args.price_policy, full=args.full,
+                                   partition_by=args.partition_by, partition_count=args.partitions,
+                                   max_rows=args.max_rows, max_bytes=args.max_bytes)
         else:
             print("Veuillez fournir les fichiers d'entrée avec '--input_files' et le fichier de sortie avec '--output_file'.")
 
     elif args.action == 'search':
-        if args.file_name and (args.product_name or args.product_categ or args.product_prize or args.product_quantity):
+        if args.file_name and (args.product_name or args.product_categ or args.product_prize or args.product_quantity or args.query):
             gestionnaire.search_product(
                 args.file_name,
                 product_name=args.product_name,
                 product_categ=args.product_categ,
                 product_prize=args.product_prize,
                 product_quantity=args.product_quantity,
-                is_recap=args.is_recap
+                is_recap=args.is_recap,
+                use_index=True if args.use_index else None,
+                output_format=args.format or 'text',
+                query=args.query,
+                limit=args.limit,
+                workers=args.workers
             )
         else:
-            print("Veuillez fournir le nom du fichier et au moins un critère de recherche (--product_name, --product_categ, --product_prize, --product_quantity).")
+            print("Veuillez fournir le nom du fichier et au moins un critère de recherche (--product_name, --product_categ, --product_prize, --product_quantity, --query).")
+
+    elif args.action == 'index':
+        if args.file_name:
+            gestionnaire.build_index(args.file_name, args.is_recap)
+        else:
+            print("Veuillez fournir le nom du fichier à indexer.")
+
+    elif args.action == 'compact':
+        if args.file_name:
+            gestionnaire.compact(args.file_name, args.is_recap, threshold=args.threshold)
+        else:
+            print("Veuillez fournir le nom du fichier à compacter.")
+
+    elif args.action == 'stats':
+        if args.file_name:
+            gestionnaire.show_stats(args.file_name, args.is_recap, output_format=args.format or 'table')
+        else:
+            print("Veuillez fournir le nom du fichier dont afficher les statistiques.")
 
     else:
         print("Aucune action spécifiée. Utilisez '--interactive' pour lancer le mode interactif ou précisez une action.") 
 
+    if profil is not None:
+        import pstats
+        profil.disable()
+        profil.dump_stats(args.profile)
+        pstats.Stats(profil, stream=sys.stderr).sort_stats('cumulative').print_stats(GestionCSV.PROFILE_TOP)
+        print(f"Profil enregistré dans '{args.profile}'.", file=sys.stderr)
+
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,12 @@
 import unittest
 import os
+import sys
+import io
 import csv
-from script import GestionCSV  # Import de ta classe
+import json
+import contextlib
+import threading
+from script import GestionCSV, Requete, CacheFichiers, ServeurCSV, ClientCSV, InterfaceInteractif, StatistiquesOperation, StockageColonnes  # Import de ta classe
 
 
 class TestGestionCSV(unittest.TestCase):
@@ -549,3 +554,1679 @@ class TestGestionCSV(unittest.TestCase):
         output = captured_output.getvalue()
         self.assertIn("Aucun produit trouvé", output)
 
+
+    def test_search_product_with_index(self):
+        """
+        Teste la recherche d'un produit en s'appuyant sur l'index annexe.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Carotte", "5", "0.8", "Légumes"], is_recap=False)
+        self.gestion_csv.build_index(file_name, is_recap=False)
+
+        # Vérifie que l'index annexe est créé
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+        self.assertTrue(os.path.exists(file_path + self.gestion_csv.INDEX_SUFFIX))
+
+        captured_output = io.StringIO()
+        sys.stdout = captured_output
+
+        self.gestion_csv.search_product(file_name, product_categ="Légumes", is_recap=False)
+
+        sys.stdout = sys.__stdout__  # Restaure la sortie standard
+        output = captured_output.getvalue()
+        self.assertIn("Carotte", output)
+        self.assertNotIn("Banane", output)
+
+    def test_search_product_index_rebuilt_after_change(self):
+        """
+        Teste que l'index est reconstruit lorsque le fichier a été modifié.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.build_index(file_name, is_recap=False)
+
+        # Modification du fichier après la construction de l'index
+        self.gestion_csv.add_product(file_name, ["Kiwi", "3", "0.4", "Fruits"], is_recap=False)
+
+        captured_output = io.StringIO()
+        sys.stdout = captured_output
+
+        self.gestion_csv.search_product(file_name, product_name="Kiwi", is_recap=False)
+
+        sys.stdout = sys.__stdout__  # Restaure la sortie standard
+        self.assertIn("Kiwi", captured_output.getvalue())
+        self.assertNotIn("Aucun produit trouvé", captured_output.getvalue())
+
+
+    def test_search_product_index_legacy_format(self):
+        """
+        Teste qu'un index d'un format antérieur (JSON) est reconstruit, puis lu clé par clé.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_products(file_name, [["Banane", "10", "1.5", "Fruits"], ["Kiwi", "3", "0.4", "Fruits"],
+                                                  ["Audi TT", "5", "30000", "Sport"]], is_recap=False)
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+        with open(file_path + self.gestion_csv.INDEX_SUFFIX, mode='w', encoding='utf-8') as file:
+            file.write('{"version": 2, "colonnes": []}')
+
+        produits = list(self.gestion_csv.iter_products(file_name, product_name="Kiwi", use_index=True))
+        self.assertEqual([produit.nom for produit in produits], ["Kiwi"])
+
+        # L'index reconstruit ne fait lire que les lignes de la catégorie cherchée
+        gestion_csv = GestionCSV(stats=True)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            gestion_csv.search_product(file_name, product_categ="Fruits", is_recap=False)
+        self.assertEqual(gestion_csv.last_stats.lignes_lues, 2)
+
+    def test_delete_product_lazy(self):
+        """
+        Teste la suppression différée : le produit est masqué sans réécrire le fichier.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Pomme", "5", "2.0", "Fruits"], is_recap=False)
+
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+        size_before = os.path.getsize(file_path)
+        self.gestion_csv.delete_product(file_name, "Banane", is_recap=False, lazy=True)
+
+        # Le fichier n'est pas réécrit, la suppression est consignée à côté
+        self.assertEqual(os.path.getsize(file_path), size_before)
+        self.assertTrue(os.path.exists(file_path + self.gestion_csv.TOMBSTONE_SUFFIX))
+
+        # Un produit de même nom ajouté ensuite reste visible
+        self.gestion_csv.add_product(file_name, ["Banane", "7", "1.2", "Fruits"], is_recap=False)
+
+        captured_output = io.StringIO()
+        sys.stdout = captured_output
+
+        self.gestion_csv.search_product(file_name, product_categ="Fruits", is_recap=False)
+
+        sys.stdout = sys.__stdout__  # Restaure la sortie standard
+        output = captured_output.getvalue()
+        self.assertNotIn("quantité: 10", output)
+        self.assertIn("quantité: 7", output)
+        self.assertIn("Pomme", output)
+
+    def test_delete_products_lazy_with_index(self):
+        """
+        Teste qu'avec un index à jour, un nom absent n'est pas consigné et les lignes sont comptées.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Pomme", "5", "2.0", "Fruits"], is_recap=False)
+        self.gestion_csv.build_index(file_name, is_recap=False)
+
+        self.assertEqual(self.gestion_csv.delete_products(file_name, ["Kiwi", "Banane"], is_recap=False, lazy=True),
+                         {"Kiwi": 0, "Banane": 1})
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+        with open(file_path + self.gestion_csv.TOMBSTONE_SUFFIX, mode='r', encoding='utf-8') as file:
+            self.assertNotIn("Kiwi", file.read())
+
+    def test_compact(self):
+        """
+        Teste le compactage d'un fichier après des suppressions différées.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Pomme", "5", "2.0", "Fruits"], is_recap=False)
+        self.gestion_csv.delete_product(file_name, "Banane", is_recap=False, lazy=True)
+
+        # 50 % de lignes supprimées : sous un seuil de 60 %, rien n'est réécrit
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+        stat = os.stat(file_path)
+        self.gestion_csv.compact(file_name, is_recap=False, threshold=0.6)
+        self.assertTrue(os.path.exists(file_path + self.gestion_csv.TOMBSTONE_SUFFIX))
+        self.assertEqual((os.stat(file_path).st_ino, os.stat(file_path).st_mtime_ns), (stat.st_ino, stat.st_mtime_ns))
+        self.assertEqual(len(os.listdir(self.gestion_csv.LISTE_CSV_DIR)), 3)  # Fichier, verrou, suppressions
+
+        self.gestion_csv.compact(file_name, is_recap=False, threshold=0.5)
+        self.assertFalse(os.path.exists(file_path + self.gestion_csv.TOMBSTONE_SUFFIX))
+
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            next(reader)  # Passe les en-têtes
+            rows = list(reader)
+
+        self.assertEqual(rows, [["Pomme", "5", "2.0", "Fruits"]])
+
+    def test_merge_csv_skips_lazy_deleted_products(self):
+        """
+        Teste que la fusion ignore les produits marqués comme supprimés.
+        """
+        file1 = "produits1.csv"
+        output_file = "recapitulatif.csv"
+        self.gestion_csv.create_csv(file1)
+        self.gestion_csv.add_product(file1, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file1, ["Pomme", "5", "2.0", "Fruits"], is_recap=False)
+        self.gestion_csv.delete_product(file1, "Banane", is_recap=False, lazy=True)
+
+        self.gestion_csv.merge_csv([file1], output_file)
+
+        file_path = self.gestion_csv.get_file_path(output_file, is_recap=True)
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            rows = list(csv.reader(file))
+
+        self.assertEqual(rows[1:], [["Pomme", "5", "2.0", "Fruits"]])
+
+    def test_delete_products_batch(self):
+        """
+        Teste la suppression de plusieurs produits en une seule passe.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Pomme", "5", "2.0", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Banane", "20", "1.7", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Kiwi", "3", "0.4", "Fruits"], is_recap=False)
+
+        counts = self.gestion_csv.delete_products(file_name, ["Banane", "Kiwi", "Orange"], is_recap=False)
+
+        # Vérifie le nombre de suppressions rapporté pour chaque nom
+        self.assertEqual(counts, {"Banane": 2, "Kiwi": 1, "Orange": 0})
+
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            next(reader)  # Passe les en-têtes
+            rows = list(reader)
+
+        self.assertEqual(rows, [["Pomme", "5", "2.0", "Fruits"]])
+
+    def test_delete_products_zero_byte_file(self):
+        """
+        Teste la suppression dans un fichier sans entêtes (zéro octet).
+        """
+        file_name = "test_produits.csv"
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+        open(file_path, mode='w').close()
+
+        counts = self.gestion_csv.delete_products(file_name, ["Banane"], is_recap=False)
+
+        self.assertEqual(counts, {"Banane": 0})
+        self.assertEqual(os.path.getsize(file_path), 0)
+
+    def test_import_products_csv_and_jsonl(self):
+        """
+        Teste l'import en masse depuis un fichier CSV et un fichier JSON-lines.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+
+        csv_source = os.path.join(self.gestion_csv.LISTE_CSV_DIR, "source.csv")
+        with open(csv_source, mode='w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['nom du produit', 'quantité', 'prix unitaire', 'catégorie'])
+            writer.writerow(["Banane", "10", "1.5", "Fruits"])
+            writer.writerow(["Ligne", "invalide"])
+            writer.writerow(["Pomme", "5", "2.0", "Fruits"])
+
+        jsonl_source = os.path.join(self.gestion_csv.LISTE_CSV_DIR, "source.jsonl")
+        with open(jsonl_source, mode='w', encoding='utf-8') as file:
+            file.write('["Kiwi", 3, 0.4, "Fruits"]\n')
+            file.write('{"catégorie": "Légumes", "prix unitaire": 0.8, "quantité": 8, "nom du produit": "Carotte"}\n')
+            file.write('{"prix unitaire": 1.2, "nom du produit": "Poire", "quantité": 4}\n')  # Sans catégorie
+
+        counts = self.gestion_csv.import_products(file_name, csv_source, flush_size=1)
+        self.assertEqual(counts, {'ajoutes': 2, 'rejetes': 1})
+        counts = self.gestion_csv.import_products(file_name, jsonl_source)
+        self.assertEqual(counts, {'ajoutes': 2, 'rejetes': 1})
+
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            next(reader)  # Passe les en-têtes
+            rows = list(reader)
+
+        self.assertEqual(rows, [
+            ["Banane", "10", "1.5", "Fruits"],
+            ["Pomme", "5", "2.0", "Fruits"],
+            ["Kiwi", "3", "0.4", "Fruits"],
+            ["Carotte", "8", "0.8", "Légumes"],
+        ])
+
+    def test_add_products_zero_byte_file(self):
+        """
+        Teste qu'un fichier vide (sans entêtes) accepte les lignes au format des entêtes par défaut.
+        """
+        file_name = "test_produits.csv"
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+        open(file_path, mode='w').close()
+
+        counts = self.gestion_csv.add_products(file_name, [["Kiwi", "3", "0.4", "Fruits"]], is_recap=False)
+
+        self.assertEqual(counts, {'ajoutes': 1, 'rejetes': 0})
+        self.assertEqual(list(self.gestion_csv.iter_products(file_name)), [("Kiwi", 3, 0.4, "Fruits")])
+
+    def test_merge_csv_parallel(self):
+        """
+        Teste la fusion en parallèle : l'ordre des fichiers est conservé et, pour
+        les fichiers relus ligne à ligne, les lignes invalides sont écartées.
+        """
+        files = [f"produits{i}.csv" for i in range(5)]
+        output_file = "recapitulatif.csv"
+        for i, file_name in enumerate(files):
+            self.gestion_csv.create_csv(file_name)
+            self.gestion_csv.add_product(file_name, [f"Produit{i}", str(i), "1.5", "Catégorie"], is_recap=False)
+        # Le journal de suppressions oblige à relire le fichier ligne à ligne
+        self.gestion_csv.add_product(files[3], ["Ligne", "invalide"], is_recap=False)
+        self.gestion_csv.delete_product(files[3], "Produit3", is_recap=False, lazy=True)
+
+        self.gestion_csv.merge_csv(files + ["inexistant.csv"], output_file, workers=2)
+
+        file_path = self.gestion_csv.get_file_path(output_file, is_recap=True)
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            rows = list(csv.reader(file))
+
+        self.assertEqual(rows[0], ['nom du produit', 'quantité', 'prix unitaire', 'catégorie'])
+        self.assertEqual([row[0] for row in rows[1:]], ["Produit0", "Produit1", "Produit2", "Produit4"])
+
+    def test_merge_csv_parallel_empty_first_file(self):
+        """
+        Teste qu'un premier fichier vide (sans entêtes) n'empêche pas la fusion en parallèle.
+        """
+        files = [f"produits{i}.csv" for i in range(3)]
+        for i, file_name in enumerate(files):
+            self.gestion_csv.create_csv(file_name)
+            self.gestion_csv.add_product(file_name, [f"Produit{i}", str(i), "1.5", "Catégorie"], is_recap=False)
+        open(self.gestion_csv.get_file_path("vide.csv", is_recap=False), mode='w').close()
+
+        self.gestion_csv.merge_csv(["vide.csv"] + files, "recapitulatif.csv", workers=2)
+
+        file_path = self.gestion_csv.get_file_path("recapitulatif.csv", is_recap=True)
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(rows[0], ['nom du produit', 'quantité', 'prix unitaire', 'catégorie'])
+        self.assertEqual([row[0] for row in rows[1:]], ["Produit0", "Produit1", "Produit2"])
+
+    def test_merge_csv_parallel_worker_failure(self):
+        """
+        Teste que l'échec d'un processus de travail (octets non UTF-8) laisse le récapitulatif précédent intact.
+        """
+        files = [f"produits{i}.csv" for i in range(3)]
+        output_file = "recapitulatif.csv"
+        for i, file_name in enumerate(files):
+            self.gestion_csv.create_csv(file_name)
+            self.gestion_csv.add_product(file_name, [f"Produit{i}", str(i), "1.5", "Catégorie"], is_recap=False)
+        with open(self.gestion_csv.get_file_path("invalide.csv", is_recap=False), mode='wb') as file:
+            file.write(b"autres,entetes\r\n\xff\xfe,1\r\n")
+        self.gestion_csv.merge_csv(files, output_file, workers=2)
+        file_path = self.gestion_csv.get_file_path(output_file, is_recap=True)
+        with open(file_path, mode='rb') as file:
+            contenu = file.read()
+
+        with self.assertRaises(UnicodeDecodeError):
+            self.gestion_csv.merge_csv(files + ["invalide.csv"], output_file, workers=2)
+        with open(file_path, mode='rb') as file:
+            self.assertEqual(file.read(), contenu)
+        self.assertFalse([nom for nom in os.listdir(self.gestion_csv.RECAP_CSV_DIR) if nom.endswith(".tmp")])
+
+    def test_merge_csv_different_headers(self):
+        """
+        Teste la fusion de fichiers dont les entêtes diffèrent : un avertissement
+        est affiché et la fusion se fait ligne à ligne.
+        """
+        file1 = "produits1.csv"
+        file2 = "produits2.csv"
+        output_file = "recapitulatif.csv"
+        self.gestion_csv.create_csv(file1)
+        self.gestion_csv.add_product(file1, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        with open(self.gestion_csv.get_file_path(file2, is_recap=False), mode='w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['nom', 'quantité', 'prix', 'catégorie'])
+            writer.writerow(["Carotte", "5", "0.8", "Légumes"])
+
+        captured_output = io.StringIO()
+        sys.stdout = captured_output
+
+        self.gestion_csv.merge_csv([file1, file2], output_file)
+
+        sys.stdout = sys.__stdout__  # Restaure la sortie standard
+        self.assertIn("entêtes du fichier", captured_output.getvalue())
+
+        file_path = self.gestion_csv.get_file_path(output_file, is_recap=True)
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            rows = list(csv.reader(file))
+
+        self.assertEqual(rows, [
+            ['nom du produit', 'quantité', 'prix unitaire', 'catégorie'],
+            ["Banane", "10", "1.5", "Fruits"],
+            ["Carotte", "5", "0.8", "Légumes"],
+        ])
+
+    def test_merge_csv_empty_first_file(self):
+        """
+        Teste qu'avec un premier fichier vide (sans entêtes), les entêtes viennent
+        du suivant, pour la fusion simple, compressée et en partitions.
+        """
+        file1 = "produits1.csv"
+        self.gestion_csv.create_csv(file1)
+        self.gestion_csv.add_product(file1, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        open(self.gestion_csv.get_file_path("vide.csv", is_recap=False), mode='w').close()
+
+        for sortie, options in [("recap.csv", {}), ("recap.csv.gz", {}), ("parts.csv", {'max_rows': 10})]:
+            self.gestion_csv.merge_csv(["vide.csv", file1], sortie, **options)
+            produits = list(self.gestion_csv.iter_products(sortie, is_recap=True))
+            self.assertEqual([produit.nom for produit in produits], ["Banane"], sortie)
+
+    def test_merge_csv_aggregate(self):
+        """
+        Teste la fusion avec agrégation des quantités par produit.
+        """
+        file1 = "produits1.csv"
+        file2 = "produits2.csv"
+        output_file = "recapitulatif.csv"
+        self.gestion_csv.create_csv(file1)
+        self.gestion_csv.create_csv(file2)
+        self.gestion_csv.add_product(file1, ["Pomme", "10", "2", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file1, ["Banane", "5", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file2, ["Pomme", "30", "4", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file2, ["Carotte", "8", "0.8", "Légumes"], is_recap=False)
+
+        self.gestion_csv.merge_csv([file1, file2], output_file, aggregate='name')
+
+        file_path = self.gestion_csv.get_file_path(output_file, is_recap=True)
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            rows = list(csv.reader(file))
+
+        self.assertEqual(rows, [
+            ['nom du produit', 'quantité', 'prix unitaire', 'catégorie'],
+            ["Banane", "5", "1.5", "Fruits"],
+            ["Carotte", "8", "0.8", "Légumes"],
+            ["Pomme", "40", "4", "Fruits"],
+        ])
+
+    def test_merge_csv_aggregate_price_policies(self):
+        """
+        Teste le prix retenu par chaque politique lorsque les agrégats partiels sont déversés sur disque.
+        """
+        file1 = "produits1.csv"
+        file2 = "produits2.csv"
+        output_file = "recapitulatif.csv"
+        self.gestion_csv.create_csv(file1)
+        self.gestion_csv.create_csv(file2)
+        self.gestion_csv.add_product(file1, ["Pomme", "10", "2", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file2, ["Pomme", "30", "4", "Fruits"], is_recap=False)
+
+        self.gestion_csv.AGGREGATE_RUN_SIZE = 1  # Force le tri externe
+        file_path = self.gestion_csv.get_file_path(output_file, is_recap=True)
+        expected_prices = {'last': "4", 'min': "2", 'max': "4", 'mean': "3.5"}
+        for price_policy, expected_price in expected_prices.items():
+            with self.subTest(price_policy=price_policy):
+                self.gestion_csv.merge_csv([file1, file2], output_file, aggregate='name', price_policy=price_policy)
+
+                with open(file_path, mode='r', encoding='utf-8') as file:
+                    rows = list(csv.reader(file))
+
+                self.assertEqual(rows[1:], [["Pomme", "40", expected_price, "Fruits"]])
+
+    def test_merge_csv_incremental(self):
+        """
+        Teste la fusion incrémentale : les segments des fichiers inchangés sont
+        réutilisés et seuls les fichiers modifiés ou nouveaux sont relus.
+        """
+        file1 = "produits1.csv"
+        file2 = "produits2.csv"
+        file3 = "produits3.csv"
+        output_file = "recapitulatif.csv"
+        for file_name in (file1, file2, file3):
+            self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file1, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file2, ["Carotte", "5", "0.8", "Légumes"], is_recap=False)
+        self.gestion_csv.add_product(file3, ["Kiwi", "3", "0.4", "Fruits"], is_recap=False)
+
+        self.gestion_csv.merge_csv([file1, file2], output_file)
+        file_path = self.gestion_csv.get_file_path(output_file, is_recap=True)
+        self.assertTrue(os.path.exists(file_path + self.gestion_csv.MANIFEST_SUFFIX))
+
+        # Modification d'un fichier au milieu et ajout d'un nouveau fichier
+        self.gestion_csv.add_product(file1, ["Pomme", "7", "2.0", "Fruits"], is_recap=False)
+
+        captured_output = io.StringIO()
+        sys.stdout = captured_output
+
+        self.gestion_csv.merge_csv([file1, file2, file3], output_file)
+
+        sys.stdout = sys.__stdout__  # Restaure la sortie standard
+        self.assertIn("1 fichier(s) réutilisé(s), 2 fichier(s) relu(s)", captured_output.getvalue())
+
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            rows = list(csv.reader(file))
+
+        self.assertEqual(rows, [
+            ['nom du produit', 'quantité', 'prix unitaire', 'catégorie'],
+            ["Banane", "10", "1.5", "Fruits"],
+            ["Pomme", "7", "2.0", "Fruits"],
+            ["Carotte", "5", "0.8", "Légumes"],
+            ["Kiwi", "3", "0.4", "Fruits"],
+        ])
+
+    def test_merge_csv_full_rebuild(self):
+        """
+        Teste qu'une reconstruction complète relit tous les fichiers et donne le même résultat.
+        """
+        file1 = "produits1.csv"
+        file2 = "produits2.csv"
+        output_file = "recapitulatif.csv"
+        for file_name in (file1, file2):
+            self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file1, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file2, ["Carotte", "5", "0.8", "Légumes"], is_recap=False)
+        self.gestion_csv.merge_csv([file1, file2], output_file)
+        file_path = self.gestion_csv.get_file_path(output_file, is_recap=True)
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            rows = list(csv.reader(file))
+
+        captured_output = io.StringIO()
+        sys.stdout = captured_output
+
+        self.gestion_csv.merge_csv([file1, file2], output_file, full=True)
+
+        sys.stdout = sys.__stdout__  # Restaure la sortie standard
+        self.assertNotIn("réutilisé", captured_output.getvalue())
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            self.assertEqual(list(csv.reader(file)), rows)
+
+    def test_iter_products(self):
+        """
+        Teste le générateur de produits typés.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Carotte", "5", "0.8", "Légumes"], is_recap=False)
+
+        products = list(self.gestion_csv.iter_products(file_name, product_categ="Fruits"))
+        self.assertEqual(len(products), 1)
+        self.assertEqual(products[0].nom, "Banane")
+        self.assertEqual(products[0].quantite, 10)
+        self.assertEqual(products[0].prix, 1.5)
+
+        # Sans critère, tous les produits sont renvoyés
+        self.assertEqual(len(list(self.gestion_csv.iter_products(file_name))), 2)
+
+    def test_iter_products_missing_file(self):
+        """
+        Teste que le générateur de produits signale un fichier inexistant.
+        """
+        with self.assertRaises(FileNotFoundError):
+            next(self.gestion_csv.iter_products("fichier_inexistant.csv"))
+
+    def test_search_product_jsonl_format(self):
+        """
+        Teste l'affichage des résultats de recherche au format JSON-lines.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+
+        captured_output = io.StringIO()
+        sys.stdout = captured_output
+
+        self.gestion_csv.search_product(file_name, product_name="Banane", is_recap=False, output_format='jsonl')
+
+        sys.stdout = sys.__stdout__  # Restaure la sortie standard
+        lines = captured_output.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0]), {
+            'nom du produit': "Banane", 'quantité': 10, 'prix unitaire': 1.5, 'catégorie': "Fruits"})
+
+    def test_search_product_keeps_file_text(self):
+        """
+        Teste que la recherche affiche les valeurs telles qu'écrites dans le
+        fichier ("1.50", "007"), la comparaison se faisant sur les nombres.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "007", "1.50", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Kiwi", "3", "0.5", "Fruits"], is_recap=False)
+
+        session = GestionCSV(cache=CacheFichiers())
+        for gestion_csv in (self.gestion_csv, session, session):
+            for output_format, attendu in (('text', "quantité: 007\nprix unitaire: 1.50\n"),
+                                           ('csv', "Banane,007,1.50,Fruits\n")):
+                sortie = io.StringIO()
+                with contextlib.redirect_stdout(sortie):
+                    gestion_csv.search_product(file_name, product_prize="1.5", output_format=output_format)
+                self.assertIn(attendu, sortie.getvalue())
+                self.assertNotIn("Kiwi", sortie.getvalue())
+
+    def test_search_multiple_files_keeps_file_text(self):
+        """
+        Teste que la recherche sur plusieurs fichiers affiche aussi les valeurs telles qu'écrites.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "007", "1.50", "Fruits"], is_recap=False)
+
+        sortie = io.StringIO()
+        with contextlib.redirect_stdout(sortie):
+            self.gestion_csv.search_product("*.csv", product_quantity="7", output_format='csv')
+        self.assertIn("Banane,007,1.50,Fruits", sortie.getvalue())
+
+    def test_load_products(self):
+        """
+        Teste le chargement d'un fichier dans une table compacte par colonnes.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Audi TT", "5", "30000.0", "Sport"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Pomme", "beaucoup", "2.0", "Fruits"], is_recap=False)
+
+        table = self.gestion_csv.load_products(file_name, is_recap=False)
+
+        # La ligne à la quantité invalide est ignorée, les catégories sont partagées
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.quantites.typecode, 'q')
+        self.assertEqual(table.prix.typecode, 'd')
+        self.assertEqual(table[1], ("Audi TT", 5, 30000.0, "Sport"))
+
+    def test_load_products_select(self):
+        """
+        Teste la sélection de produits dans une table chargée, les nombres étant comparés en tant que nombres.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Audi TT", "5", "30000.0", "Sport"], is_recap=False)
+
+        table = self.gestion_csv.load_products(file_name, is_recap=False)
+
+        self.assertEqual([p.nom for p in table.select(product_prize="30000")], ["Audi TT"])
+        self.assertEqual([p.nom for p in table.select(product_categ="Fruits", product_quantity="10")], ["Banane"])
+
+    def test_search_product_numeric_criteria(self):
+        """
+        Teste que le prix et la quantité recherchés sont comparés en tant que nombres.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Audi TT", "5", "30000.0", "Sport"], is_recap=False)
+
+        for use_index in (False, True):
+            with self.subTest(use_index=use_index):
+                products = list(self.gestion_csv.iter_products(file_name, product_prize="30000", use_index=use_index))
+                self.assertEqual([p.nom for p in products], ["Audi TT"])
+
+    def test_query_products(self):
+        """
+        Teste les requêtes combinant conditions, intervalles et opérateurs sur les chaînes.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Audi TT", "5", "30000", "Sport"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Tesla", "6", "45000", "Electrique"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Jaguar", "1", "60000", "Sport"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Audi A3", "8", "35000", "Berline"], is_recap=False)
+
+        queries = {
+            "categorie = Sport AND prix < 40000 AND quantite >= 5": ["Audi TT"],
+            "nom ^= Audi OR categorie *= lec": ["Audi TT", "Tesla", "Audi A3"],
+            "NOT (categorie = Sport) AND prix = 30000..40000": ["Audi A3"],
+            'nom = "Audi TT" OR nom = Jaguar': ["Audi TT", "Jaguar"],
+        }
+        table = self.gestion_csv.load_products(file_name)
+        for query, expected in queries.items():
+            with self.subTest(query=query):
+                products = self.gestion_csv.query_products(file_name, query)
+                self.assertEqual([p.nom for p in products], expected)
+
+                # L'évaluation en Python pur donne le même résultat qu'avec numpy
+                self.assertEqual(Requete(query).evaluate(table, np=None), Requete(query).evaluate(table))
+
+    def test_query_products_invalid_query(self):
+        """
+        Teste qu'une colonne inconnue ou une valeur non numérique pour une colonne numérique est refusée.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Audi TT", "5", "30000", "Sport"], is_recap=False)
+
+        with self.assertRaises(ValueError):
+            self.gestion_csv.query_products(file_name, "couleur = rouge")
+        with self.assertRaises(ValueError):
+            self.gestion_csv.query_products(file_name, "prix < cher")
+
+    def test_query_products_invalid_rows(self):
+        """
+        Teste qu'une quantité entière écrite "2.0" est évaluée et qu'une ligne invalide est signalée.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Audi A3", "8", "35000", "Berline"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Clio", "2.0", "15000", "Berline"], is_recap=False)
+        self.gestion_csv.add_product(file_name, ["Zoe", "beaucoup", "20000", "Berline"], is_recap=False)
+
+        erreurs = io.StringIO()
+        with contextlib.redirect_stderr(erreurs):
+            products = list(self.gestion_csv.query_products(file_name, "categorie = Berline AND quantite >= 2"))
+
+        self.assertEqual([(p.nom, p.quantite) for p in products], [("Audi A3", 8), ("Clio", 2)])
+        self.assertIn("1 ligne(s)", erreurs.getvalue())
+
+    def _create_supplier_files(self, count=5):
+        """
+        Crée count fichiers fournisseur_<i>.csv d'un fruit et d'un légume chacun.
+        """
+        for i in range(count):
+            file_name = f"fournisseur_{i}.csv"
+            self.gestion_csv.create_csv(file_name)
+            self.gestion_csv.add_product(file_name, [f"Banane_{i}", "10", "1.5", "Fruits"], is_recap=False)
+            self.gestion_csv.add_product(file_name, [f"Carotte_{i}", "5", "0.8", "Légumes"], is_recap=False)
+
+    def test_search_multiple_files(self):
+        """
+        Teste la recherche sur plusieurs fichiers désignés par un motif.
+        """
+        self._create_supplier_files()
+        self.gestion_csv.build_index("fournisseur_0.csv", is_recap=False)  # Fichier annexe à ignorer
+
+        results = list(self.gestion_csv.iter_products_multi("fournisseur_*.csv", product_categ="Fruits", workers=2))
+        self.assertEqual(sorted(product.nom for _, product in results), [f"Banane_{i}" for i in range(5)])
+        self.assertEqual(sorted(file_path for file_path, _ in results),
+                         [self.gestion_csv.get_file_path(f"fournisseur_{i}.csv", is_recap=False) for i in range(5)])
+
+    def test_search_multiple_files_directory_limit(self):
+        """
+        Teste la recherche dans un répertoire entier, avec une requête et une limite du nombre de résultats.
+        """
+        self._create_supplier_files()
+
+        results = list(self.gestion_csv.iter_products_multi(
+            self.gestion_csv.LISTE_CSV_DIR, query="categorie = Légumes", limit=3))
+        self.assertEqual(len(results), 3)
+
+    def test_search_multiple_files_closed_early(self):
+        """
+        Teste que la fermeture du générateur arrête tous les processus de travail.
+        """
+        import multiprocessing
+
+        self._create_supplier_files()
+
+        results = self.gestion_csv.iter_products_multi("fournisseur_*.csv", query="prix > 0", workers=2)
+        self.assertEqual(len(next(results)), 2)
+        results.close()
+        self.assertEqual(multiprocessing.active_children(), [])
+
+    def test_search_product_multiple_files(self):
+        """
+        Teste l'affichage d'une recherche sur plusieurs fichiers, avec le fichier de chaque produit.
+        """
+        self._create_supplier_files()
+
+        captured_output = io.StringIO()
+        sys.stdout = captured_output
+
+        self.gestion_csv.search_product("*.csv", product_name="Carotte_3", output_format='csv')
+
+        sys.stdout = sys.__stdout__  # Restaure la sortie standard
+        self.assertEqual(captured_output.getvalue().splitlines(), [
+            "fichier,nom du produit,quantité,prix unitaire,catégorie",
+            "liste_csv/fournisseur_3.csv,Carotte_3,5,0.8,Légumes",
+        ])
+
+    def test_session_cache(self):
+        """
+        Teste que le cache de session évite les relectures d'un fichier inchangé.
+        """
+        gestion_csv = GestionCSV(cache=CacheFichiers())
+        file_name = "test_produits.csv"
+        gestion_csv.create_csv(file_name)
+        gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        gestion_csv.add_product(file_name, ["Pomme", "20", "2.0", "Fruits"], is_recap=False)
+
+        gestion_csv.load_products(file_name)
+        gestion_csv.load_products(file_name)
+        self.assertEqual((gestion_csv.cache.hits, gestion_csv.cache.misses), (1, 1))
+
+    def test_session_cache_follows_writes(self):
+        """
+        Teste que les écritures de la session mettent à jour la table en cache sans relecture du fichier.
+        """
+        gestion_csv = GestionCSV(cache=CacheFichiers())
+        file_name = "test_produits.csv"
+        gestion_csv.create_csv(file_name)
+        gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        gestion_csv.add_product(file_name, ["Pomme", "20", "2.0", "Fruits"], is_recap=False)
+        gestion_csv.load_products(file_name)
+
+        gestion_csv.add_product(file_name, ["Carotte", "5", "0.8", "Légumes"], is_recap=False)
+        gestion_csv.delete_product(file_name, "Pomme", is_recap=False, lazy=True)
+        products = list(gestion_csv.iter_products(file_name, product_categ="Fruits"))
+        self.assertEqual([p.nom for p in products], ["Banane"])
+        gestion_csv.delete_product(file_name, "Banane", is_recap=False)
+        self.assertEqual([p.nom for p in gestion_csv.iter_products(file_name)], ["Carotte"])
+        self.assertEqual(gestion_csv.cache.misses, 1)
+
+    def test_session_cache_external_change(self):
+        """
+        Teste qu'un fichier modifié hors de la session est relu.
+        """
+        gestion_csv = GestionCSV(cache=CacheFichiers())
+        file_name = "test_produits.csv"
+        gestion_csv.create_csv(file_name)
+        gestion_csv.add_product(file_name, ["Carotte", "5", "0.8", "Légumes"], is_recap=False)
+        gestion_csv.load_products(file_name)
+
+        with open(gestion_csv.get_file_path(file_name, is_recap=False), mode='a', encoding='utf-8') as file:
+            file.write("Kiwi,3,0.5,Fruits\n")
+        self.assertEqual([p.nom for p in gestion_csv.iter_products(file_name)], ["Carotte", "Kiwi"])
+        self.assertEqual(gestion_csv.cache.misses, 2)
+
+    def test_session_cache_eviction(self):
+        """
+        Teste que les entrées les plus anciennes sont évincées quand le budget est dépassé.
+        """
+        gestion_csv = GestionCSV(cache=CacheFichiers())
+        file_name = "test_produits.csv"
+        gestion_csv.create_csv(file_name)
+        gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        gestion_csv.load_products(file_name)
+
+        gestion_csv.cache.resize(0)
+        self.assertEqual(gestion_csv.cache.stats()['entrees'], 0)
+        self.assertEqual(gestion_csv.cache.evictions, 1)
+
+    def _start_server(self):
+        """
+        Démarre le démon sur une socket Unix temporaire et renvoie un client
+        connecté ; le démon est arrêté à la fin du test.
+        """
+        import tempfile
+        import time
+
+        socket_path = os.path.join(tempfile.mkdtemp(), "csv.sock")
+        thread = threading.Thread(target=ServeurCSV(GestionCSV(), socket_path).run)
+        thread.start()
+        for _ in range(100):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.05)
+        client = ClientCSV(socket_path)
+
+        def arreter():
+            if thread.is_alive():
+                client.request("shutdown")
+                thread.join(5)
+        self.addCleanup(arreter)
+        return client, thread, socket_path
+
+    def test_serve_and_client(self):
+        """
+        Teste le démon sur socket Unix : requêtes enchaînées sans attendre les réponses.
+        """
+        client, _, _ = self._start_server()
+        reponses = list(client.pipeline([
+            {"id": 1, "action": "create", "file_name": "test_produits.csv"},
+            {"id": 2, "action": "add", "file_name": "test_produits.csv", "product_info": ["Banane", "10", "1.5", "Fruits"]},
+            {"id": 3, "action": "add", "file_name": "test_produits.csv", "products": [["Pomme", "20", "2", "Fruits"]]},
+            {"id": 4, "action": "search", "file_name": "test_produits.csv", "query": "prix > 1.8"},
+            {"id": 5, "action": "search", "file_name": "absent.csv", "product_name": "Banane"},
+            "pas du JSON",
+        ]))
+        self.assertEqual([r.get("id") for r in reponses], [1, 2, 3, 4, 5, None])
+        self.assertEqual(reponses[2]["result"], {"ajoutes": 1, "rejetes": 0})
+        self.assertEqual(reponses[3]["result"], [{"nom": "Pomme", "quantite": 20, "prix": 2.0, "categorie": "Fruits"}])
+        self.assertFalse(reponses[4]["ok"])
+        self.assertFalse(reponses[5]["ok"])
+
+    def test_serve_unexpected_error(self):
+        """
+        Teste qu'une erreur inattendue d'une action est renvoyée sans couper la connexion.
+        """
+        client, _, _ = self._start_server()
+        client.request("create", file_name="test_produits.csv")
+
+        requete = "(" * 5000 + "prix > 1" + ")" * 5000  # Trop imbriquée pour l'analyseur
+        reponses = list(client.pipeline([{"action": "search", "file_name": "test_produits.csv", "query": requete},
+                                         {"action": "ping"}]))
+        self.assertTrue(reponses[0]["error"].startswith("Erreur inattendue (RecursionError)"))
+        self.assertEqual(reponses[1]["result"], "pong")
+
+    def test_serve_long_action_does_not_block(self):
+        """
+        Teste qu'une action longue d'un client (ici en attente du verrou du fichier) ne bloque pas les autres clients.
+        """
+        import fcntl
+
+        client, _, _ = self._start_server()
+        client.request("create", file_name="test_produits.csv")
+        file_path = self.gestion_csv.get_file_path("test_produits.csv", is_recap=False)
+
+        longue = []
+        with open(file_path + GestionCSV.LOCK_SUFFIX, mode='a') as verrou:
+            fcntl.flock(verrou, fcntl.LOCK_EX)
+            thread_long = threading.Thread(target=lambda: longue.append(
+                client.request("add", file_name="test_produits.csv", product_info=["Banane", "10", "1.5", "Fruits"])))
+            thread_long.start()
+            self.assertEqual(client.request("ping")["result"], "pong")
+            self.assertTrue(thread_long.is_alive())
+            fcntl.flock(verrou, fcntl.LOCK_UN)
+        thread_long.join(5)
+        self.assertTrue(longue[0]["ok"])
+
+    def test_serve_shutdown(self):
+        """
+        Teste que l'action shutdown arrête le démon et supprime sa socket.
+        """
+        client, thread, socket_path = self._start_server()
+
+        self.assertTrue(client.request("shutdown")["ok"])
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(socket_path))
+
+    def test_concurrent_writers(self):
+        """
+        Teste qu'aucun ajout n'est perdu quand des suppressions réécrivent le fichier en même temps.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+
+        def ajouter(i):
+            gestion_csv = GestionCSV()
+            for j in range(50):
+                gestion_csv.add_products(file_name, [[f"Produit_{i}_{j}", "1", "1.0", "Divers"]], is_recap=False)
+
+        def supprimer():
+            gestion_csv = GestionCSV()
+            for j in range(20):
+                gestion_csv.delete_products(file_name, [f"Absent_{j}"], is_recap=False)
+
+        sys.stdout = io.StringIO()
+        try:
+            threads = [threading.Thread(target=ajouter, args=(i,)) for i in range(4)]
+            threads += [threading.Thread(target=supprimer) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.stdout = sys.__stdout__
+
+        self.assertEqual(len(list(self.gestion_csv.iter_products(file_name))), 200)
+        # Aucun fichier temporaire ne reste après les réécritures
+        self.assertFalse([f for f in os.listdir(self.gestion_csv.LISTE_CSV_DIR) if f.endswith('.tmp')])
+
+    def test_journal_add(self):
+        """
+        Teste que les ajouts avec journal y sont consignés, puis reportés dans le fichier à la lecture suivante.
+        """
+        gestion_csv = GestionCSV(journal=True)
+        file_name = "test_produits.csv"
+        file_path = gestion_csv.get_file_path(file_name, is_recap=False)
+        gestion_csv.create_csv(file_name)
+        gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        gestion_csv.add_products(file_name, [["Pomme", "20", "2.0", "Fruits"], ["Kiwi", "3", "0.5", "Fruits"]], is_recap=False)
+
+        # Les ajouts sont dans le journal, pas encore dans le fichier
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 1)
+
+        products = list(GestionCSV().iter_products(file_name))
+        self.assertEqual([p.nom for p in products], ["Banane", "Pomme", "Kiwi"])
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 4)
+
+    def test_journal_recovery(self):
+        """
+        Teste la reprise d'un report du journal interrompu dans le fichier.
+        """
+        gestion_csv = GestionCSV(journal=True)
+        file_name = "test_produits.csv"
+        file_path = gestion_csv.get_file_path(file_name, is_recap=False)
+        gestion_csv.create_csv(file_name)
+        gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        gestion_csv.add_products(file_name, [["Pomme", "20", "2.0", "Fruits"], ["Kiwi", "3", "0.5", "Fruits"]], is_recap=False)
+
+        # Report interrompu : journal renommé, fichier partiellement complété
+        taille = os.path.getsize(file_path)
+        os.replace(file_path + GestionCSV.JOURNAL_SUFFIX, file_path + GestionCSV.PENDING_SUFFIX)
+        with open(file_path + GestionCSV.CHECKPOINT_SUFFIX, mode='w', encoding='utf-8') as file:
+            file.write('{"taille": %d}' % taille)
+        with open(file_path, mode='a', encoding='utf-8') as file:
+            file.write("Banane,10,1.5,Fr")
+        # Ajout interrompu au milieu d'une ligne dans un nouveau journal
+        with open(file_path + GestionCSV.JOURNAL_SUFFIX, mode='w', encoding='utf-8') as file:
+            file.write("Carotte,5,0.8,Légumes\r\nPoi")
+
+        products = list(GestionCSV().iter_products(file_name))
+        self.assertEqual([p.nom for p in products], ["Banane", "Pomme", "Kiwi", "Carotte"])
+        self.assertEqual(sorted(os.listdir(self.gestion_csv.LISTE_CSV_DIR)),
+                         ["test_produits.csv", "test_produits.csv.lock"])
+
+    def test_columnar_storage(self):
+        """
+        Teste le stockage binaire par colonnes (.col) : ajouts, recherche et requêtes.
+        """
+        file_name = "test_produits.col"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.add_products(file_name, [["Audi TT", "5", "30000", "Sport"], ["Pomme", "beaucoup", "2", "Fruits"],
+                                                  ["Kiwi", "3", "0.5", "Fruits"]], is_recap=False)
+
+        with open(self.gestion_csv.get_file_path(file_name, is_recap=False), mode='rb') as file:
+            self.assertTrue(file.read().startswith(b'GCOL'))
+
+        products = list(self.gestion_csv.iter_products(file_name, product_categ="Fruits"))
+        self.assertEqual(products, [("Banane", 10, 1.5, "Fruits"), ("Kiwi", 3, 0.5, "Fruits")])
+        self.assertEqual([p.nom for p in self.gestion_csv.query_products(file_name, "prix >= 1.5")], ["Banane", "Audi TT"])
+
+    def test_columnar_storage_delete(self):
+        """
+        Teste la suppression dans un fichier par colonnes.
+        """
+        file_name = "test_produits.col"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_products(file_name, [["Banane", "10", "1.5", "Fruits"], ["Audi TT", "5", "30000", "Sport"],
+                                                  ["Kiwi", "3", "0.5", "Fruits"]], is_recap=False)
+
+        self.gestion_csv.delete_product(file_name, "Banane", is_recap=False)
+
+        self.assertEqual([p.nom for p in self.gestion_csv.iter_products(file_name)], ["Audi TT", "Kiwi"])
+
+    def test_columnar_storage_small_blocks(self):
+        """
+        Teste que les petits blocs des ajouts successifs sont fusionnés au lieu de s'accumuler.
+        """
+        file_name = "test_produits.col"
+        self.gestion_csv.create_csv(file_name)
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+        taille_vide = os.path.getsize(file_path)
+        self.gestion_csv.add_product(file_name, ["Produit_0", "0", "1.0", "Divers"], is_recap=False)
+        taille_bloc = os.path.getsize(file_path) - taille_vide
+
+        nombre = StockageColonnes.SMALL_BLOCKS_MAX + 8
+        for i in range(1, nombre):
+            self.gestion_csv.add_product(file_name, [f"Produit_{i}", str(i), "1.0", "Divers"], is_recap=False)
+
+        self.assertLess(os.path.getsize(file_path), taille_vide + nombre * taille_bloc)
+        products = list(self.gestion_csv.iter_products(file_name))
+        self.assertEqual([p.nom for p in products], [f"Produit_{i}" for i in range(nombre)])
+        self.assertEqual(products[-1], (f"Produit_{nombre - 1}", nombre - 1, 1.0, "Divers"))
+
+    def test_columnar_storage_merge_and_export(self):
+        """
+        Teste la fusion d'un fichier CSV et d'un fichier par colonnes, puis l'export en CSV.
+        """
+        file_name = "test_produits.col"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_products(file_name, [["Audi TT", "5", "30000", "Sport"], ["Kiwi", "3", "0.5", "Fruits"]],
+                                      is_recap=False)
+        self.gestion_csv.create_csv("test_produits.csv")
+        self.gestion_csv.add_product("test_produits.csv", ["Tesla", "6", "45000", "Electrique"], is_recap=False)
+
+        self.gestion_csv.merge_csv([file_name, "test_produits.csv"], "recap.col")
+        self.gestion_csv.export_products("recap.col", "recap.csv", is_recap=True)
+
+        with open(self.gestion_csv.get_file_path("recap.csv", is_recap=True), mode='r', encoding='utf-8') as file:
+            self.assertEqual(list(csv.reader(file)), [
+                self.gestion_csv.HEADERS,
+                ["Audi TT", "5", "30000", "Sport"],
+                ["Kiwi", "3", "0.5", "Fruits"],
+                ["Tesla", "6", "45000", "Electrique"],
+            ])
+
+    def test_sqlite_storage(self):
+        """
+        Teste le stockage SQLite (.sqlite) : ajouts et index sur le nom et la catégorie.
+        """
+        import sqlite3
+
+        file_name = "test_produits.sqlite"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        counts = self.gestion_csv.add_products(file_name, [["Audi TT", "5", "30000", "Sport"], ["Pomme", "x", "2", "Fruits"],
+                                                           ["Kiwi", "3", "0.5", "Fruits"]], is_recap=False)
+        self.assertEqual(counts, {'ajoutes': 2, 'rejetes': 1})
+
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+        with sqlite3.connect(file_path) as connexion:
+            index = {row[0] for row in connexion.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertEqual(index, {"produits_nom", "produits_categorie"})
+
+    def test_sqlite_storage_search(self):
+        """
+        Teste la recherche indexée dans un fichier SQLite.
+        """
+        file_name = "test_produits.sqlite"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_products(file_name, [["Banane", "10", "1.5", "Fruits"], ["Audi TT", "5", "30000", "Sport"],
+                                                  ["Kiwi", "3", "0.5", "Fruits"]], is_recap=False)
+
+        products = list(self.gestion_csv.iter_products(file_name, product_categ="Fruits", product_prize="30000"))
+        self.assertEqual([p.nom for p in products], ["Banane", "Audi TT", "Kiwi"])
+
+    def test_sqlite_storage_delete(self):
+        """
+        Teste la suppression de plusieurs produits dans un fichier SQLite.
+        """
+        file_name = "test_produits.sqlite"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_products(file_name, [["Banane", "10", "1.5", "Fruits"], ["Kiwi", "3", "0.5", "Fruits"]],
+                                      is_recap=False)
+
+        self.assertEqual(self.gestion_csv.delete_products(file_name, ["Kiwi", "Absent"], is_recap=False),
+                         {"Kiwi": 1, "Absent": 0})
+        self.assertEqual([p.nom for p in self.gestion_csv.iter_products(file_name)], ["Banane"])
+
+    def test_sqlite_storage_merge_and_export(self):
+        """
+        Teste la fusion de fichiers SQLite, puis l'export en CSV.
+        """
+        file_name = "test_produits.sqlite"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_products(file_name, [["Banane", "10", "1.5", "Fruits"], ["Audi TT", "5", "30000", "Sport"]],
+                                      is_recap=False)
+
+        self.gestion_csv.merge_csv([file_name, file_name], "recap.sqlite")
+        self.gestion_csv.export_products("recap.sqlite", "recap.csv", is_recap=True)
+
+        with open(self.gestion_csv.get_file_path("recap.csv", is_recap=True), mode='r', encoding='utf-8') as file:
+            self.assertEqual([row[0] for row in csv.reader(file)], ["nom du produit", "Banane", "Audi TT", "Banane", "Audi TT"])
+
+    def test_typed_storage_integral_float_quantity(self):
+        """
+        Teste que les moteurs typés acceptent tous une quantité entière écrite "10.0".
+        """
+        rows = [["Banane", "10.0", "1.5", "Fruits"], ["Kiwi", "2.5", "0.5", "Fruits"]]
+        self.gestion_csv.create_csv("test_produits.csv")
+        self.gestion_csv.add_products("test_produits.csv", rows, is_recap=False)
+
+        for extension in ("col", "sqlite"):
+            file_name = f"test_produits.{extension}"
+            self.gestion_csv.create_csv(file_name)
+            counts = self.gestion_csv.add_products(file_name, rows, is_recap=False)
+            self.assertEqual(counts, {'ajoutes': 1, 'rejetes': 1})
+            self.assertEqual(list(self.gestion_csv.iter_products(file_name)), [("Banane", 10, 1.5, "Fruits")])
+
+            self.gestion_csv.merge_csv(["test_produits.csv"], f"recap.{extension}")
+            self.assertEqual(list(self.gestion_csv.iter_products(f"recap.{extension}", is_recap=True)),
+                             [("Banane", 10, 1.5, "Fruits")])
+
+    def test_compressed_csv(self):
+        """
+        Teste les fichiers CSV compressés : ajouts, recherche et suppression pour chaque format.
+        """
+        import importlib.util
+
+        extensions = ["gz", "xz"] + (["zst"] if importlib.util.find_spec("zstandard") else [])
+        for extension in extensions:
+            with self.subTest(extension=extension):
+                file_name = f"test_produits.csv.{extension}"
+                self.gestion_csv.create_csv(file_name)
+                self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+                self.gestion_csv.add_products(file_name, [["Audi TT", "5", "30000", "Sport"], ["Kiwi", "3", "0.5", "Fruits"]],
+                                              is_recap=False)
+
+                products = list(self.gestion_csv.iter_products(file_name, product_categ="Fruits"))
+                self.assertEqual([p.nom for p in products], ["Banane", "Kiwi"])
+                self.gestion_csv.delete_product(file_name, "Kiwi", is_recap=False)
+                self.assertEqual([p.nom for p in self.gestion_csv.iter_products(file_name)], ["Banane", "Audi TT"])
+
+    def test_compressed_csv_append_member(self):
+        """
+        Teste qu'un ajout à un fichier gzip écrit un nouveau membre à la fin, sans recompresser le début.
+        """
+        file_name = "test_produits.csv.gz"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_product(file_name, ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+        taille = os.path.getsize(file_path)
+        with open(file_path, mode='rb') as file:
+            debut = file.read()
+
+        self.gestion_csv.add_product(file_name, ["Pomme", "20", "2", "Fruits"], is_recap=False)
+
+        with open(file_path, mode='rb') as file:
+            self.assertEqual(file.read(taille), debut)
+        self.assertEqual([p.nom for p in self.gestion_csv.iter_products(file_name)], ["Banane", "Pomme"])
+
+    def test_compressed_csv_merge(self):
+        """
+        Teste la fusion de fichiers CSV compressés ou non vers un récapitulatif compressé.
+        """
+        import gzip
+
+        self.gestion_csv.create_csv("test_produits.csv")
+        self.gestion_csv.add_product("test_produits.csv", ["Tesla", "6", "45000", "Electrique"], is_recap=False)
+        for extension in ("gz", "xz"):
+            self.gestion_csv.create_csv(f"test_produits.csv.{extension}")
+            self.gestion_csv.add_products(f"test_produits.csv.{extension}", [["Banane", "10", "1.5", "Fruits"]],
+                                          is_recap=False)
+
+        self.gestion_csv.merge_csv(["test_produits.csv", "test_produits.csv.gz", "test_produits.csv.xz"], "recap.csv.gz")
+
+        with gzip.open(self.gestion_csv.get_file_path("recap.csv.gz", is_recap=True), mode='rt', encoding='utf-8') as file:
+            noms = [row[0] for row in csv.reader(file)]
+        self.assertEqual(noms, ["nom du produit", "Tesla", "Banane", "Banane"])
+
+    def test_partitioned_merge(self):
+        """
+        Teste la fusion en partitions par catégorie : manifeste des partitions et requêtes sur l'ensemble.
+        """
+        self.gestion_csv.create_csv("test_produits.csv")
+        produits = [[f"Produit {i}", str(i), "2.5", f"Categ {i % 5}"] for i in range(100)]
+        self.gestion_csv.add_products("test_produits.csv", produits, is_recap=False)
+
+        self.gestion_csv.merge_csv(["test_produits.csv"], "recap.csv", partition_by="categ", partition_count=3)
+
+        recap_path = self.gestion_csv.get_file_path("recap.csv", is_recap=True)
+        self.assertFalse(os.path.exists(recap_path))
+        with open(recap_path + GestionCSV.PARTITIONS_SUFFIX, encoding='utf-8') as file:
+            manifest = json.load(file)
+        self.assertEqual([p["file"] for p in manifest["partitions"]],
+                         ["recap.part-0000.csv", "recap.part-0001.csv", "recap.part-0002.csv"])
+        self.assertEqual(sum(p["rows"] for p in manifest["partitions"]), 100)
+        self.assertEqual(len(list(self.gestion_csv.query_products("recap.csv", "quantité < 10", is_recap=True))), 10)
+
+    def test_partitioned_merge_search(self):
+        """
+        Teste que seule la partition de la catégorie cherchée est lue.
+        """
+        self.gestion_csv.create_csv("test_produits.csv")
+        produits = [[f"Produit {i}", str(i), "2.5", f"Categ {i % 5}"] for i in range(100)]
+        self.gestion_csv.add_products("test_produits.csv", produits, is_recap=False)
+        self.gestion_csv.merge_csv(["test_produits.csv"], "recap.csv", partition_by="categ", partition_count=3)
+        recap_path = self.gestion_csv.get_file_path("recap.csv", is_recap=True)
+        with open(recap_path + GestionCSV.PARTITIONS_SUFFIX, encoding='utf-8') as file:
+            manifest = json.load(file)
+        for partition in manifest["partitions"]:
+            with open(os.path.join(self.gestion_csv.RECAP_CSV_DIR, partition["file"]), encoding='utf-8') as file:
+                if "Categ 2" in file.read():
+                    lignes_partition = partition["rows"]
+
+        gestion_csv = GestionCSV(stats=True)
+        with contextlib.redirect_stderr(io.StringIO()):
+            products = list(gestion_csv.iter_products("recap.csv", product_categ="Categ 2", is_recap=True))
+            gestion_csv.search_product("recap.csv", product_categ="Categ 2", is_recap=True, output_format="csv")
+
+        self.assertEqual([p.nom for p in products], [f"Produit {i}" for i in range(2, 100, 5)])
+        self.assertEqual(gestion_csv.last_stats.lignes_lues, lignes_partition)
+
+    def test_partitioned_merge_max_rows(self):
+        """
+        Teste la fusion en partitions de taille bornée, lues dans l'ordre.
+        """
+        self.gestion_csv.create_csv("test_produits.csv")
+        produits = [[f"Produit {i}", str(i), "2.5", f"Categ {i % 5}"] for i in range(100)]
+        self.gestion_csv.add_products("test_produits.csv", produits, is_recap=False)
+
+        self.gestion_csv.merge_csv(["test_produits.csv"], "recap.csv", max_rows=30)
+
+        recap_path = self.gestion_csv.get_file_path("recap.csv", is_recap=True)
+        with open(recap_path + GestionCSV.PARTITIONS_SUFFIX, encoding='utf-8') as file:
+            manifest = json.load(file)
+        self.assertEqual([p["rows"] for p in manifest["partitions"]], [30, 30, 30, 10])
+        self.assertEqual([p.nom for p in self.gestion_csv.iter_products("recap.csv", is_recap=True)],
+                         [p[0] for p in produits])
+
+    def test_partitioned_merge_back_to_single_file(self):
+        """
+        Teste qu'une fusion simple après une fusion en partitions supprime les partitions.
+        """
+        self.gestion_csv.create_csv("test_produits.csv")
+        self.gestion_csv.add_product("test_produits.csv", ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+        self.gestion_csv.merge_csv(["test_produits.csv"], "recap.csv", max_rows=30)
+
+        self.gestion_csv.merge_csv(["test_produits.csv"], "recap.csv")
+
+        self.assertEqual(sorted(f for f in os.listdir(self.gestion_csv.RECAP_CSV_DIR) if not f.endswith(".lock")),
+                         ["recap.csv", "recap.csv.bloom", "recap.csv.manifest", "recap.csv.summary"])
+
+    def _lignes_lues_recherche(self, file_name, product_name, is_recap=False):
+        """
+        Renvoie le nombre de lignes lues par la recherche d'un nom de produit.
+        """
+        gestion_csv = GestionCSV(stats=True)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            gestion_csv.search_product(file_name, product_name=product_name, is_recap=is_recap)
+        return gestion_csv.last_stats.lignes_lues
+
+    def _create_bloom_file(self, file_name="test_produits.csv"):
+        """
+        Crée un fichier de trois produits avec son filtre de Bloom, sans index
+        (la recherche d'un nom absent ne peut alors être évitée que par le filtre).
+        """
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_products(file_name, [["Banane", "10", "1.5", "Fruits"], ["Audi TT", "5", "30000", "Sport"],
+                                                  ["Kiwi", "3", "0.5", "Fruits"]], is_recap=False)
+        self.gestion_csv.build_index(file_name)
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+        os.remove(file_path + GestionCSV.INDEX_SUFFIX)
+        return file_path
+
+    def test_bloom_filter(self):
+        """
+        Teste que le filtre de Bloom des noms de produits évite la lecture (recherche)
+        et la réécriture (suppression) du fichier pour un nom absent.
+        """
+        file_name = "test_produits.csv"
+        file_path = self._create_bloom_file(file_name)
+        self.assertTrue(os.path.exists(file_path + GestionCSV.BLOOM_SUFFIX))
+
+        self.assertEqual(self._lignes_lues_recherche(file_name, "Inconnu"), 0)
+        self.assertEqual(self._lignes_lues_recherche(file_name, "Kiwi"), 3)
+
+        gestion_csv = GestionCSV(stats=True)
+        stat = os.stat(file_path)
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(list(gestion_csv.iter_products(file_name, product_name="Inconnu")), [])
+            self.assertEqual(gestion_csv.last_stats, None)
+            gestion_csv.delete_product(file_name, "Inconnu", is_recap=False)
+        self.assertEqual(gestion_csv.last_stats.lignes_lues, 0)
+        self.assertEqual((os.stat(file_path).st_ino, os.stat(file_path).st_mtime_ns), (stat.st_ino, stat.st_mtime_ns))
+
+    def test_bloom_filter_follows_adds(self):
+        """
+        Teste que les ajouts, directs ou par le journal, sont reportés dans le filtre de Bloom.
+        """
+        file_name = "test_produits.csv"
+        self._create_bloom_file(file_name)
+
+        self.gestion_csv.add_product(file_name, ["Pomme", "20", "2", "Fruits"], is_recap=False)
+        GestionCSV(journal=True).add_product(file_name, ["Poire", "4", "1.2", "Fruits"], is_recap=False)
+
+        self.assertEqual([p.nom for p in self.gestion_csv.iter_products(file_name, product_name="Pomme")], ["Pomme"])
+        self.assertEqual([p.nom for p in self.gestion_csv.iter_products(file_name, product_name="Poire")], ["Poire"])
+        self.assertEqual(self._lignes_lues_recherche(file_name, "Inconnu"), 0)
+
+    def test_bloom_filter_delete(self):
+        """
+        Teste qu'une suppression réécrit le filtre de Bloom sans le nom supprimé.
+        """
+        file_name = "test_produits.csv"
+        self._create_bloom_file(file_name)
+
+        self.gestion_csv.delete_product(file_name, "Kiwi", is_recap=False)
+
+        self.assertEqual(self._lignes_lues_recherche(file_name, "Kiwi"), 0)
+        self.assertEqual(self._lignes_lues_recherche(file_name, "Banane"), 2)
+
+    def test_bloom_filter_merge(self):
+        """
+        Teste que la fusion crée le filtre de Bloom du récapitulatif.
+        """
+        self.gestion_csv.create_csv("test_produits.csv")
+        self.gestion_csv.add_products("test_produits.csv", [["Banane", "10", "1.5", "Fruits"], ["Audi TT", "5", "30000", "Sport"]],
+                                      is_recap=False)
+
+        self.gestion_csv.merge_csv(["test_produits.csv"], "recap.csv")
+
+        self.assertEqual(self._lignes_lues_recherche("recap.csv", "Kiwi", is_recap=True), 0)
+        self.assertEqual(self._lignes_lues_recherche("recap.csv", "Audi TT", is_recap=True), 2)
+
+    def test_bloom_filter_incremental_merge(self):
+        """
+        Teste qu'une fusion incrémentale ne lit que le nouveau fichier, dont les noms
+        sont ajoutés au filtre de Bloom du récapitulatif.
+        """
+        self.gestion_csv.create_csv("test_produits.csv")
+        self.gestion_csv.add_products("test_produits.csv", [["Banane", "10", "1.5", "Fruits"], ["Audi TT", "5", "30000", "Sport"]],
+                                      is_recap=False)
+        self.gestion_csv.merge_csv(["test_produits.csv"], "recap.csv")
+        self.gestion_csv.create_csv("autres.csv")
+        self.gestion_csv.add_product("autres.csv", ["Tesla", "6", "45000", "Electrique"], is_recap=False)
+
+        gestion_csv = GestionCSV(stats=True)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            gestion_csv.merge_csv(["test_produits.csv", "autres.csv"], "recap.csv")
+
+        self.assertEqual(gestion_csv.last_stats.lignes_lues, 1)
+        self.assertEqual(self._lignes_lues_recherche("recap.csv", "Tesla", is_recap=True), 3)
+        self.assertEqual(self._lignes_lues_recherche("recap.csv", "Audi TT", is_recap=True), 3)
+        self.assertEqual(self._lignes_lues_recherche("recap.csv", "Kiwi", is_recap=True), 0)
+
+    def test_bloom_filter_aggregate_merge(self):
+        """
+        Teste que la fusion agrégée construit le filtre de Bloom pendant l'écriture.
+        """
+        self.gestion_csv.create_csv("test_produits.csv")
+        self.gestion_csv.add_products("test_produits.csv", [["Banane", "10", "1.5", "Fruits"], ["Tesla", "6", "45000", "Electrique"]],
+                                      is_recap=False)
+
+        self.gestion_csv.merge_csv(["test_produits.csv", "test_produits.csv"], "agrege.csv", aggregate="name")
+
+        self.assertEqual(self._lignes_lues_recherche("agrege.csv", "Tesla", is_recap=True), 2)
+        self.assertEqual(self._lignes_lues_recherche("agrege.csv", "Kiwi", is_recap=True), 0)
+
+    def test_stock_stats(self):
+        """
+        Teste les statistiques par catégorie, les lignes invalides étant ignorées.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_products(file_name, [["Banane", "10", "1.5", "Fruits"], ["Kiwi", "3", "0.5", "Fruits"],
+                                                  ["Audi TT", "5", "30000", "Sport"], ["Erreur", "x", "1", "Fruits"]],
+                                      is_recap=False)
+
+        stats = self.gestion_csv.load_stats(file_name).as_dict()
+
+        self.assertEqual(stats["categories"]["Fruits"],
+                         {"produits": 2, "quantite": 13, "valeur": 16.5, "prix_min": 0.5, "prix_max": 1.5})
+        self.assertEqual(stats["total"]["valeur"], 150016.5)
+        self.assertEqual(stats["ignorees"], 1)
+
+    def test_stock_stats_follow_adds(self):
+        """
+        Teste que les statistiques, calculées une fois, sont tenues à jour par les ajouts sans relire le fichier.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_products(file_name, [["Banane", "10", "1.5", "Fruits"], ["Kiwi", "3", "0.5", "Fruits"],
+                                                  ["Audi TT", "5", "30000", "Sport"]], is_recap=False)
+        self.gestion_csv.load_stats(file_name)
+
+        gestion_csv = GestionCSV(stats=True)
+        sortie = io.StringIO()
+        with contextlib.redirect_stdout(sortie), contextlib.redirect_stderr(io.StringIO()):
+            gestion_csv.add_product(file_name, ["Pomme", "20", "2", "Fruits"], is_recap=False)
+            gestion_csv.show_stats(file_name, output_format="csv")
+
+        self.assertEqual(gestion_csv.last_stats.lignes_lues, 0)
+        self.assertIn("Fruits,3,33,56.5,0.5,2\nSport,1,5,150000,30000,30000\nTotal,4,38,150056.5,0.5,30000",
+                      sortie.getvalue())
+
+    def test_stock_stats_merge(self):
+        """
+        Teste que la fusion relève les statistiques du récapitulatif, lues ensuite sans relire le fichier.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_products(file_name, [["Banane", "10", "1.5", "Fruits"], ["Kiwi", "3", "0.5", "Fruits"],
+                                                  ["Pomme", "20", "2", "Fruits"]], is_recap=False)
+
+        self.gestion_csv.merge_csv([file_name, file_name], "recap.csv")
+
+        gestion_csv = GestionCSV(stats=True)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            stats = gestion_csv.show_stats("recap.csv", is_recap=True).as_dict()
+        self.assertEqual(gestion_csv.last_stats.lignes_lues, 0)
+        self.assertEqual(list(stats["categories"]), ["Fruits"])
+        self.assertEqual(stats["total"], {"produits": 6, "quantite": 66, "valeur": 113.0, "prix_min": 0.5, "prix_max": 2})
+
+    def test_stock_stats_merge_leaves_inputs(self):
+        """
+        Teste que la fusion n'écrit aucun fichier annexe à côté de ses fichiers d'entrée.
+        """
+        self.gestion_csv.create_csv("test_produits.csv")
+        self.gestion_csv.add_product("test_produits.csv", ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+
+        self.gestion_csv.merge_csv(["test_produits.csv"], "recap.csv")
+
+        self.assertEqual(sorted(os.listdir(self.gestion_csv.LISTE_CSV_DIR)), ["test_produits.csv", "test_produits.csv.lock"])
+
+    def test_stock_stats_delete(self):
+        """
+        Teste qu'une suppression met à jour les statistiques existantes, et n'en crée pas sinon.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_products(file_name, [["Banane", "10", "1.5", "Fruits"], ["Kiwi", "3", "0.5", "Fruits"]],
+                                      is_recap=False)
+        file_path = self.gestion_csv.get_file_path(file_name, is_recap=False)
+
+        self.gestion_csv.delete_product(file_name, "Kiwi", is_recap=False)
+        self.assertFalse(os.path.exists(file_path + GestionCSV.SUMMARY_SUFFIX))
+
+        self.gestion_csv.load_stats(file_name)
+        self.gestion_csv.delete_product(file_name, "Banane", is_recap=False)
+        gestion_csv = GestionCSV(stats=True)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            stats = gestion_csv.show_stats(file_name).as_dict()
+        self.assertEqual(gestion_csv.last_stats.lignes_lues, 0)
+        self.assertEqual(stats["categories"], {})
+
+    def test_stock_stats_lazy_delete(self):
+        """
+        Teste qu'une suppression différée rend le résumé périmé : il est recalculé.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_products(file_name, [["Banane", "10", "1.5", "Fruits"], ["Kiwi", "3", "0.5", "Fruits"],
+                                                  ["Pomme", "20", "2", "Fruits"]], is_recap=False)
+        self.gestion_csv.load_stats(file_name)
+
+        self.gestion_csv.delete_product(file_name, "Pomme", is_recap=False, lazy=True)
+
+        self.assertEqual(self.gestion_csv.load_stats(file_name).total()[:2], [2, 13])
+
+    def test_stock_stats_interactive(self):
+        """
+        Teste l'affichage des statistiques depuis l'interface interactive.
+        """
+        file_name = "test_produits.csv"
+        self.gestion_csv.create_csv(file_name)
+        self.gestion_csv.add_products(file_name, [["Banane", "10", "1.5", "Fruits"], ["Kiwi", "3", "0.5", "Fruits"]],
+                                      is_recap=False)
+
+        sortie = io.StringIO()
+        with contextlib.redirect_stdout(sortie):
+            InterfaceInteractif(self.gestion_csv).onecmd(f"stats {file_name}")
+
+        self.assertIn("Total     | 2        | 13", sortie.getvalue())
+
+    def test_stock_stats_typed_merge(self):
+        """
+        Teste que le résumé d'une fusion vers un moteur typé ne compte que les lignes stockées.
+        """
+        self.gestion_csv.create_csv("test_produits.csv")
+        self.gestion_csv.add_products("test_produits.csv", [["Banane", "10", "1.5", "Fruits"], ["Poire", "1.5", "2", "Fruits"],
+                                                            ["Kiwi", "3", "x", "Fruits"], ["Audi TT", "5", "30000", "Sport"]],
+                                      is_recap=False)
+
+        for extension in ("col", "sqlite"):
+            recap = f"recap.{extension}"
+            self.gestion_csv.merge_csv(["test_produits.csv"], recap)
+            self.assertEqual(len(list(self.gestion_csv.iter_products(recap, is_recap=True))), 2)
+            stats = self.gestion_csv.load_stats(recap, is_recap=True).as_dict()
+            self.assertEqual(stats["total"], {"produits": 2, "quantite": 15, "valeur": 150015.0, "prix_min": 1.5,
+                                              "prix_max": 30000})
+
+    def test_benchmark(self):
+        """
+        Teste le banc d'essai : mesures dans des processus dédiés et détection des régressions.
+        """
+        import benchmark
+
+        resultats = benchmark.run_benchmark(sizes=[200], operations=['delete', 'search'], repeat=1, cardinality=10)
+        self.assertEqual([(r['operation'], r['lignes']) for r in resultats['resultats']], [('delete', 200), ('search', 200)])
+        for resultat in resultats['resultats']:
+            self.assertGreater(resultat['secondes'], 0)
+        # Les fichiers de mesure sont créés hors des répertoires du projet
+        self.assertEqual(os.listdir(self.gestion_csv.LISTE_CSV_DIR), [])
+
+    def test_benchmark_compare_results(self):
+        """
+        Teste la détection des régressions entre deux séries de mesures.
+        """
+        import benchmark
+
+        resultats = {'resultats': [{'operation': 'delete', 'lignes': 200, 'secondes': 0.5, 'rss_max_ko': 20000},
+                                   {'operation': 'search', 'lignes': 200, 'secondes': 0.2, 'rss_max_ko': 20000}]}
+        self.assertEqual(benchmark.compare_results(resultats, resultats), [])
+        reference = {'resultats': [dict(r, secondes=r['secondes'] / 10 - 0.01) for r in resultats['resultats']]}
+        regressions = benchmark.compare_results(resultats, reference)
+        self.assertEqual([r['mesure'] for r in regressions], ['secondes', 'secondes'])
+
+    def test_operation_stats(self):
+        """
+        Teste la mesure des opérations : lignes lues et écrites, durée et résultat de l'opération.
+        """
+        gestion_csv = GestionCSV(stats=True)
+        gestion_csv.create_csv("test_produits.csv")
+        self.assertEqual(gestion_csv.last_stats.operation, "create_csv")
+
+        counts = gestion_csv.add_products("test_produits.csv", [["Banane", "10", "1.5", "Fruits"], ["Kiwi", "3", "0.5", "Fruits"],
+                                                                ["Audi TT", "5", "30000", "Sport"]], is_recap=False)
+        mesure = gestion_csv.last_stats
+        self.assertEqual((mesure.operation, mesure.fichier), ("add_products", "test_produits.csv"))
+        self.assertEqual((mesure.lignes_lues, mesure.lignes_ecrites), (0, 3))
+        self.assertIs(mesure.resultat, counts)
+        self.assertGreater(mesure.duree, 0)
+
+        gestion_csv.search_product("test_produits.csv", product_categ="Fruits")
+        self.assertEqual((gestion_csv.last_stats.lignes_lues, gestion_csv.last_stats.lignes_ecrites), (3, 0))
+
+    def test_operation_stats_merge(self):
+        """
+        Teste que chaque ligne d'entrée d'une fusion est lue une seule fois : les noms
+        du filtre de Bloom et le résumé du stock sont relevés pendant la copie.
+        """
+        gestion_csv = GestionCSV(stats=True)
+        gestion_csv.create_csv("test_produits.csv")
+        gestion_csv.add_products("test_produits.csv", [["Banane", "10", "1.5", "Fruits"], ["Kiwi", "3", "0.5", "Fruits"],
+                                                       ["Audi TT", "5", "30000", "Sport"]], is_recap=False)
+
+        gestion_csv.merge_csv(["test_produits.csv", "test_produits.csv"], "recap.csv")
+
+        self.assertEqual((gestion_csv.last_stats.lignes_lues, gestion_csv.last_stats.lignes_ecrites), (6, 6))
+
+    def test_operation_stats_incremental_merge(self):
+        """
+        Teste que les segments inchangés recopiés depuis l'ancien récapitulatif (sendfile)
+        ne sont comptés qu'en octets.
+        """
+        gestion_csv = GestionCSV(stats=True)
+        gestion_csv.create_csv("test_produits.csv")
+        gestion_csv.add_products("test_produits.csv", [["Banane", "10", "1.5", "Fruits"], ["Kiwi", "3", "0.5", "Fruits"]],
+                                 is_recap=False)
+        gestion_csv.merge_csv(["test_produits.csv", "test_produits.csv"], "recap.csv")
+        gestion_csv.create_csv("autres.csv")
+        gestion_csv.add_product("autres.csv", ["Tesla", "6", "45000", "Electrique"], is_recap=False)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            gestion_csv.merge_csv(["autres.csv", "test_produits.csv", "test_produits.csv"], "recap.csv")
+
+        file_path = gestion_csv.get_file_path("test_produits.csv", is_recap=False)
+        with open(file_path, mode='rb') as file:
+            taille_lignes = os.path.getsize(file_path) - len(file.readline())
+        self.assertEqual(gestion_csv.last_stats.octets_copies, 2 * taille_lignes)
+        self.assertEqual(gestion_csv.last_stats.lignes_lues, 1)
+
+    def test_operation_stats_nested_operation(self):
+        """
+        Teste qu'une opération appelée par une autre fait partie de sa mesure.
+        """
+        gestion_csv = GestionCSV(stats=True)
+        gestion_csv.create_csv("test_produits.csv")
+        gestion_csv.add_products("test_produits.csv", [["Banane", "10", "1.5", "Fruits"], ["Kiwi", "3", "0.5", "Fruits"],
+                                                       ["Audi TT", "5", "30000", "Sport"]], is_recap=False)
+
+        gestion_csv.delete_product("test_produits.csv", "Kiwi", is_recap=False)
+
+        self.assertEqual(gestion_csv.last_stats.operation, "delete_product")
+        self.assertEqual((gestion_csv.last_stats.lignes_lues, gestion_csv.last_stats.lignes_ecrites), (3, 2))
+        self.assertEqual(set(gestion_csv.last_stats.as_dict()), {'operation', 'fichier', 'duree', 'lignes_lues', 'lignes_ecrites',
+                                                                 'lignes_par_seconde', 'octets_copies', 'octets_lus',
+                                                                 'octets_ecrits', 'memoire_max'})
+
+    def test_operation_stats_other_thread(self):
+        """
+        Teste que les lignes lues par un autre thread ne sont pas comptées dans la mesure en cours.
+        """
+        self.gestion_csv.create_csv("test_produits.csv")
+        self.gestion_csv.add_product("test_produits.csv", ["Banane", "10", "1.5", "Fruits"], is_recap=False)
+
+        autre = threading.Thread(target=lambda: list(GestionCSV().iter_products("test_produits.csv")))
+        with StatistiquesOperation("test") as mesure:
+            autre.start()
+            autre.join()
+
+        self.assertEqual(mesure.lignes_lues, 0)
+
+    def test_operation_stats_disabled(self):
+        """
+        Teste qu'aucune mesure n'est prise une fois les statistiques désactivées.
+        """
+        gestion_csv = GestionCSV(stats=True)
+        gestion_csv.create_csv("test_produits.csv")
+
+        gestion_csv.stats = False
+        mesure = gestion_csv.last_stats
+        gestion_csv.add_product("test_produits.csv", ["Pomme", "20", "2", "Fruits"], is_recap=False)
+
+        self.assertIs(gestion_csv.last_stats, mesure)
+
+    def test_fast_start(self):
+        """
+        Teste le démarrage rapide : modules propres à certaines actions non importés.
+        """
+        import subprocess
+
+        repertoire = os.path.dirname(os.path.abspath(__file__))
+        env = dict(os.environ, PYTHONPATH=repertoire)
+        modules = subprocess.run(
+            [sys.executable, "-c", "import sys, script; print(' '.join(m for m in ('asyncio', 'sqlite3', 'concurrent.futures', "
+                                   "'gzip', 'lzma', 'hashlib', 'socket', 'tempfile', 'shutil') if m in sys.modules))"],
+            env=env, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(modules.strip(), "")
+
+    def test_search_creates_no_directory(self):
+        """
+        Teste qu'une recherche en ligne de commande ne crée aucun répertoire.
+        """
+        import subprocess
+        import tempfile
+
+        repertoire = os.path.dirname(os.path.abspath(__file__))
+        env = dict(os.environ, PYTHONPATH=repertoire)
+        with tempfile.TemporaryDirectory() as dossier:
+            sortie = subprocess.run([sys.executable, os.path.join(repertoire, "script.py"), "search", "produits.csv",
+                                     "--product_name", "Pomme"], cwd=dossier, env=env, capture_output=True, text=True).stdout
+            self.assertIn("n'existe pas", sortie)
+            self.assertEqual(os.listdir(dossier), [])
+
+    def test_batch_script(self):
+        """
+        Teste l'exécution d'un script de commandes : les ajouts et suppressions consécutifs
+        sur un même fichier sont regroupés en une seule opération.
+        """
+        script = [
+            "# Script de maintenance",
+            "create test_produits.csv",
+            "add test_produits.csv Banane 10 1.5 Fruits",
+            "add test_produits.csv Kiwi 3 0.5 Fruits",
+            "add test_produits.csv Audi 5 30000 Sport",
+            "",
+            "delete test_produits.csv Kiwi",
+            "delete test_produits.csv Audi Inconnu",
+            "add test_produits.csv Pomme 20 2 Fruits",
+            "search test_produits.csv --product_categ Fruits --format csv",
+            "exit",
+            "add test_produits.csv Tesla 6 45000 Electrique",
+        ]
+        sortie = io.StringIO()
+        with contextlib.redirect_stdout(sortie):
+            operations = InterfaceInteractif(self.gestion_csv).run_batch(script)
+
+        # create, un ajout groupé, une suppression groupée, un ajout, search et exit
+        self.assertEqual(operations, 6)
+        self.assertIn("Banane,10,1.5,Fruits\nPomme,20,2,Fruits", sortie.getvalue())
+        self.assertIn("Produit 'Inconnu' non trouvé", sortie.getvalue())
+        self.assertIn("add : 4 commande(s), 2 opération(s)", sortie.getvalue())
+        self.assertEqual([p.nom for p in self.gestion_csv.iter_products("test_produits.csv")], ["Banane", "Pomme"])
+
+    def test_batch_script_rejected_line(self):
+        """
+        Teste qu'une ligne rejetée d'un ajout groupé est désignée par son numéro dans le script.
+        """
+        script = [
+            "create test_produits.col",
+            "add test_produits.col Banane 10 1.5 Fruits",
+            "# Quantité invalide pour le stockage par colonnes",
+            "add test_produits.col Kiwi beaucoup 0.5 Fruits",
+        ]
+        sortie = io.StringIO()
+        with contextlib.redirect_stdout(sortie):
+            InterfaceInteractif(self.gestion_csv).run_batch(script)
+        self.assertIn("Ligne 4 rejetée : quantité ou prix invalide.", sortie.getvalue())